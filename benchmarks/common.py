@@ -0,0 +1,84 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Canvases and parameters shared by the benchmarks."""
+
+from __future__ import division
+
+import numpy
+import toyplot
+
+
+marks = [
+    "plot",
+    "scatterplot",
+    "bar-magnitudes",
+    "bar-boundaries",
+    "fill",
+    "rect",
+    "text",
+    "graph",
+    "table",
+    ]
+
+sizes = [10 ** exponent for exponent in range(2, 8)]
+
+# Largest size measured for each mark and operation.  Marks that emit an
+# element per datum, and marks that require layout, reach asv's timeout long
+# before marks that are drawn as a single path.
+_path = {"construct": 10 ** 7, "finalize": 10 ** 7, "html": 10 ** 6, "svg": 10 ** 6, "pdf": 10 ** 5, "png": 10 ** 5}
+_datum = {"construct": 10 ** 7, "finalize": 10 ** 7, "html": 10 ** 5, "svg": 10 ** 5, "pdf": 10 ** 4, "png": 10 ** 4}
+_limits = {
+    "plot": _path,
+    "scatterplot": _datum,
+    "bar-magnitudes": _datum,
+    "bar-boundaries": _datum,
+    "fill": _path,
+    "rect": _datum,
+    "text": dict(_datum, construct=10 ** 5, finalize=10 ** 5),
+    "graph": {"construct": 10 ** 4, "finalize": 10 ** 4, "html": 10 ** 4, "svg": 10 ** 4, "pdf": 10 ** 3, "png": 10 ** 3},
+    "table": {"construct": 10 ** 5, "finalize": 10 ** 5, "html": 10 ** 4, "svg": 10 ** 4, "pdf": 10 ** 4, "png": 10 ** 4},
+    }
+
+
+def skip(mark, size, operation):
+    """Skip a benchmark that would exceed the time limit, using asv's convention."""
+    if size > _limits[mark][operation]:
+        raise NotImplementedError()
+
+
+def data(size):
+    """Return reproducible random data for a benchmark."""
+    random = numpy.random.RandomState(1234)
+    return numpy.arange(size), random.uniform(size=size), random
+
+
+def build(mark, size):
+    """Return a canvas containing one mark with `size` datums."""
+    x, y, random = data(size)
+    canvas = toyplot.Canvas(800, 600)
+    if mark == "table":
+        side = int(round(numpy.sqrt(size)))
+        canvas.matrix(random.uniform(size=(side, side)))
+        return canvas
+
+    axes = canvas.axes()
+    if mark == "plot":
+        axes.plot(x, y)
+    elif mark == "scatterplot":
+        axes.scatterplot(x, y)
+    elif mark == "bar-magnitudes":
+        axes.bars(y)
+    elif mark == "bar-boundaries":
+        axes.bars(numpy.column_stack((-y, y)), baseline=None)
+    elif mark == "fill":
+        axes.fill(x, -y, y)
+    elif mark == "rect":
+        axes.rects(x, x + 0.5, y, y + 0.5)
+    elif mark == "text":
+        axes.text(x, y, ["%s" % index for index in range(size)])
+    elif mark == "graph":
+        axes.graph(random.randint(0, max(size // 10, 2), size=(size, 2)))
+    return canvas
+
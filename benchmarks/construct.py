@@ -0,0 +1,44 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Benchmarks for creating canvases, and finalizing their axes."""
+
+from __future__ import division
+
+from . import common
+
+
+class Construct(object):
+    params = [common.marks, common.sizes]
+    param_names = ["mark", "size"]
+    timeout = 300
+
+    def setup(self, mark, size):
+        common.skip(mark, size, "construct")
+
+    def time_construct(self, mark, size):
+        common.build(mark, size)
+
+    def peakmem_construct(self, mark, size):
+        common.build(mark, size)
+
+
+class Finalize(object):
+    params = [common.marks, common.sizes]
+    param_names = ["mark", "size"]
+    timeout = 300
+    # Axes only finalize once, so each sample needs a freshly built canvas.
+    number = 1
+
+    def setup(self, mark, size):
+        common.skip(mark, size, "finalize")
+        self.canvas = common.build(mark, size)
+
+    def time_finalize(self, mark, size):
+        for child in self.canvas._children:
+            child._finalize()
+
+    def peakmem_finalize(self, mark, size):
+        for child in self.canvas._children:
+            child._finalize()
@@ -0,0 +1,51 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Benchmarks for rendering canvases with each backend."""
+
+from __future__ import division
+
+import importlib
+import io
+
+from . import common
+
+
+class _Render(object):
+    params = [common.marks, common.sizes]
+    param_names = ["mark", "size"]
+    timeout = 600
+    number = 1
+    format = None
+
+    def setup(self, mark, size):
+        common.skip(mark, size, self.format)
+        try:
+            self.backend = importlib.import_module("toyplot." + self.format)
+        except Exception:
+            # The backend's dependencies aren't installed.
+            raise NotImplementedError()
+        self.canvas = common.build(mark, size)
+
+    def time_render(self, mark, size):
+        self.backend.render(self.canvas, io.BytesIO())
+
+    def peakmem_render(self, mark, size):
+        self.backend.render(self.canvas, io.BytesIO())
+
+
+class HTML(_Render):
+    format = "html"
+
+
+class SVG(_Render):
+    format = "svg"
+
+
+class PDF(_Render):
+    format = "pdf"
+
+
+class PNG(_Render):
+    format = "png"
@@ -43,5 +43,5 @@ setup(
             "toyplot/__init__.py",
             "r").read(),
         re.M).group(1),
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
 )
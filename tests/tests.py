@@ -4,51 +4,82 @@
 
 from __future__ import division
 
+import base64
 import io
 import collections
 import difflib
 import json
+import gc
 import nose.tools
 import numbers
 import numpy
 import os
+import pickle
 import re
+import shutil
 import sys
 import tempfile
+import threading
+import time
+import weakref
 import xml.etree.ElementTree as xml
+import zlib
 
 import toyplot
+import toyplot.batch
+import toyplot.bitmap
+import toyplot.cache
 import toyplot.color
 import toyplot.compatibility
+import toyplot.config
 import toyplot.data
+import toyplot.decimate
 import toyplot.html
 import toyplot.locator
+import toyplot.profile
 import toyplot.svg
 
 try:
     import toyplot.pdf
-except:
+except ImportError:
     pass
 
 try:
     import toyplot.png
-except:
+except ImportError:
     pass
 
 try:
     import toyplot.reportlab.pdf
-except:
+except ImportError:
     pass
 
 try:
     import toyplot.reportlab.png
-except:
+except ImportError:
+    pass
+
+try:
+    import reportlab.graphics.renderPM
+    import toyplot.reportlab.renderpm
+except ImportError:
     pass
 
 
 ##########################################################################
 # Test fixtures.
 
+def renderpm_available():
+    # reportlab >= 4 can't rasterize without a separately-installed backend.
+    if "toyplot.reportlab.renderpm" not in sys.modules:
+        return False
+    try:
+        reportlab.graphics.renderPM.PMCanvas(1, 1)
+    except reportlab.graphics.renderPM.RenderPMError:
+        return False
+    return True
+
+
 def assert_color_equal(a, b):
     numpy.testing.assert_array_almost_equal(
         (a["r"], a["g"], a["b"], a["a"]), b)
@@ -1071,8 +1102,7 @@ def test_animation_frame_sanity_checks():
         index=1,
         begin=2.3,
         end=2.4,
-        changes=collections.defaultdict(
-            lambda: collections.defaultdict(list)))
+        changes=toyplot.canvas._AnimationChanges())
     nose.tools.assert_equal(frame.index(), 1)
     nose.tools.assert_equal(frame.time(), 2.3)
     numpy.testing.assert_almost_equal(frame.duration(), 0.1)
@@ -1097,6 +1127,52 @@ def test_canvas_time():
     nose.tools.assert_equal(frame.index(), 5)
 
 
+def test_canvas_animation_changes():
+    canvas = toyplot.Canvas()
+    scatterplot = canvas.axes().scatterplot(numpy.arange(3))
+    text = canvas.text(0, 0, "")
+    def callback(frame):
+        frame.set_datum_style(scatterplot, 0, 1, {"fill": "red", "opacity": frame.index() // 2})
+        frame.set_mark_style(text, {"opacity": 0.5})
+        frame.set_datum_text(text, 0, 0, "frame")
+    canvas.animate(4, callback)
+
+    changes = canvas._animation.columns()
+    nose.tools.assert_equal(changes["frame"].tolist(), [0, 0, 0, 0, 2])
+    nose.tools.assert_equal(
+        sorted([str(canvas._animation.values()[value]) for value in changes["value"]]), ["0", "0.5", "1", "frame", "red"])
+
+    svg, svg_changes = toyplot.svg.render(canvas, animation=True)
+    nose.tools.assert_equal(len(svg_changes), 4)
+    nose.tools.assert_equal(svg_changes[0.0]["set-datum-style"][0][1:], [0, 1, {"fill": "red", "opacity": 0}])
+    nose.tools.assert_equal(svg_changes[0.0]["set-datum-text"][0][1:], [0, 0, "frame"])
+    nose.tools.assert_equal(svg_changes[2 / 30]["set-datum-style"][0][1:], [0, 1, {"opacity": 1}])
+    nose.tools.assert_equal(svg_changes[1 / 30], {})
+
+    animation = pickle.loads(pickle.dumps(canvas._animation))
+    animation.set_style("set-mark-style", 4 / 30, animation.marks()[1], -1, -1, {"opacity": 0.5})
+    nose.tools.assert_equal(animation.columns()["frame"].tolist(), [0, 0, 0, 0, 2])
+    animation.set_style("set-mark-style", 4 / 30, animation.marks()[1], -1, -1, {"opacity": 0.25})
+    nose.tools.assert_equal(animation.columns()["frame"].tolist(), [0, 0, 0, 0, 2, 4])
+    nose.tools.assert_equal(len(animation.marks()), 2)
+
+
+def test_canvas_animation_unhashable_values():
+    canvas = toyplot.Canvas()
+    plot = canvas.axes().plot(numpy.arange(3))
+    canvas.animate(2, lambda frame: frame.set_mark_style(plot, {"stroke-dasharray": [2, 2 + frame.index()]}))
+
+    values = canvas._animation.values()
+    nose.tools.assert_equal(
+        sorted([values[value] for value in canvas._animation.columns()["value"]]), [[2, 2], [2, 3]])
+    svg, svg_changes = toyplot.svg.render(canvas, animation=True)
+    nose.tools.assert_equal(svg_changes[0.0]["set-mark-style"][0][1], {"stroke-dasharray": [2, 2]})
+
+    animation = pickle.loads(pickle.dumps(canvas._animation))
+    animation.set_style("set-mark-style", 2 / 30, animation.marks()[0], -1, -1, {"stroke-dasharray": [1, 1]})
+    nose.tools.assert_equal(len(animation.values()), 3)
+
+
 def test_canvas_repr_html():
     canvas = toyplot.Canvas(autorender="html")
     html = canvas._repr_html_()
@@ -1123,6 +1199,228 @@ def test_color_require_color():
     with nose.tools.assert_raises(ValueError):
         toyplot.color._require_color(5)
 
+##########################################################################
+# toyplot.batch
+
+
+def _batch_canvas():
+    canvas = toyplot.Canvas(200, 200)
+    canvas.axes().plot(numpy.arange(10))
+    return canvas
+
+
+def _batch_failure():
+    raise ValueError("Intentional failure.")
+
+
+def test_batch_render():
+    directory = tempfile.mkdtemp()
+    try:
+        canvases = [_batch_canvas(), _batch_canvas, _batch_failure]
+        for workers in [None, 2]:
+            if workers:
+                # Canvas objects can't be sent to worker processes.
+                with nose.tools.assert_raises_regexp(ValueError, "callable"):
+                    toyplot.batch.render(canvases, directory=directory, workers=workers)
+                canvases = [_batch_canvas, _batch_canvas, _batch_failure]
+            progress = []
+            report = toyplot.batch.render(iter(canvases), formats=["html", "svg"], directory=os.path.join(directory, str(workers)), workers=workers, progress=progress.append)
+            nose.tools.assert_equal(len(progress), 3)
+            nose.tools.assert_equal([result.index for result in report.results], [0, 1, 2])
+            nose.tools.assert_equal([result.name for result in report.failures], ["canvas-2"])
+            nose.tools.assert_in("Intentional failure.", report.failures[0].error)
+            nose.tools.assert_equal(report.results[1].paths, [os.path.join(directory, str(workers), "canvas-1.html"), os.path.join(directory, str(workers), "canvas-1.svg")])
+            for path in report.results[0].paths + report.results[1].paths:
+                nose.tools.assert_true(os.path.exists(path))
+            nose.tools.assert_true(report.throughput > 0)
+            nose.tools.assert_true(report.latency(0) <= report.latency(95))
+
+        with nose.tools.assert_raises(ValueError):
+            toyplot.batch.render(canvases, formats=["bmp"], directory=directory)
+        with nose.tools.assert_raises(ValueError):
+            toyplot.batch.render(canvases, directory=directory, names=["a"])
+        with nose.tools.assert_raises(ValueError):
+            toyplot.batch.render(iter(canvases), directory=directory, names=iter(["a"]))
+        with nose.tools.assert_raises(ValueError):
+            toyplot.batch.render(iter(canvases), directory=directory, names=iter(["a", "b", "c", "d"]))
+    finally:
+        shutil.rmtree(directory)
+
+
+##########################################################################
+# toyplot.bitmap
+
+
+def test_bitmap_discs():
+    colors = toyplot.color.broadcast(colors=["red", "blue"], shape=(2,))
+    colors["a"] = 0.5
+    image = toyplot.bitmap.discs(10, 5, [2.5, 2.5], [2.5, 2.5], [3, 3], colors)
+    nose.tools.assert_equal(image.shape, (5, 10, 4))
+    numpy.testing.assert_array_equal(image[2, 2], [128, 0, 128, 191])
+    numpy.testing.assert_array_equal(image[0, 0], [0, 0, 0, 0])
+    numpy.testing.assert_array_equal(image[:, 5:], 0)
+
+
+def test_bitmap_to_png():
+    image = numpy.arange(2 * 3 * 4, dtype="uint8").reshape((2, 3, 4))
+    png = toyplot.bitmap.to_png(image)
+    nose.tools.assert_equal(png[:8], b"\x89PNG\r\n\x1a\n")
+    nose.tools.assert_equal(png[12:16], b"IHDR")
+    nose.tools.assert_equal(png[-8:-4], b"IEND")
+    length = int(numpy.frombuffer(png[33:37], dtype=">u4")[0])
+    nose.tools.assert_equal(png[37:41], b"IDAT")
+    scanlines = numpy.frombuffer(zlib.decompress(png[41:41 + length]), dtype="uint8").reshape((2, 13))
+    numpy.testing.assert_array_equal(scanlines[:, 0], 0)
+    numpy.testing.assert_array_equal(scanlines[:, 1:].reshape((2, 3, 4)), image)
+
+
+##########################################################################
+# toyplot.cache
+
+
+def test_cache_fingerprint():
+    def build(x, color):
+        canvas = toyplot.Canvas(200, 200)
+        axes = canvas.axes()
+        axes.scatterplot(x, color=color)
+        canvas.table(rows=2, columns=2)
+        canvas.animate(2, lambda frame: frame.set_mark_style(axes._children[0], {"opacity": 0.5}))
+        return canvas
+    fingerprint = toyplot.cache.fingerprint(build(numpy.arange(10), "red"))
+    nose.tools.assert_equal(toyplot.cache.fingerprint(build(numpy.arange(10), "red")), fingerprint)
+    nose.tools.assert_not_equal(toyplot.cache.fingerprint(build(numpy.arange(11), "red")), fingerprint)
+    nose.tools.assert_not_equal(toyplot.cache.fingerprint(build(numpy.arange(10), "blue")), fingerprint)
+
+
+def test_cache_tiers():
+    directory = tempfile.mkdtemp()
+    try:
+        cache = toyplot.cache.Cache(memory_size=10, directory=directory, disk_size=20)
+        cache.put("a", b"0123456789")
+        cache.put("b", b"0123456789")
+        nose.tools.assert_equal(cache.evictions, 1)
+        nose.tools.assert_equal(cache.get("b"), b"0123456789")
+        # Evicted from memory, but still on disk.
+        nose.tools.assert_equal(cache.get("a"), b"0123456789")
+        nose.tools.assert_equal(cache.get("c"), None)
+        nose.tools.assert_equal((cache.hits, cache.misses), (2, 1))
+
+        os.utime(os.path.join(directory, "a"), (0, 0))
+        cache.put("c", b"0123456789")
+        nose.tools.assert_equal(sorted(os.listdir(directory)), ["b", "c"])
+
+        nose.tools.assert_equal(toyplot.cache.Cache(directory=directory).get("c"), b"0123456789")
+        cache.clear()
+        nose.tools.assert_equal(os.listdir(directory), [])
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_cache_render():
+    def build():
+        canvas = toyplot.Canvas(200, 200)
+        canvas.axes().plot(numpy.arange(10))
+        return canvas
+    def render(canvas, **kwargs):
+        stream = io.BytesIO()
+        toyplot.html.render(canvas, stream, **kwargs)
+        return stream.getvalue()
+
+    try:
+        toyplot.config.cache = toyplot.cache.Cache()
+        # Markup with random ids is never reused.
+        canvas = build()
+        nose.tools.assert_not_equal(render(canvas), render(canvas))
+        nose.tools.assert_not_equal(canvas._repr_html_(), canvas._repr_html_())
+        toyplot.svg.render(canvas, io.BytesIO())
+        nose.tools.assert_equal((toyplot.config.cache.hits, toyplot.config.cache.misses), (0, 0))
+
+        # Markup is shared by every id prefix.
+        first = render(build(), id_prefix="fig")
+        nose.tools.assert_equal(render(build(), id_prefix="fig"), first)
+        toyplot.config.cache = None
+        other = render(build(), id_prefix="other")
+        toyplot.config.cache = toyplot.cache.Cache()
+        nose.tools.assert_equal(render(build(), id_prefix="fig"), first)
+        nose.tools.assert_equal(render(build(), id_prefix="other"), other)
+        nose.tools.assert_not_equal(other, first)
+        toyplot.svg.render(build(), io.BytesIO(), id_prefix="fig")
+        nose.tools.assert_equal((toyplot.config.cache.hits, toyplot.config.cache.misses), (1, 2))
+
+        # Rebuilt canvases hit the cache with deterministic ids.
+        toyplot.config.deterministic_ids = True
+        markup = build()._repr_html_()
+        nose.tools.assert_equal(build()._repr_html_(), markup)
+        first = render(build())
+        nose.tools.assert_equal(render(build()), first)
+        # The HTML was already cached by the renders with explicit prefixes.
+        nose.tools.assert_equal((toyplot.config.cache.hits, toyplot.config.cache.misses), (4, 3))
+        toyplot.config.cache = None
+        nose.tools.assert_equal(build()._repr_html_(), markup)
+        nose.tools.assert_equal(render(build()), first)
+        toyplot.config.deterministic_ids = False
+
+        # Canvases that can't be fingerprinted aren't cached.
+        toyplot.config.cache = toyplot.cache.Cache()
+        canvas = build()
+        canvas._children[0]._unknown = object()
+        with nose.tools.assert_raises(TypeError):
+            toyplot.cache.fingerprint(canvas)
+        nose.tools.assert_in(b'id="fig-1"', render(canvas, id_prefix="fig"))
+        nose.tools.assert_equal((toyplot.config.cache.hits, toyplot.config.cache.misses), (0, 0))
+    finally:
+        toyplot.config.cache = None
+        toyplot.config.deterministic_ids = False
+
+
+##########################################################################
+# toyplot.decimate
+
+
+def test_decimate_minmax():
+    x = numpy.linspace(0, 9.99, 1000)
+    y = numpy.sin(x * 10)
+    y[500] = 5
+    indices = toyplot.decimate.minmax(x, y)
+    nose.tools.assert_equal(indices[0], 0)
+    nose.tools.assert_equal(indices[-1], 999)
+    nose.tools.assert_less_equal(len(indices), 40)
+    nose.tools.assert_in(500, indices)
+    for column in range(10):
+        selected = indices[numpy.floor(x[indices]) == column]
+        nose.tools.assert_equal(y[selected].min(), y[numpy.floor(x) == column].min())
+        nose.tools.assert_equal(y[selected].max(), y[numpy.floor(x) == column].max())
+
+
+def test_decimate_lttb():
+    x = numpy.arange(1000.0)
+    y = numpy.zeros(1000)
+    y[333] = 1
+    indices = toyplot.decimate.lttb(x, y, 50)
+    nose.tools.assert_equal(len(indices), 50)
+    nose.tools.assert_equal(indices[0], 0)
+    nose.tools.assert_equal(indices[-1], 999)
+    nose.tools.assert_in(333, indices)
+    numpy.testing.assert_array_equal(toyplot.decimate.lttb(x, y, 2000), numpy.arange(1000))
+
+
+def test_html_decimate():
+    position = numpy.linspace(0, 10, 1001)
+    values = numpy.sin(position)
+    mask = numpy.ones(1001, dtype="bool")
+    mask[500] = False
+    for method in ["minmax", "lttb"]:
+        index, commands = toyplot.html._decimate(position, values, mask, method)
+        nose.tools.assert_less(len(index), 100)
+        nose.tools.assert_equal(len(index), len(commands))
+        nose.tools.assert_equal([index[i] for i, command in enumerate(commands) if command == "M"], [0, 501])
+        nose.tools.assert_not_in(500, index)
+    index, commands = toyplot.html._decimate(position, values, mask, None)
+    nose.tools.assert_equal(len(index), 1000)
+    with nose.tools.assert_raises(ValueError):
+        toyplot.html._decimate(position, values, mask, "foo")
+
+
 ##########################################################################
 # toyplot.html
 
@@ -1149,6 +1447,837 @@ def test_html_ipython_html():
     canvas._repr_html_()
 
 
+def test_html_path_data():
+    mask = numpy.array([True, True, False, True, True, True, False])
+    nose.tools.assert_equal(
+        toyplot.html._flat_contiguous(mask), [slice(0, 2), slice(3, 6)])
+    nose.tools.assert_equal(
+        toyplot.html._path_data(
+            toyplot.html._segment_commands(mask),
+            numpy.arange(7.0)[mask],
+            numpy.arange(7.0)[mask] * 0.5),
+        "M 0.0 0.0 L 1.0 0.5 M 3.0 1.5 L 4.0 2.0 L 5.0 2.5")
+    nose.tools.assert_equal(
+        toyplot.html._path_data(
+            ["M", "Q", None],
+            numpy.array([0.0, 1.0, 2.0]),
+            numpy.array([3.0, 4.0, 5.0])),
+        "M 0.0 3.0 Q 1.0 4.0 2.0 5.0")
+    nose.tools.assert_equal(
+        toyplot.html._polygon_points(numpy.array([0.0, 1.0]), numpy.array([2.0, 3.0])),
+        "0.0,2.0 1.0,3.0")
+
+
+def test_html_marker_symbols():
+    canvas = toyplot.Canvas()
+    axes = canvas.axes()
+    axes.scatterplot(numpy.arange(10), marker="o*", size=10)
+    axes.plot(numpy.arange(10), marker=["s", {"shape": "d", "label": "A"}] * 5, size=10)
+
+    marker_symbols = toyplot.config.marker_symbols
+    toyplot.config.marker_symbols = True
+    try:
+        svg = toyplot.svg.render(canvas)
+        for module in ["toyplot.pdf", "toyplot.reportlab.pdf"]:
+            if module in sys.modules:
+                sys.modules[module].render(canvas, io.BytesIO())
+    finally:
+        toyplot.config.marker_symbols = marker_symbols
+
+    nose.tools.assert_equal(svg.get("xmlns:xlink"), "http://www.w3.org/1999/xlink")
+    nose.tools.assert_equal(len(svg.findall(".//defs/g")), 3)
+    datums = svg.findall(".//*[@class='toyplot-Datum']")
+    nose.tools.assert_equal(len(datums), 20)
+    for datum in datums:
+        nose.tools.assert_equal(datum.tag, "use")
+        nose.tools.assert_is_not_none(svg.find(".//*[@id='%s']" % datum.get("xlink:href")[1:]))
+
+
+def test_html_style_classes():
+    canvas = toyplot.Canvas()
+    axes = canvas.axes()
+    scatterplot = axes.scatterplot(numpy.arange(10), color="red")
+    axes.bars(numpy.arange(5))
+    axes.rects(1, 2, 3, 4)
+    canvas.animate(2, lambda frame: frame.set_datum_style(
+        scatterplot, 0, frame.index(), {"fill": "blue"}))
+
+    def datum_styles(svg):
+        rules = {}
+        if svg.find("style") is not None:
+            rules = dict(re.findall(r"[.]([\w-]+)[{]([^}]*)[}]", svg.find("style").text))
+        styles = []
+        for datum in svg.iter():
+            classes = datum.get("class", "").split()
+            if "toyplot-Datum" in classes:
+                declarations = ";".join([rules.get(name, "") for name in classes] + [datum.get("style", "")])
+                styles.append(dict([declaration.split(":") for declaration in declarations.split(";") if declaration]))
+        nose.tools.assert_greater(len(styles), 0)
+        return styles
+
+    style_classes = toyplot.config.style_classes
+    toyplot.config.style_classes = True
+    try:
+        svg, changes = toyplot.svg.render(canvas, animation=True)
+        for module in ["toyplot.pdf", "toyplot.reportlab.pdf"]:
+            if module in sys.modules:
+                sys.modules[module].render(canvas, io.BytesIO())
+    finally:
+        toyplot.config.style_classes = style_classes
+
+    reference, reference_changes = toyplot.svg.render(canvas, animation=True)
+    nose.tools.assert_equal(datum_styles(svg), datum_styles(reference))
+    nose.tools.assert_less(
+        len(xml.tostring(svg)), len(xml.tostring(reference)))
+
+    toyplot.svg.apply_changes(svg, changes[0.0])
+    toyplot.svg.apply_changes(reference, reference_changes[0.0])
+    nose.tools.assert_equal(datum_styles(svg), datum_styles(reference))
+
+
+def test_html_apply_changes_index():
+    canvas = toyplot.Canvas()
+    axes = canvas.axes()
+    scatterplot = axes.scatterplot(numpy.arange(10), numpy.column_stack((numpy.arange(10), numpy.arange(10) ** 2)))
+    text = axes.text(numpy.arange(3), numpy.arange(3), ["a", "b", "c"])
+    def callback(frame):
+        frame.set_mark_style(text, {"opacity": frame.index() / 10})
+        frame.set_datum_style(scatterplot, frame.index() % 2, frame.index(), {"fill": "red"})
+        frame.set_datum_text(text, 0, frame.index() % 3, "frame %s" % frame.index())
+    canvas.animate(10, callback)
+
+    svg, changes = toyplot.svg.render(canvas, animation=True)
+    reference, reference_changes = toyplot.svg.render(canvas, animation=True)
+    index = toyplot.html.index(svg)
+    for time in sorted(changes):
+        toyplot.svg.apply_changes(svg, changes[time], index)
+        toyplot.svg.apply_changes(reference, reference_changes[time])
+        nose.tools.assert_equal(
+            re.sub(b"t[0-9a-f]{32}", b"id", xml.tostring(svg)),
+            re.sub(b"t[0-9a-f]{32}", b"id", xml.tostring(reference)))
+    nose.tools.assert_in(b"frame 9", xml.tostring(svg))
+
+
+def test_html_raster_scatterplot():
+    canvas = toyplot.Canvas()
+    axes = canvas.axes()
+    axes.scatterplot(numpy.arange(100), raster=True)
+    axes.scatterplot(numpy.arange(100), raster=50)
+    axes.scatterplot(numpy.arange(10), raster=50)
+    svg = toyplot.svg.render(canvas)
+    for module in ["toyplot.pdf", "toyplot.reportlab.pdf"]:
+        if module in sys.modules:
+            sys.modules[module].render(canvas, io.BytesIO())
+
+    marks = svg.findall(".//*[@class='toyplot-mark-Scatterplot']")
+    nose.tools.assert_equal([len(mark.findall("image")) for mark in marks], [1, 1, 0])
+    nose.tools.assert_equal(len(marks[2].findall(".//*[@class='toyplot-Datum']")), 10)
+    href = marks[0].find("image").get("xlink:href")
+    nose.tools.assert_true(href.startswith("data:image/png;base64,"))
+    png = base64.b64decode(href.split(",")[1])
+    nose.tools.assert_equal(png[1:4], b"PNG")
+
+    # Only filled circles are rasterized.
+    canvas = toyplot.Canvas()
+    axes = canvas.axes()
+    axes.scatterplot(numpy.arange(10), marker={"shape": "o"}, raster=True)
+    axes.scatterplot(numpy.arange(10), marker="s", raster=True)
+    axes.scatterplot(numpy.arange(10), mstyle={"stroke": "black"}, raster=True)
+    axes.scatterplot(numpy.arange(10), mstyle={"stroke": "none"}, raster=True)
+    axes.scatterplot(numpy.arange(10), marker={"shape": "o", "label": "A"}, raster=True)
+    canvas.numberline().scatterplot(numpy.arange(10), raster=True)
+    marks = toyplot.svg.render(canvas).findall(".//*[@class='toyplot-mark-Scatterplot']")
+    nose.tools.assert_equal([len(mark.findall("image")) for mark in marks], [1, 0, 0, 1, 0, 1])
+    nose.tools.assert_equal(len(marks[1].findall(".//*[@class='toyplot-Datum']")), 10)
+
+    with nose.tools.assert_raises(ValueError):
+        canvas.animate(2, lambda frame: frame.set_datum_style(axes._children[0], 0, 0, {"opacity": 0.5}))
+
+
+def test_html_precision():
+    nose.tools.assert_equal(toyplot.html._format_decimal(1.0 / 3, 2), "0.33")
+    nose.tools.assert_equal(toyplot.html._format_decimal(2.5001, 2), "2.5")
+    nose.tools.assert_equal(toyplot.html._format_decimal(-0.001, 2), "0")
+    nose.tools.assert_equal(toyplot.html._format_decimal(7.6, 0), "8")
+
+    values = numpy.array([0.0, -0.0, 1.0, -2.5, 1.0 / 3, 1e-7, 12345.678, numpy.nan, numpy.inf, -numpy.inf])
+    for precision in [None, 0, 1, 3]:
+        with toyplot.html._formatting_numbers(precision, False):
+            nose.tools.assert_equal(toyplot.html._format_numbers(values), [toyplot.html._format_number(value) for value in values])
+            nose.tools.assert_equal(toyplot.html._format_numbers(numpy.array([])), [])
+
+    def path_data(commands, x, y, precision, relative_paths):
+        with toyplot.html._formatting_numbers(precision, relative_paths):
+            return toyplot.html._path_data(commands, numpy.array(x), numpy.array(y))
+
+    commands = ["M", "L", "L", "M", "L"]
+    x = [1.0, 3.333, 5.0, 10.0, 11.0]
+    y = [2.0, 4.0, 6.0, 10.0, 9.5]
+    nose.tools.assert_equal(path_data(commands, x, y, None, False), "M 1.0 2.0 L 3.333 4.0 L 5.0 6.0 M 10.0 10.0 L 11.0 9.5")
+    nose.tools.assert_equal(path_data(commands, x, y, 1, False), "M 1 2 L 3.3 4 L 5 6 M 10 10 L 11 9.5")
+    nose.tools.assert_equal(path_data(commands, x, y, 1, True), "M 1 2 l 2.3 2 1.7 2 m 5 4 l 1 -0.5")
+    nose.tools.assert_equal(
+        path_data(["M", "Q", None], [0.0, 1.0, 2.0], [0.0, 1.0, 0.0], None, True),
+        "M 0.0 0.0 q 1.0 1.0 2.0 0.0")
+    nose.tools.assert_is_none(toyplot.html._number_format.precision)
+
+    canvas = toyplot.Canvas(600.1234, 400.5678)
+    axes = canvas.axes()
+    axes.plot(numpy.linspace(0, 1, 30) ** 2, marker="o")
+    axes.text(10, 0.5, "Text", angle=30)
+
+    svg = toyplot.svg.render(canvas, precision=2)
+    nose.tools.assert_equal(svg.get("viewBox"), "0 0 600.12 400.57")
+    for element in svg.iter():
+        for key in ["x", "y", "cx", "cy", "r", "d", "points", "transform", "width", "height", "viewBox"]:
+            if element.get(key) is not None:
+                nose.tools.assert_is_none(re.search(r"[.][0-9]{3}", element.get(key)))
+    nose.tools.assert_less(
+        len(xml.tostring(toyplot.svg.render(canvas, precision=1, relative_paths=True))),
+        len(xml.tostring(svg)))
+
+    precision, relative_paths = toyplot.config.precision, toyplot.config.relative_paths
+    toyplot.config.precision, toyplot.config.relative_paths = 1, True
+    try:
+        nose.tools.assert_in(" l ", toyplot.svg.render(canvas).find(".//path").get("d"))
+        for module in ["toyplot.pdf", "toyplot.reportlab.pdf"]:
+            if module in sys.modules:
+                sys.modules[module].render(canvas, io.BytesIO())
+    finally:
+        toyplot.config.precision, toyplot.config.relative_paths = precision, relative_paths
+
+
+def test_html_render_streaming():
+    canvas = toyplot.Canvas()
+    axes = canvas.axes(label="Streaming")
+    axes.plot(numpy.arange(10), title="Plot")
+    axes.scatterplot(numpy.arange(10) ** 2, marker="s")
+    canvas.text(100, 100, "Text")
+    canvas.table(rows=2, columns=2).cell(0, 0).data = "Cell"
+    canvas.numberline().scatterplot(numpy.arange(5))
+
+    def normalize(markup):
+        return re.sub(b"t[0-9a-f]{32}", b"id", markup)
+
+    stream = io.BytesIO()
+    toyplot.html.render(canvas, stream)
+    nose.tools.assert_equal(
+        normalize(stream.getvalue()),
+        normalize(xml.tostring(toyplot.html.render(canvas), method="html")))
+
+    stream = io.BytesIO()
+    toyplot.svg.render(canvas, stream)
+    nose.tools.assert_equal(
+        normalize(stream.getvalue()),
+        normalize(xml.tostring(toyplot.svg.render(canvas), method="xml")))
+
+    stream = io.BytesIO()
+    toyplot.svg.render(canvas, stream, precision=1, relative_paths=True)
+    nose.tools.assert_equal(
+        normalize(stream.getvalue()),
+        normalize(xml.tostring(toyplot.svg.render(canvas, precision=1, relative_paths=True), method="xml")))
+
+
+def test_html_deterministic_ids():
+    def build():
+        canvas = toyplot.Canvas(400, 300)
+        axes = canvas.axes()
+        axes.plot(numpy.arange(10), marker="o")
+        canvas.table(rows=2, columns=2).cell(0, 0).data = "Cell"
+        canvas.numberline().colormap(toyplot.color.LinearMap(toyplot.color.Palette(), domain_min=0, domain_max=1))
+        return canvas
+
+    def render(canvas, **kwargs):
+        stream = io.BytesIO()
+        toyplot.html.render(canvas, stream, **kwargs)
+        return stream.getvalue()
+
+    canvas = build()
+    markup = render(canvas, id_prefix="fig")
+    nose.tools.assert_in(b'id="fig-1"', markup)
+    nose.tools.assert_not_regexp_matches(markup.decode("utf-8"), "t[0-9a-f]{32}")
+    nose.tools.assert_equal(render(canvas, id_prefix="fig"), markup)
+    nose.tools.assert_equal(
+        xml.tostring(toyplot.svg.render(canvas, id_prefix="fig"), method="xml"),
+        xml.tostring(toyplot.svg.render(canvas, id_prefix="fig"), method="xml"))
+
+    try:
+        toyplot.config.deterministic_ids = True
+        fresh = build()
+        fingerprint = toyplot.cache.fingerprint(fresh)
+        first = render(fresh)
+        nose.tools.assert_equal(toyplot.cache.fingerprint(fresh), fingerprint)
+        nose.tools.assert_equal(render(fresh), first)
+        # Identical canvases, built separately, produce identical markup.
+        nose.tools.assert_equal(render(build()), first)
+        nose.tools.assert_equal(render(build()), render(build()))
+        nose.tools.assert_not_equal(render(build(), id_prefix="other"), first)
+        other = build()
+        other.text(10, 10, "Other")
+        nose.tools.assert_not_equal(render(other)[:200], first[:200])
+    finally:
+        toyplot.config.deterministic_ids = False
+
+
+def test_html_incremental_render():
+    canvas = toyplot.Canvas(600, 300)
+    axes1 = canvas.axes(grid=(1, 2, 0))
+    plot = axes1.plot(numpy.arange(10))
+    scatterplot = axes1.scatterplot(numpy.arange(10), marker="o")
+    axes2 = canvas.axes(grid=(1, 2, 1))
+    bars = axes2.bars(numpy.arange(5))
+
+    def render(incremental):
+        toyplot.config.incremental_render = incremental
+        try:
+            stream = io.BytesIO()
+            toyplot.html.render(canvas, stream, id_prefix="fig")
+            return stream.getvalue()
+        finally:
+            toyplot.config.incremental_render = False
+
+    markup = render(True)
+    finalized = axes1._finalized
+    fragments = dict([(mark, mark._fragment) for mark in [plot, scatterplot, bars]])
+    nose.tools.assert_equal(render(True), markup)
+    nose.tools.assert_equal(render(False), markup)
+    nose.tools.assert_is(axes1._finalized, finalized)
+
+    revision = plot._table._revision
+    plot._table["y0"] = numpy.arange(10)[::-1]
+    nose.tools.assert_equal(plot._table._revision, revision + 1)
+    markup = render(True)
+    nose.tools.assert_equal(render(False), markup)
+    nose.tools.assert_is_not(plot._fragment, fragments[plot])
+    nose.tools.assert_is(scatterplot._fragment, fragments[scatterplot])
+    nose.tools.assert_is(bars._fragment, fragments[bars])
+    nose.tools.assert_is(axes1._finalized, finalized)
+
+    axes1.y.domain.max = 20
+    nose.tools.assert_equal(render(True), render(False))
+    nose.tools.assert_is_not(axes1._finalized, finalized)
+    nose.tools.assert_is_not(scatterplot._fragment, fragments[scatterplot])
+    nose.tools.assert_is(bars._fragment, fragments[bars])
+
+    # Markup with random ids is never reused.
+    try:
+        toyplot.config.incremental_render = True
+        first = toyplot.html.render(canvas)
+        second = toyplot.html.render(canvas)
+    finally:
+        toyplot.config.incremental_render = False
+    ids = set([element.get("id") for element in first.iter() if element.get("id")])
+    nose.tools.assert_false(ids & set([element.get("id") for element in second.iter() if element.get("id")]))
+
+
+def test_html_incremental_render_collectable():
+    def render():
+        canvas = toyplot.Canvas()
+        mark = canvas.axes().plot(numpy.arange(10))
+        toyplot.html.render(canvas, io.BytesIO(), id_prefix="fig")
+        nose.tools.assert_is_not_none(mark._fragment)
+        return weakref.ref(mark)
+
+    toyplot.config.incremental_render = True
+    try:
+        mark = render()
+    finally:
+        toyplot.config.incremental_render = False
+    gc.collect()
+    nose.tools.assert_is_none(mark())
+
+
+def test_html_datum_attribs():
+    canvas = toyplot.Canvas()
+    axes = canvas.axes()
+    axes.rects([0, 1, 2], [0.5, 1.5, 2.5], [3, 2, 1], [0, 0, 0], color=["red", "blue", "red"], title="rect")
+    axes.hlines([0.5, 1.5], color="green")
+    svg = toyplot.svg.render(canvas)
+
+    rects = [datum for datum in svg.iter("rect") if datum.get("class") == "toyplot-Datum"]
+    nose.tools.assert_equal(len(rects), 3)
+    nose.tools.assert_equal(rects[0].get("style"), rects[2].get("style"))
+    nose.tools.assert_not_equal(rects[0].get("style"), rects[1].get("style"))
+    nose.tools.assert_equal(
+        [float(rect.get("width")) for rect in rects],
+        [float(rects[0].get("width"))] * 3)
+    nose.tools.assert_equal(
+        [rect.find("title").text for rect in rects], ["rect"] * 3)
+
+    lines = [datum for datum in svg.iter("line") if datum.get("class") == "toyplot-Datum"]
+    nose.tools.assert_equal(len(lines), 2)
+    nose.tools.assert_in("stroke:rgb(0%,50.2%,0%)", lines[0].get("style"))
+    nose.tools.assert_equal(lines[0].get("x1"), lines[1].get("x1"))
+    nose.tools.assert_equal(lines[0].get("y1"), lines[0].get("y2"))
+
+    attribs = toyplot.html._datum_attribs(
+        "fill",
+        toyplot.color.broadcast(["red", "red", "blue"], 3),
+        numpy.array([0.5, 0.5, 0.5]),
+        {"stroke": "black"},
+        None)
+    nose.tools.assert_is(attribs[0], attribs[1])
+    nose.tools.assert_equal(attribs[0][0], "toyplot-Datum")
+    nose.tools.assert_in("opacity:0.5", attribs[2][1])
+
+
+def test_html_css_colors():
+    colors = toyplot.color.broadcast(["red", "rgba(10%,20%,30%,0.25)", "red"], 3)
+    css = toyplot.html._css_colors(colors)
+    nose.tools.assert_equal(css, [toyplot.color.to_css(color) for color in colors])
+    nose.tools.assert_is(css[0], css[2])
+    nose.tools.assert_equal(toyplot.html._css_colors(colors[:0]), [])
+
+    for color in css:
+        nose.tools.assert_equal(
+            toyplot.html._color_fixup({"fill": color, "stroke": color, "fill-opacity": 0.5}),
+            toyplot.html._color_fixup({"fill": str(color), "stroke": str(color), "fill-opacity": 0.5}))
+    nose.tools.assert_equal(
+        toyplot.html._color_fixup({"stroke": css[1]}),
+        {"stroke": "rgb(10%,20%,30%)", "stroke-opacity": "0.25"})
+
+
+def test_html_size_report():
+    canvas = toyplot.Canvas()
+    axes = canvas.axes()
+    plot = axes.plot(numpy.arange(10))
+    axes.scatterplot(numpy.arange(10), marker="o")
+    canvas.text(100, 100, "Text")
+    canvas.table(rows=2, columns=2).cell(0, 0).axes().plot(numpy.arange(3))
+    canvas.animate(3, lambda frame: frame.set_mark_style(plot, {"opacity": frame.index() / 2}))
+
+    report = toyplot.html.size_report(canvas, precision=2)
+    nose.tools.assert_equal(
+        report["total"],
+        len(xml.tostring(toyplot.html.render(canvas, precision=2), method="html")))
+    nose.tools.assert_equal(
+        report["total"],
+        sum([item["bytes"] for item in report["objects"]]) + sum(report["features"].values()))
+    nose.tools.assert_equal(
+        [item["type"] for item in report["objects"]],
+        ["toyplot.axes.Cartesian", "toyplot.mark.Plot", "toyplot.mark.Scatterplot", "toyplot.mark.Text",
+         "toyplot.axes.Table", "toyplot.axes.Cartesian", "toyplot.mark.Plot"])
+    objects = report["objects"]
+    nose.tools.assert_equal(objects[1]["parent"], objects[0]["id"])
+    nose.tools.assert_equal(objects[6]["parent"], objects[5]["id"])
+    nose.tools.assert_equal(objects[5]["parent"], objects[4]["id"])
+    nose.tools.assert_is_none(objects[3]["parent"])
+    for name in ["data tables", "mouse coordinates", "animation", "controls", "document"]:
+        nose.tools.assert_greater(report["features"][name], 0)
+    nose.tools.assert_equal(report["features"]["style classes"], 0)
+    nose.tools.assert_greater(report["styles"], 0)
+    nose.tools.assert_less(report["styles"], report["total"])
+
+
+def test_html_data_table_encoding():
+    def decode(column):
+        data = base64.b64decode(column["data"])
+        if column["compressed"]:
+            data = zlib.decompress(data)
+        return numpy.frombuffer(data, dtype=column["type"].replace("Array", "").lower())
+
+    values = numpy.ma.array(numpy.linspace(0, 1, 5), mask=[0, 1, 0, 0, 0])
+    nose.tools.assert_equal(toyplot.html._encode_data_table_column(values, "json"), values.tolist())
+    for encoding in ["binary", "deflate"]:
+        column = toyplot.html._encode_data_table_column(values, encoding)
+        nose.tools.assert_equal(column["type"], "Float64Array")
+        numpy.testing.assert_array_equal(decode(column), values.data)
+        nose.tools.assert_equal(decode(dict(column, data=column["mask"], type="Uint8Array")).tolist(), [0, 1, 0, 0, 0])
+
+    column = toyplot.html._encode_data_table_column(numpy.arange(5, dtype="int64"), "binary")
+    nose.tools.assert_equal(column["type"], "Int32Array")
+    nose.tools.assert_not_in("mask", column)
+    numpy.testing.assert_array_equal(decode(column), numpy.arange(5))
+    nose.tools.assert_equal(toyplot.html._encode_data_table_column(numpy.array(["a", "b"]), "binary"), ["a", "b"])
+
+    column = toyplot.html._encode_data_table_column(numpy.array([0.5, 0.25], dtype="float16"), "binary")
+    nose.tools.assert_equal(column["type"], "Float32Array")
+    numpy.testing.assert_array_equal(decode(column), [0.5, 0.25])
+    column = toyplot.html._encode_data_table_column(numpy.array([True, False]), "deflate")
+    nose.tools.assert_equal((column["type"], column["boolean"]), ("Uint8Array", True))
+    numpy.testing.assert_array_equal(decode(column), [1, 0])
+    nose.tools.assert_equal(
+        toyplot.html._encode_data_table_column(numpy.ma.array([0.1, 0.2], dtype="float32", mask=[0, 1]), "json"),
+        [0.1, None])
+    with nose.tools.assert_raises(ValueError):
+        toyplot.html._encode_data_table_column(values, "csv")
+
+    canvas = toyplot.Canvas()
+    canvas.axes().plot(numpy.arange(10))
+    nose.tools.assert_in("Float64Array", xml.tostring(toyplot.html.render(canvas), method="html").decode("utf-8"))
+    canvas.axes().scatterplot(numpy.arange(10, dtype="float16"), numpy.arange(10, dtype="float32"))
+    nose.tools.assert_in("Float32Array", xml.tostring(toyplot.html.render(canvas), method="html").decode("utf-8"))
+
+    embed = toyplot.config.embed_data_tables
+    toyplot.config.embed_data_tables = False
+    try:
+        nose.tools.assert_not_in("data_tables", xml.tostring(toyplot.html.render(canvas), method="html").decode("utf-8"))
+    finally:
+        toyplot.config.embed_data_tables = embed
+
+
+##########################################################################
+# toyplot.profile
+
+
+def test_profile_collect():
+    canvas = toyplot.Canvas()
+    axes = canvas.axes(label="Profile")
+    axes.plot(numpy.arange(10))
+    axes.scatterplot(numpy.arange(10), marker="o")
+
+    with toyplot.profile.collect() as profile:
+        stream = io.BytesIO()
+        toyplot.html.render(canvas, stream)
+    toyplot.html.render(canvas, io.BytesIO())
+
+    results = profile.as_dict()
+    for name in ["finalize", "ticks", "render", "text", "serialize"]:
+        nose.tools.assert_greater(results["phases"][name]["calls"], 0)
+    nose.tools.assert_equal(results["phases"]["serialize"]["bytes"], len(stream.getvalue()))
+    nose.tools.assert_equal(results["classes"]["toyplot.mark.Plot"]["calls"], 1)
+    nose.tools.assert_equal(results["classes"]["toyplot.axes.Cartesian"]["calls"], 1)
+    nose.tools.assert_greater(results["classes"]["toyplot.mark.Scatterplot"]["elements"], 10)
+
+    trace = json.loads(json.dumps(profile.trace()))
+    nose.tools.assert_equal(len(trace["traceEvents"]), sum([phase["calls"] for phase in results["phases"].values()]))
+    nose.tools.assert_equal(set([event["ph"] for event in trace["traceEvents"]]), set(["X"]))
+    stream = io.StringIO() if sys.version_info[0] >= 3 else io.BytesIO()
+    profile.write_trace(stream)
+    nose.tools.assert_equal(json.loads(stream.getvalue()), trace)
+
+    if "toyplot.reportlab.pdf" in sys.modules:
+        with toyplot.profile.collect() as profile:
+            toyplot.reportlab.pdf.render(canvas)
+        nose.tools.assert_equal(profile.as_dict()["phases"]["reportlab"]["calls"], 1)
+
+
+##########################################################################
+# toyplot.reportlab.png
+
+
+def test_reportlab_png_read_pngs():
+    if "toyplot.reportlab.png" not in sys.modules:
+        return
+    pngs = [toyplot.bitmap.to_png(numpy.full((2, 3, 4), i, dtype="uint8")) for i in range(3)]
+    nose.tools.assert_equal(
+        list(toyplot.reportlab.png._read_pngs(io.BytesIO(b"".join(pngs)))), pngs)
+    with nose.tools.assert_raises(Exception):
+        list(toyplot.reportlab.png._read_pngs(io.BytesIO(pngs[0][:-12])))
+
+
+def test_reportlab_png_render_frames_workers():
+    if "toyplot.reportlab.png" not in sys.modules:
+        return
+    canvas = toyplot.Canvas(100, 100)
+    scatterplot = canvas.axes().scatterplot(numpy.arange(10))
+    canvas.animate(11, lambda frame: frame.set_datum_style(scatterplot, 0, frame.index() % 10, {"fill": "red"}))
+    frames = list(toyplot.reportlab.png.render_frames(canvas))
+    nose.tools.assert_equal(len(frames), 11)
+    nose.tools.assert_equal(list(toyplot.reportlab.png.render_frames(canvas, workers=3)), frames)
+
+    batches = []
+    rasterize_pages = toyplot.reportlab.png._rasterize_pages
+    def record(svg, index, changes, begin, end, *args):
+        batches.append((begin, end))
+        return rasterize_pages(svg, index, changes, begin, end, *args)
+    frame_batch_size = toyplot.config.frame_batch_size
+    toyplot.config.frame_batch_size = 4
+    toyplot.reportlab.png._rasterize_pages = record
+    try:
+        batched = toyplot.reportlab.png.render_frames(canvas)
+        nose.tools.assert_equal(next(batched), frames[0])
+        nose.tools.assert_equal(batches, [(0, 4)])
+        nose.tools.assert_equal(list(batched), frames[1:])
+        nose.tools.assert_equal(batches, [(0, 4), (4, 8), (8, 11)])
+    finally:
+        toyplot.config.frame_batch_size = frame_batch_size
+        toyplot.reportlab.png._rasterize_pages = rasterize_pages
+
+
+def test_reportlab_png_render_frames_ghostscript_failure():
+    if "toyplot.reportlab.png" not in sys.modules:
+        return
+    canvas = toyplot.Canvas(100, 100)
+    scatterplot = canvas.axes().scatterplot(numpy.arange(10))
+    canvas.animate(3, lambda frame: frame.set_datum_style(scatterplot, 0, frame.index(), {"fill": "red"}))
+    command = toyplot.reportlab.png._command
+    try:
+        toyplot.reportlab.png._command = lambda device, path: [
+            sys.executable, "-c", "import sys; sys.stderr.write('Unrecoverable error'); sys.exit(1)"]
+        with nose.tools.assert_raises_regexp(Exception, "Unrecoverable error"):
+            list(toyplot.reportlab.png.render_frames(canvas))
+        with nose.tools.assert_raises_regexp(Exception, "Unrecoverable error"):
+            toyplot.reportlab.png.render(canvas)
+        toyplot.reportlab.png._command = lambda device, path: [sys.executable, "-c", "pass"]
+        with nose.tools.assert_raises_regexp(Exception, "0 images from 3 frames"):
+            list(toyplot.reportlab.png.render_frames(canvas))
+    finally:
+        toyplot.reportlab.png._command = command
+
+
+def test_reportlab_png_read_ppms():
+    if "toyplot.reportlab.png" not in sys.modules:
+        return
+    pixels = numpy.arange(18, dtype="uint8").reshape((2, 3, 3))
+    ppm = b"P6\n# Comment\n3 2\n255\n" + pixels.tobytes()
+    images = list(toyplot.reportlab.png._read_ppms(io.BytesIO(ppm + ppm)))
+    nose.tools.assert_equal(len(images), 2)
+    numpy.testing.assert_array_equal(images[1][:, :, :3], pixels)
+    numpy.testing.assert_array_equal(images[1][:, :, 3], 255)
+    with nose.tools.assert_raises(Exception):
+        list(toyplot.reportlab.png._read_ppms(io.BytesIO(ppm[:-1])))
+    with nose.tools.assert_raises(ValueError):
+        next(toyplot.reportlab.png.render_frames(toyplot.Canvas(), format="jpeg"))
+
+
+def test_reportlab_png_ghostscript_pool():
+    if "toyplot.reportlab.png" not in sys.modules:
+        return
+    nose.tools.assert_equal(toyplot.reportlab.png._postscript_string("a\\b(c)"), "(a\\\\b\\(c\\))")
+    canvas = toyplot.Canvas(100, 100)
+    scatterplot = canvas.axes().scatterplot(numpy.arange(10))
+    canvas.animate(3, lambda frame: frame.set_datum_style(scatterplot, 0, frame.index(), {"fill": "red"}))
+    png = toyplot.reportlab.png.render(canvas)
+    frames = list(toyplot.reportlab.png.render_frames(canvas))
+    try:
+        toyplot.config.ghostscript_processes = 2
+        nose.tools.assert_equal(toyplot.reportlab.png.render(canvas), png)
+        nose.tools.assert_equal(list(toyplot.reportlab.png.render_frames(canvas)), frames)
+        pool = toyplot.reportlab.png._pool("pngalpha")
+        nose.tools.assert_equal(len(pool._processes), 1)
+        # A process that exits is replaced.
+        pool._processes[0]._process.kill()
+        pool._processes[0]._process.wait()
+        nose.tools.assert_equal(toyplot.reportlab.png.render(canvas), png)
+    finally:
+        toyplot.config.ghostscript_processes = 0
+        toyplot.reportlab.png._close_pools()
+
+
+def test_reportlab_png_ghostscript_pool_worker():
+    if "toyplot.reportlab.png" not in sys.modules:
+        return
+    directory = tempfile.gettempdir()
+    command = toyplot.reportlab.png._worker_command("pngalpha", directory)
+    nose.tools.assert_in("-dSAFER", command)
+    nose.tools.assert_not_in("-dNOSAFER", command)
+    nose.tools.assert_in("--permit-file-read=%s" % os.path.join(directory, ""), command)
+    nose.tools.assert_in("--permit-file-write=%s" % os.path.join(directory, ""), command)
+
+    # A stand-in for Ghostscript that reports each job done after a delay.
+    worker = "\n".join([
+        "import re, sys, time",
+        "for line in iter(sys.stdin.readline, ''):",
+        "    match = re.search(r'\\((\\S+) done', line)",
+        "    if match:",
+        "        time.sleep(float(sys.argv[1]))",
+        "        sys.stdout.write(match.group(1) + ' done\\n')",
+        "        sys.stdout.flush()",
+        ])
+    delay = [10]
+    worker_command = toyplot.reportlab.png._worker_command
+    timeout = toyplot.config.ghostscript_timeout
+    try:
+        toyplot.reportlab.png._worker_command = lambda device, directory: [sys.executable, "-c", worker, str(delay[0])]
+
+        # A process that times out is killed, and replaced.
+        toyplot.config.ghostscript_timeout = 0.5
+        pool = toyplot.reportlab.png._GhostscriptPool("pngalpha", 1)
+        with nose.tools.assert_raises_regexp(Exception, "timed out"):
+            pool.rasterize(b"")
+        nose.tools.assert_equal(pool._processes, [])
+        delay[0] = 0
+        nose.tools.assert_equal(pool.rasterize(b""), [])
+        pool.close()
+
+        # A retired pool closes busy processes once their jobs finish.
+        toyplot.config.ghostscript_timeout = 60
+        delay[0] = 1
+        pool = toyplot.reportlab.png._GhostscriptPool("pngalpha", 1)
+        results = []
+        job = threading.Thread(target=lambda: results.append(pool.rasterize(b"")))
+        job.start()
+        while not pool._processes:
+            time.sleep(0.01)
+        process = pool._processes[0]
+        pool.retire()
+        nose.tools.assert_true(process.healthy())
+        job.join()
+        nose.tools.assert_equal(results, [[]])
+        nose.tools.assert_equal(pool._processes, [])
+        nose.tools.assert_false(process.healthy())
+    finally:
+        toyplot.reportlab.png._worker_command = worker_command
+        toyplot.config.ghostscript_timeout = timeout
+
+    try:
+        toyplot.config.ghostscript_processes = 1
+        pool = toyplot.reportlab.png._pool("pngalpha")
+        toyplot.config.ghostscript_processes = 2
+        nose.tools.assert_is_not(toyplot.reportlab.png._pool("pngalpha"), pool)
+        nose.tools.assert_true(pool._retired)
+    finally:
+        toyplot.config.ghostscript_processes = 0
+        toyplot.reportlab.png._close_pools()
+
+
+def test_render_async():
+    if sys.version_info < (3, 7) or "toyplot.png" not in sys.modules:
+        return
+    import asyncio
+    canvas = toyplot.Canvas(100, 100)
+    canvas.axes().plot(numpy.arange(10))
+    loop = asyncio.new_event_loop()
+    try:
+        pdf, png = loop.run_until_complete(asyncio.gather(
+            toyplot.pdf.render_async(canvas),
+            toyplot.png.render_async(canvas),
+            ))
+    finally:
+        loop.close()
+    nose.tools.assert_equal(pdf[:4], b"%PDF")
+    nose.tools.assert_equal(png, toyplot.png.render(canvas))
+
+
+def test_ffmpeg_render():
+    if "toyplot.png" not in sys.modules:
+        return
+    import toyplot._ffmpeg
+    canvas = toyplot.Canvas(100, 100)
+    scatterplot = canvas.axes().scatterplot(numpy.arange(10))
+    canvas.animate(3, lambda frame: frame.set_datum_style(scatterplot, 0, frame.index(), {"fill": "red"}))
+
+    def render(script):
+        command = lambda filename, width, height: [sys.executable, "-c", script]
+        toyplot._ffmpeg.render(canvas, "test.mp4", command, None, None, None, None, None)
+
+    # Lots of error output, which would fill a pipe, doesn't block ffmpeg.
+    render("import sys; sys.stderr.write('x' * 1000000); sys.stdin.read()")
+    with nose.tools.assert_raises_regexp(Exception, "exit status 1: Unknown encoder"):
+        render("import sys; sys.stderr.write('Unknown encoder'); sys.exit(1)")
+    with nose.tools.assert_raises_regexp(Exception, "exit status 2: Invalid frame"):
+        render("import sys; sys.stdin.read(100); sys.stderr.write('Invalid frame'); sys.exit(2)")
+
+
+def test_render_async_png():
+    if sys.version_info < (3, 7) or "toyplot.reportlab.png" not in sys.modules:
+        return
+    import asyncio
+    canvas = toyplot.Canvas(100, 100)
+    canvas.axes().plot(numpy.arange(10))
+    command = toyplot.reportlab.png._command
+    loop = asyncio.new_event_loop()
+    try:
+        toyplot.config.cache = toyplot.cache.Cache()
+        png = loop.run_until_complete(toyplot.png.render_async(canvas))
+        nose.tools.assert_equal(loop.run_until_complete(toyplot.png.render_async(canvas)), png)
+        nose.tools.assert_equal(toyplot.png.render(canvas), png)
+        nose.tools.assert_equal((toyplot.config.cache.hits, toyplot.config.cache.misses), (2, 1))
+
+        toyplot.config.cache = None
+        toyplot.reportlab.png._command = lambda device, path: [
+            sys.executable, "-c", "import sys; sys.stderr.write('Unrecoverable error'); sys.exit(1)"]
+        with nose.tools.assert_raises_regexp(Exception, "Unrecoverable error"):
+            loop.run_until_complete(toyplot.png.render_async(canvas))
+    finally:
+        toyplot.reportlab.png._command = command
+        toyplot.config.cache = None
+        loop.close()
+
+
+def test_render_async_video_failure():
+    if sys.version_info < (3, 7) or "toyplot.png" not in sys.modules:
+        return
+    import asyncio
+    import toyplot._coroutines
+    canvas = toyplot.Canvas(100, 100)
+    scatterplot = canvas.axes().scatterplot(numpy.arange(10))
+    canvas.animate(3, lambda frame: frame.set_datum_style(scatterplot, 0, frame.index(), {"fill": "red"}))
+    command = lambda filename, width, height: [
+        sys.executable, "-c", "import sys; sys.stderr.write('Unknown encoder'); sys.exit(1)"]
+    loop = asyncio.new_event_loop()
+    try:
+        with nose.tools.assert_raises_regexp(Exception, "Unknown encoder"):
+            loop.run_until_complete(toyplot._coroutines.video(canvas, "test.mp4", command, None, None, None, None, None, None))
+    finally:
+        loop.close()
+
+
+##########################################################################
+# toyplot.reportlab.renderpm
+
+def test_reportlab_renderpm_render():
+    if not renderpm_available():
+        return
+    canvas = toyplot.Canvas(120, 80)
+    canvas.axes(bounds=(20, -20, 20, -20)).plot(numpy.arange(10))
+    image = toyplot.reportlab.renderpm._rasterize(toyplot.svg.render(canvas), 0.75, (90, 60), alpha=True)
+    nose.tools.assert_equal(image.shape, (80, 120, 4))
+    nose.tools.assert_equal(image[0, 0, 3], 0)
+    nose.tools.assert_true(image[:, :, 3].max() > 0)
+    png = toyplot.reportlab.renderpm.render(canvas, scale=2)
+    nose.tools.assert_equal(png[:8], b"\x89PNG\r\n\x1a\n")
+    nose.tools.assert_equal(png[16:24], b"\x00\x00\x00\xf0\x00\x00\x00\xa0")
+
+    canvas = toyplot.Canvas(120, 80, style={"background-color": "white"})
+    image = toyplot.reportlab.renderpm._rasterize(toyplot.svg.render(canvas), 0.75, (90, 60), alpha=True)
+    numpy.testing.assert_array_equal(image, 255)
+
+
+def test_reportlab_renderpm_render_frames():
+    if not renderpm_available():
+        return
+    canvas = toyplot.Canvas(100, 60)
+    scatterplot = canvas.axes().scatterplot(numpy.arange(10))
+    canvas.animate(5, lambda frame: frame.set_datum_style(scatterplot, 0, frame.index(), {"fill": "red"}))
+    frames = list(toyplot.reportlab.renderpm.render_frames(canvas, format="rgba"))
+    nose.tools.assert_equal(len(frames), 5)
+    nose.tools.assert_equal(frames[0].shape, (60, 100, 4))
+    numpy.testing.assert_array_equal(frames[0][:, :, 3], 255)
+    nose.tools.assert_false(numpy.array_equal(frames[0], frames[1]))
+
+
+def test_reportlab_renderpm_render_shapes():
+    if not renderpm_available():
+        return
+    canvas = toyplot.Canvas(300, 200, style={"background-color": "white"})
+    axes = canvas.axes(label="Title", xlabel="X", ylabel="Y")
+    axes.plot(numpy.sin(numpy.linspace(0, 10, 50)), style={"stroke-dasharray": "3,2"})
+    axes.scatterplot(numpy.arange(10), marker="s", opacity=0.5)
+    axes.x.ticks.labels.angle = 45
+    canvas.color_scale(toyplot.color.LinearMap(toyplot.color.brewer("BlueRed"), domain_min=0, domain_max=1), label="Scale")
+    image = toyplot.reportlab.renderpm._rasterize(toyplot.svg.render(canvas), 0.75, (225, 150), alpha=True)
+    nose.tools.assert_equal(image.shape, (200, 300, 4))
+    numpy.testing.assert_array_equal(image[:, :, 3], 255)
+    nose.tools.assert_true((image[:, :, :3] < 128).any())
+
+
+def test_reportlab_renderpm_render_raster():
+    if not renderpm_available():
+        return
+    # Raster scatterplots are embedded as partially-transparent images.
+    canvas = toyplot.Canvas(200, 200)
+    axes = canvas.axes(show=False, xmin=0, xmax=1, ymin=0, ymax=1, padding=0)
+    axes.scatterplot(0.5, 0.5, raster=True, size=40, color="red")
+    image = toyplot.reportlab.renderpm._rasterize(toyplot.svg.render(canvas), 0.75, (150, 150), alpha=True)
+    numpy.testing.assert_array_equal(image[100, 100], [255, 0, 0, 255])
+    nose.tools.assert_equal(image[5, 5, 3], 0)
+
+
+def test_png_rasterizer():
+    if "toyplot.png" not in sys.modules:
+        return
+    try:
+        toyplot.config.png_rasterizer = "renderpm"
+        nose.tools.assert_equal(toyplot.png._implementation().__name__, "toyplot.reportlab.renderpm")
+        toyplot.config.png_rasterizer = "bogus"
+        with nose.tools.assert_raises(ValueError):
+            toyplot.png._implementation()
+    finally:
+        toyplot.config.png_rasterizer = "ghostscript"
+
+
 ##########################################################################
 # High-level tests that combine multiple API calls into whole figures.
 
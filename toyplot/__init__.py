@@ -381,6 +381,7 @@ def scatterplot(
         mstyle=None,
         mlstyle=None,
         filename=None,
+        raster=False,
         aspect=None,
         xmin=None,
         xmax=None,
@@ -442,7 +443,8 @@ def scatterplot(
         style=style,
         mstyle=mstyle,
         mlstyle=mlstyle,
-        filename=filename)
+        filename=filename,
+        raster=raster)
     return canvas, axes, mark
 
 
@@ -0,0 +1,111 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Coroutines that implement the asynchronous rendering API.
+
+This module requires Python 3.7 or later, and is only imported by the
+`render_async()` functions in :mod:`toyplot.pdf`, :mod:`toyplot.png`,
+:mod:`toyplot.mp4`, and :mod:`toyplot.webm`.
+"""
+
+import asyncio
+import functools
+import subprocess
+import toyplot.cache
+import toyplot.config
+
+
+async def _run(executor, function, *args):
+    """Run a blocking function in an executor, without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(function, *args))
+
+
+async def pdf(canvas, fobj, width, height, scale, executor):
+    """Implements :func:`toyplot.pdf.render_async`."""
+    import toyplot.pdf
+    return await _run(executor, toyplot.pdf.render, canvas, fobj, width, height, scale)
+
+
+async def png(canvas, fobj, width, height, scale, executor):
+    """Implements :func:`toyplot.png.render_async`."""
+    import toyplot.png
+    implementation = toyplot.png._implementation()
+    if implementation.__name__ != "toyplot.reportlab.png" or toyplot.config.ghostscript_processes:
+        # There's no subprocess to wait for, so render entirely in the executor.
+        return await _run(executor, toyplot.png.render, canvas, fobj, width, height, scale)
+
+    # Use the cache in the same way as toyplot.png.render().
+    cache = toyplot.config.cache if toyplot.cache._enabled() else None
+    key, png = None, None
+    if cache is not None:
+        key, png = await _run(executor, toyplot.cache._lookup, "png", canvas, (width, height, scale))
+    if png is None:
+        pdf = await _run(executor, implementation._render_pdf, canvas, width, height, scale)
+        gs = await asyncio.create_subprocess_exec(
+            *implementation._command("pngalpha", "-"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        png, stderr = await gs.communicate(pdf)
+        if gs.returncode != 0:
+            raise Exception("Ghostscript failed with exit status %s: %s" % (gs.returncode, stderr.decode("utf-8", "replace").strip()))
+        if key is not None:
+            await _run(executor, cache.put, key, png)
+    if fobj is None:
+        return png
+    await _run(executor, implementation._write, png, fobj)
+
+
+async def video(canvas, filename, command, width, height, scale, progress, workers, executor):
+    """Implements :func:`toyplot.mp4.render_async` and :func:`toyplot.webm.render_async`.
+
+    Frames are rendered in the executor, and piped to the ffmpeg command
+    returned by command(filename, width, height).
+    """
+    import toyplot.png
+    frames = toyplot.png.render_frames(
+        canvas=canvas, width=width, height=height, scale=scale, workers=workers, format="rgba")
+    ffmpeg = None
+    frame = 0
+    pending = None
+    try:
+        while True:
+            # Shielded, so that if we're cancelled, the frame being rendered
+            # can finish before the generator is closed.
+            pending = asyncio.ensure_future(_run(executor, next, frames, None))
+            pixels = await asyncio.shield(pending)
+            if pixels is None:
+                break
+            if ffmpeg is None:
+                ffmpeg = await asyncio.create_subprocess_exec(
+                    *command(filename, pixels.shape[1], pixels.shape[0]),
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE)
+                # Drain stderr as we go, so ffmpeg can't block writing to it.
+                errors = asyncio.ensure_future(ffmpeg.stderr.read())
+            if progress is not None:
+                progress(frame)
+            try:
+                ffmpeg.stdin.write(pixels.tobytes())
+                await ffmpeg.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # ffmpeg exited early, and its exit status is reported below.
+                break
+            frame += 1
+        if ffmpeg is not None:
+            ffmpeg.stdin.close()
+            await ffmpeg.wait()
+    finally:
+        # Don't leave ffmpeg running if rendering failed or was cancelled.
+        if ffmpeg is not None:
+            if ffmpeg.returncode is None:
+                ffmpeg.kill()
+                await ffmpeg.wait()
+            stderr = await errors
+        if pending is not None:
+            await asyncio.wait([pending])
+        await _run(executor, frames.close)
+    if ffmpeg is not None and ffmpeg.returncode != 0:
+        raise Exception("ffmpeg failed with exit status %s: %s" % (ffmpeg.returncode, stderr.decode("utf-8", "replace").strip()))
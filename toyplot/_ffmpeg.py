@@ -0,0 +1,62 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Pipe rendered frames to ffmpeg.
+
+This module implements the `render()` functions in :mod:`toyplot.mp4` and
+:mod:`toyplot.webm`, which differ only in the ffmpeg command they use.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import errno
+import os
+import subprocess
+import tempfile
+import toyplot.png
+
+
+def render(canvas, filename, command, width, height, scale, progress, workers):
+    """Render frames as raw RGBA pixels, and pipe them to the ffmpeg command returned by command(filename, width, height)."""
+    frames = toyplot.png.render_frames(
+        canvas=canvas, width=width, height=height, scale=scale, workers=workers, format="rgba")
+    # Collect stderr in a file, since a full pipe would block ffmpeg while we write frames.
+    with tempfile.TemporaryFile() as stderr, open(os.devnull, "wb") as devnull:
+        ffmpeg = None
+        try:
+            for frame, pixels in enumerate(frames):
+                if ffmpeg is None:
+                    ffmpeg = subprocess.Popen(
+                        command(filename, pixels.shape[1], pixels.shape[0]),
+                        stdin=subprocess.PIPE,
+                        stdout=devnull,
+                        stderr=stderr)
+                if progress is not None:
+                    progress(frame)
+                try:
+                    ffmpeg.stdin.write(pixels.tobytes())
+                except IOError as e:
+                    # ffmpeg exited early, and its exit status is reported below.
+                    if e.errno not in (errno.EPIPE, errno.EINVAL):
+                        raise
+                    break
+            if ffmpeg is not None:
+                try:
+                    ffmpeg.stdin.close()
+                except IOError as e:
+                    if e.errno not in (errno.EPIPE, errno.EINVAL):
+                        raise
+                ffmpeg.wait()
+        finally:
+            # Don't leave ffmpeg running if rendering failed.
+            if ffmpeg is not None and ffmpeg.poll() is None:
+                ffmpeg.kill()
+                ffmpeg.wait()
+            frames.close()
+
+        if ffmpeg is not None and ffmpeg.returncode != 0:
+            stderr.seek(0)
+            raise Exception("ffmpeg failed with exit status %s: %s" % (
+                ffmpeg.returncode, stderr.read().decode("utf-8", "replace").strip()))
@@ -14,6 +14,7 @@ import toyplot.format
 import toyplot.layout
 import toyplot.locator
 import toyplot.mark
+import toyplot.profile
 import toyplot.projection
 import toyplot.require
 import toyplot.text
@@ -121,6 +122,9 @@ class _ordered_set(collections.MutableSet):
 class Axis(object):
     """One dimensional axis that can be used to create coordinate systems.
     """
+    # Computed by _finalize(), so ignored by toyplot.cache.fingerprint().
+    _derived_state = ["_domain_min", "_domain_max", "_tick_locations", "_tick_labels", "_tick_titles"]
+
     class DomainHelper(object):
 
         def __init__(self, min, max):
@@ -490,6 +494,9 @@ class Cartesian(object):
     Do not create Cartesian instances directly.  Use factory methods such
     as :meth:`toyplot.canvas.Canvas.axes` instead.
     """
+    # Computed by _finalize(), so ignored by toyplot.cache.fingerprint().
+    _derived_state = ["_finalized", "_x_projection", "_y_projection"]
+
     class CoordinatesHelper(object):
         def __init__(
                 self,
@@ -639,6 +646,7 @@ class Cartesian(object):
 
         self._parent = parent
         self._children = []
+        self._finalized = None
 
     @property
     def aspect(self):
@@ -707,7 +715,42 @@ class Cartesian(object):
         self._expand_domain_range_bottom = bottom if self._expand_domain_range_bottom is None else numpy.concatenate(
             (self._expand_domain_range_bottom, bottom))
 
+    def _finalize_state(self):
+        """Return everything that :meth:`_finalize` depends on."""
+        return (
+            self._xmin_range,
+            self._xmax_range,
+            self._ymin_range,
+            self._ymax_range,
+            self._aspect,
+            # The expanded ranges only grow, so their length identifies them.
+            None if self._expand_domain_range_x is None else len(self._expand_domain_range_x),
+            [(
+                axis._display_min,
+                axis._display_max,
+                axis.domain.min,
+                axis.domain.max,
+                axis.show,
+                axis.scale,
+                axis.ticks.locator,
+                ) for axis in (self.x, self.y)],
+            )
+
     def _finalize(self):
+        # Domains and ticks are only recalculated when their inputs change,
+        # so canvases that are rendered repeatedly don't pay for them again.
+        state = self._finalize_state()
+        if self._finalized is None or self._finalized[0] != state:
+            self._finalized = (state,) + self._finalize_domains()
+
+        state, x, y = self._finalized
+        self.x._finalize(*x)
+        self.y._finalize(*y)
+
+        self._x_projection = self.x.projection(range_min=self._xmin_range, range_max=self._xmax_range)
+        self._y_projection = self.y.projection(range_min=self._ymax_range, range_max=self._ymin_range)
+
+    def _finalize_domains(self):
         # Begin with the implicit domain defined by our data.
         xmin = self.x._display_min
         xmax = self.x._display_max
@@ -804,12 +847,14 @@ class Cartesian(object):
         xtick_labels = []
         xtick_titles = []
         if self.x.show:
-            xtick_locations, xtick_labels, xtick_titles = self.x.locator().ticks(xmin, xmax)
+            with toyplot.profile._phase("ticks"):
+                xtick_locations, xtick_labels, xtick_titles = self.x.locator().ticks(xmin, xmax)
         ytick_locations = []
         ytick_labels = []
         ytick_titles = []
         if self.y.show:
-            ytick_locations, ytick_labels, ytick_titles = self.y.locator().ticks(ymin, ymax)
+            with toyplot.profile._phase("ticks"):
+                ytick_locations, ytick_labels, ytick_titles = self.y.locator().ticks(ymin, ymax)
 
         # Allow tick locations to grow (never shrink) the domain.
         if len(xtick_locations):
@@ -819,11 +864,10 @@ class Cartesian(object):
             ymin = numpy.amin((ymin, ytick_locations[0]))
             ymax = numpy.amax((ymax, ytick_locations[-1]))
 
-        self.x._finalize(xmin, xmax, xtick_locations, xtick_labels, xtick_titles)
-        self.y._finalize(ymin, ymax, ytick_locations, ytick_labels, ytick_titles)
-
-        self._x_projection = self.x.projection(range_min=self._xmin_range, range_max=self._xmax_range)
-        self._y_projection = self.y.projection(range_min=self._ymax_range, range_max=self._ymin_range)
+        return (
+            (xmin, xmax, xtick_locations, xtick_labels, xtick_titles),
+            (ymin, ymax, ytick_locations, ytick_labels, ytick_titles),
+            )
 
     def _project_x(self, x):
         return self._x_projection(x)
@@ -1848,7 +1892,8 @@ class Cartesian(object):
             style=None,
             mstyle=None,
             mlstyle=None,
-            filename=None):
+            filename=None,
+            raster=False):
         """Add a bivariate plot to the axes.
 
         Parameters
@@ -1863,6 +1908,17 @@ class Cartesian(object):
         style: dict, optional
           Collection of CSS styles to apply across all datums.  See
           :class:`toyplot.toyplot.Plot` for a list of useful styles.
+        raster: boolean or integer, optional
+          If `True`, render the markers into an embedded bitmap image instead
+          of vector shapes, so that rendering time and output size depend on
+          the size of the axes instead of the number of points.  If an
+          integer, rasterize only when the mark contains more points than the
+          given threshold.  Only filled circles ("o" markers without labels
+          or per-marker styles, stroked with their fill color or not at
+          all) can be rasterized; other markers are always rendered as
+          vectors.  Rasterized markers have no per-datum titles or
+          interaction, and the datum styles of a mark with `raster` enabled
+          can't be animated.
 
         Returns
         -------
@@ -1966,7 +2022,8 @@ class Cartesian(object):
                 style=style,
                 mstyle=mstyle,
                 mlstyle=mlstyle,
-                filename=filename))
+                filename=filename,
+                raster=raster))
         return self._children[-1]
 
     def share(
@@ -2303,7 +2360,8 @@ class NumberLine(object):
             style=None,
             mstyle=None,
             mlstyle=None,
-            filename=None):
+            filename=None,
+            raster=False):
         """Add a univariate plot to the axes.
 
         Parameters
@@ -2315,6 +2373,10 @@ class NumberLine(object):
         style: dict, optional
           Collection of CSS styles to apply across all datums.  See
           :class:`toyplot.toyplot.Plot` for a list of useful styles.
+        raster: boolean or integer, optional
+          Render the markers into an embedded bitmap image.  See
+          :meth:`toyplot.axes.Cartesian.scatterplot` for details and
+          limitations.
 
         Returns
         -------
@@ -2398,6 +2460,7 @@ class NumberLine(object):
             mstyle=mstyle,
             mlstyle=mlstyle,
             filename=filename,
+            raster=raster,
             )
 
         self._children.append(mark)
@@ -2438,7 +2501,8 @@ class NumberLine(object):
         tick_labels = []
         tick_titles = []
         if self.axis.show:
-            tick_locations, tick_labels, tick_titles = self.axis.locator().ticks(min, max)
+            with toyplot.profile._phase("ticks"):
+                tick_locations, tick_labels, tick_titles = self.axis.locator().ticks(min, max)
 
         # Allow tick locations to grow (never shrink) the domain.
         if len(tick_locations):
@@ -2455,6 +2519,9 @@ class NumberLine(object):
 class Table(object):
     """Experimental table coordinate system.
     """
+    # Computed by _finalize(), so ignored by toyplot.cache.fingerprint().
+    _derived_state = ["_finalized", "_column_boundaries", "_row_boundaries"]
+
     class Label(object):
 
         def __init__(self, label, style):
@@ -2489,6 +2556,8 @@ class Table(object):
                 )
 
     class Cell(object):
+        # Computed by Table._finalize(), so ignored by toyplot.cache.fingerprint().
+        _derived_state = ["_left", "_right", "_top", "_bottom"]
 
         def __init__(self, row=None, column=None, align=None, style=None):
             self._row = row
@@ -0,0 +1,204 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Render large collections of independent canvases, optionally in parallel.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import collections
+import importlib
+import multiprocessing
+import numpy
+import os
+import time
+import traceback
+
+
+_formats = collections.OrderedDict([
+    ("html", "toyplot.html"),
+    ("pdf", "toyplot.pdf"),
+    ("png", "toyplot.png"),
+    ("svg", "toyplot.svg"),
+    ])
+
+
+Result = collections.namedtuple("Result", ["index", "name", "paths", "error", "latency"])
+"""The outcome of rendering one canvas with :func:`render`.
+
+Attributes
+----------
+index: integer
+  Position of the canvas in the `canvases` argument.
+name: string
+  Base name of the output files.
+paths: list of strings
+  Paths of the files that were written.
+error: string or `None`
+  Formatted traceback, if rendering failed.
+latency: number
+  Time in seconds spent creating and rendering the canvas.
+"""
+
+
+class Report(object):
+    """Summarizes the results of :func:`render`.
+
+    Attributes
+    ----------
+    results: list of :class:`Result`
+      The result of each canvas, in the order they were given.
+    elapsed: number
+      Wall-clock time in seconds spent rendering the batch.
+    """
+    def __init__(self, results, elapsed):
+        self.results = sorted(results, key=lambda result: result.index)
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return "<toyplot.batch.Report %s canvases, %s failures, %.1f canvases/s>" % (len(self.results), len(self.failures), self.throughput)
+
+    @property
+    def failures(self):
+        """List of :class:`Result` for every canvas that couldn't be rendered."""
+        return [result for result in self.results if result.error is not None]
+
+    @property
+    def throughput(self):
+        """Canvases rendered per second."""
+        return len(self.results) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def latency(self, percentile=50):
+        """Return a percentile of the time spent rendering each canvas.
+
+        Parameters
+        ----------
+        percentile: number, optional
+          Percentile in the range [0, 100].
+
+        Returns
+        -------
+        latency: number
+          Latency in seconds.
+        """
+        if not self.results:
+            return 0.0
+        return float(numpy.percentile([result.latency for result in self.results], percentile))
+
+
+def render(canvases, formats=("html",), directory=".", names=None, workers=None, progress=None):
+    """Render a collection of canvases to files.
+
+    Each canvas is written to `directory` once per format, as soon as it's
+    rendered.  A canvas that can't be rendered is reported in the returned
+    :class:`Report`, without interrupting the rest of the batch.
+
+    Parameters
+    ----------
+    canvases: iterable of :class:`toyplot.canvas.Canvas` or callables
+      The canvases to render, which are consumed as the batch progresses.
+      Callables are called without arguments to create a canvas, so that
+      expensive figures can be built in parallel.
+    formats: sequence of strings, optional
+      Output formats: any of "html", "pdf", "png", and "svg".
+    directory: string, optional
+      Output directory, which is created if it doesn't exist.
+    names: iterable of strings, optional
+      Base name of the output files for each canvas.  Defaults to
+      "canvas-<index>".
+    workers: integer, optional
+      Number of worker processes used to render canvases in parallel.  By
+      default, canvases are rendered in the calling process.  Canvas objects
+      can't be sent to worker processes, so `canvases` must contain
+      picklable callables, e.g. module-level functions.
+    progress: callback function taking a single :class:`Result` argument, optional
+      Called as each canvas is rendered, in order of completion.
+
+    Returns
+    -------
+    report: :class:`Report`
+
+    Examples
+    --------
+    >>> report = toyplot.batch.render(canvases, formats=["html", "png"], directory="figures", workers=8)
+    >>> for result in report.failures:
+    ...   print(result.name, result.error)
+    """
+    formats = list(formats)
+    for format in formats:
+        if format not in _formats:
+            raise ValueError("Unsupported format: %s" % format)
+    if names is not None and hasattr(canvases, "__len__") and hasattr(names, "__len__") and len(names) != len(canvases):
+        raise ValueError("Expected %s names, received %s." % (len(canvases), len(names)))
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    results = []
+    start = time.time()
+    if workers is None or workers < 2:
+        _initialize_worker(formats, directory)
+        try:
+            for item in _work_items(canvases, names, parallel=False):
+                results.append(_render_canvas(item))
+                if progress is not None:
+                    progress(results[-1])
+        finally:
+            _initialize_worker(None, None)
+    else:
+        # Only the work items are sent to workers, a few at a time, so the
+        # input can be consumed lazily.
+        pool = multiprocessing.Pool(workers, _initialize_worker, (formats, directory))
+        try:
+            for result in pool.imap_unordered(_render_canvas, _work_items(canvases, names, parallel=True), chunksize=4):
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    return Report(results, time.time() - start)
+
+
+def _work_items(canvases, names, parallel):
+    """Yield an (index, name, canvas) tuple for each canvas to be rendered."""
+    names = None if names is None else iter(names)
+    for index, canvas in enumerate(canvases):
+        if parallel and not callable(canvas):
+            raise ValueError("Canvas objects can't be sent to worker processes.  Use a callable that creates canvas %s instead." % index)
+        name = "canvas-%s" % index if names is None else next(names, None)
+        if name is None:
+            raise ValueError("Received fewer names than canvases.")
+        yield index, name, canvas
+    if names is not None and next(names, None) is not None:
+        raise ValueError("Received more names than canvases.")
+
+
+_worker_state = None
+
+
+def _initialize_worker(formats, directory):
+    """Store the batch settings in a worker process."""
+    global _worker_state
+    _worker_state = (formats, directory)
+
+
+def _render_canvas(item):
+    """Render one canvas from the batch in every format, returning a :class:`Result`."""
+    index, name, canvas = item
+    formats, directory = _worker_state
+    start = time.time()
+    paths = []
+    error = None
+    try:
+        if callable(canvas):
+            canvas = canvas()
+        for format in formats:
+            path = os.path.join(directory, "%s.%s" % (name, format))
+            importlib.import_module(_formats[format]).render(canvas, path)
+            paths.append(path)
+    except Exception:
+        error = traceback.format_exc()
+    return Result(index, name, paths, error, time.time() - start)
@@ -0,0 +1,121 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Functionality for rasterizing marks into bitmaps, and encoding them as PNG images.
+"""
+
+from __future__ import division
+
+import numpy
+import struct
+import zlib
+
+
+def discs(width, height, x, y, diameter, colors):
+    """Rasterize a collection of filled circles.
+
+    Overlapping circles are composited independently of their order: the
+    opacity of each pixel combines the opacities of every circle that covers
+    it, and its color is the opacity-weighted average of their colors.  The
+    result matches "over" compositing exactly when the overlapping circles
+    share a color.
+
+    Parameters
+    ----------
+    width, height: integer
+      Size of the bitmap in pixels.
+    x, y: array-like of numbers
+      Circle centers, in pixel coordinates.
+    diameter: array-like of numbers
+      Circle diameters, in pixels.
+    colors: array-like of :attr:`toyplot.color.dtype`
+      Circle colors.
+
+    Returns
+    -------
+    image: :class:`numpy.ndarray` of uint8, with shape (height, width, 4)
+      RGBA bitmap, with unassociated (straight) alpha.
+    """
+    x = numpy.asarray(x, dtype="float64")
+    y = numpy.asarray(y, dtype="float64")
+    diameter = numpy.broadcast_to(numpy.asarray(diameter, dtype="float64"), x.shape)
+    colors = numpy.asarray(colors)
+    alpha = numpy.clip(colors["a"].astype("float64"), 0, 0.999999)
+
+    size = width * height
+    # Per-pixel sums of log(1 - alpha), alpha, and alpha-weighted r, g, b.
+    sums = numpy.zeros((5, size))
+
+    column = numpy.floor(x).astype("int64")
+    row = numpy.floor(y).astype("int64")
+    radius = numpy.maximum(numpy.round(diameter / 2).astype("int64"), 0)
+
+    # Draw circles of the same radius together, one pixel offset at a time.
+    for circle_radius in numpy.unique(radius):
+        selection = radius == circle_radius
+        scolumn = column[selection]
+        srow = row[selection]
+        salpha = alpha[selection]
+        scolors = colors[selection]
+        weights = numpy.row_stack((
+            numpy.log1p(-salpha),
+            salpha,
+            salpha * scolors["r"],
+            salpha * scolors["g"],
+            salpha * scolors["b"],
+            ))
+        offsets = numpy.arange(-circle_radius, circle_radius + 1)
+        for dy in offsets:
+            for dx in offsets:
+                if dx * dx + dy * dy > max(circle_radius * circle_radius, 0.5):
+                    continue
+                pcolumn = scolumn + dx
+                prow = srow + dy
+                inside = numpy.flatnonzero((pcolumn >= 0) & (pcolumn < width) & (prow >= 0) & (prow < height))
+                index = prow[inside] * width + pcolumn[inside]
+                for channel in range(5):
+                    sums[channel] += numpy.bincount(index, weights=weights[channel][inside], minlength=size)
+
+    coverage, weights, r, g, b = sums
+    image = numpy.zeros((size, 4))
+    covered = weights > 0
+    image[covered, 0] = r[covered] / weights[covered]
+    image[covered, 1] = g[covered] / weights[covered]
+    image[covered, 2] = b[covered] / weights[covered]
+    image[:, 3] = 1 - numpy.exp(coverage)
+    return numpy.round(numpy.clip(image, 0, 1) * 255).astype("uint8").reshape((height, width, 4))
+
+
+def to_png(image):
+    """Encode a bitmap as PNG data.
+
+    Parameters
+    ----------
+    image: array-like of uint8, with shape (height, width, channels)
+      Grayscale, grayscale + alpha, RGB, or RGBA bitmap, with 1, 2, 3, or 4
+      channels respectively.
+
+    Returns
+    -------
+    png: bytes
+      The encoded PNG image.
+    """
+    image = numpy.asarray(image, dtype="uint8")
+    if image.ndim == 2:
+        image = image[:, :, numpy.newaxis]
+    height, width, channels = image.shape
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+
+    # Each scanline is prefixed with its filter type (0, no filtering).
+    scanlines = numpy.column_stack((numpy.zeros(height, dtype="uint8"), image.reshape((height, width * channels))))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)),
+        chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6)),
+        chunk(b"IEND", b""),
+        ])
@@ -0,0 +1,444 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Cache rendered output, so identical canvases are only rendered once.
+
+Caching is disabled by default.  To enable it, assign a :class:`Cache` to
+:data:`toyplot.config.cache`:
+
+>>> toyplot.config.cache = toyplot.cache.Cache(directory="/tmp/toyplot-cache")
+
+Once enabled, :func:`toyplot.html.render` and :func:`toyplot.svg.render` (when
+writing to a file), :func:`toyplot.pdf.render`, and :func:`toyplot.png.render`
+look up their output using a :func:`fingerprint` of the canvas, skipping
+rendering altogether when it has been rendered before.  HTML and SVG markup is
+only cached when its element ids are deterministic (see the `id_prefix`
+parameter of :func:`toyplot.html.render`), since random ids have to be unique
+every time a canvas is rendered.  The markup is shared by every id prefix, so
+identical canvases rendered with different prefixes are only rendered once.
+Canvases containing objects that can't be fingerprinted aren't cached.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import array
+import collections
+import datetime
+import decimal
+import fractions
+import functools
+import hashlib
+import io
+import itertools
+import numpy
+import os
+import tempfile
+import threading
+import toyplot.compatibility
+import toyplot.config
+import types
+
+
+class Cache(object):
+    """Stores rendered output in memory, and optionally on disk.
+
+    Both tiers evict their least-recently-used entries when they exceed their
+    size limits.  Entries found on disk are promoted to memory.  A directory
+    can be shared by many processes.
+
+    Parameters
+    ----------
+    memory_size: integer, optional
+      Maximum size in bytes of the output stored in memory.
+    directory: string, optional
+      Directory where output is stored on disk.  If `None` (the default),
+      output is only stored in memory.
+    disk_size: integer, optional
+      Maximum size in bytes of the output stored in `directory`.
+
+    Attributes
+    ----------
+    hits: integer
+      Number of lookups that found cached output.
+    misses: integer
+      Number of lookups that didn't.
+    evictions: integer
+      Number of entries that have been evicted from either tier.
+    """
+    def __init__(self, memory_size=64 * 1024 * 1024, directory=None, disk_size=1024 * 1024 * 1024):
+        self._memory_size = memory_size
+        self._directory = directory
+        self._disk_size = disk_size
+        self._memory = collections.OrderedDict()
+        self._memory_used = 0
+        self._disk_used = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if directory is not None and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def __repr__(self):
+        return "<toyplot.cache.Cache %s hits, %s misses, %s evictions>" % (self.hits, self.misses, self.evictions)
+
+    def get(self, key):
+        """Return the output stored for a key, or `None`."""
+        with self._lock:
+            data = self._memory.pop(key, None)
+            if data is not None:
+                self._memory[key] = data
+                self.hits += 1
+                return data
+
+            if self._directory is not None:
+                path = os.path.join(self._directory, key)
+                try:
+                    with open(path, "rb") as stream:
+                        data = stream.read()
+                    os.utime(path, None)
+                except (IOError, OSError):
+                    data = None
+                if data is not None:
+                    self._store(key, data)
+                    self.hits += 1
+                    return data
+
+            self.misses += 1
+            return None
+
+    def put(self, key, data):
+        """Store the output for a key."""
+        with self._lock:
+            self._store(key, data)
+            if self._directory is not None:
+                descriptor, path = tempfile.mkstemp(dir=self._directory, prefix=".")
+                with os.fdopen(descriptor, "wb") as stream:
+                    stream.write(data)
+                try:
+                    if os.path.exists(os.path.join(self._directory, key)):
+                        os.remove(os.path.join(self._directory, key))
+                    os.rename(path, os.path.join(self._directory, key))
+                except OSError:  # pragma: no cover
+                    os.remove(path)
+                    return
+                if self._disk_used is None:
+                    self._disk_used = self._scan()[1]
+                else:
+                    self._disk_used += len(data)
+                if self._disk_used > self._disk_size:
+                    self._evict_disk()
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+            if self._directory is not None:
+                for path, size, mtime in self._scan()[0]:
+                    os.remove(path)
+                self._disk_used = 0
+
+    def _store(self, key, data):
+        if key in self._memory:
+            self._memory_used -= len(self._memory.pop(key))
+        if len(data) > self._memory_size:
+            return
+        self._memory[key] = data
+        self._memory_used += len(data)
+        while self._memory_used > self._memory_size:
+            self._memory_used -= len(self._memory.popitem(last=False)[1])
+            self.evictions += 1
+
+    def _scan(self):
+        """Return the (path, size, mtime) of every entry on disk, and their total size."""
+        entries = []
+        for name in os.listdir(self._directory):
+            if name.startswith("."):
+                continue
+            path = os.path.join(self._directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:  # pragma: no cover
+                continue
+            entries.append((path, status.st_size, status.st_mtime))
+        return entries, sum(size for path, size, mtime in entries)
+
+    def _evict_disk(self):
+        # Other processes may share the directory, so start from its actual contents.
+        entries, self._disk_used = self._scan()
+        for path, size, mtime in sorted(entries, key=lambda entry: entry[2]):
+            if self._disk_used <= self._disk_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:  # pragma: no cover
+                continue
+            self._disk_used -= size
+            self.evictions += 1
+
+
+def fingerprint(canvas):
+    """Return a hash of the state of a canvas.
+
+    The hash covers the canvas children, marks, data tables, styles, and
+    animation, so canvases built the same way have the same fingerprint,
+    regardless of the process that built them.
+
+    Parameters
+    ----------
+    canvas: :class:`toyplot.canvas.Canvas`
+
+    Returns
+    -------
+    fingerprint: string
+      Hexadecimal SHA-1 digest.
+
+    Raises
+    ------
+    TypeError
+      If the canvas contains an object whose state can't be hashed reliably,
+      such as an object without a `__dict__`.
+    """
+    digest = hashlib.sha1()
+    _update(digest, canvas, {})
+    return digest.hexdigest()
+
+
+try:
+    _scalar_types = (bool, int, long, float, complex, numpy.number, numpy.bool_)
+except NameError:  # pragma: no cover
+    _scalar_types = (bool, int, float, complex, numpy.number, numpy.bool_)
+
+_simple_types = _scalar_types + (toyplot.compatibility.unicode_type, toyplot.compatibility.bytes_type, type(None))
+
+# Types without a __dict__ whose repr identifies their value.
+_repr_types = (numpy.generic, numpy.dtype, datetime.date, datetime.time, datetime.timedelta, decimal.Decimal, fractions.Fraction)
+
+try:
+    from collections.abc import Set as _Set
+except ImportError:  # pragma: no cover
+    from collections import Set as _Set
+
+
+def _update(digest, value, seen):
+    """Add a value to a digest, recursing into containers and object state."""
+    def write(tag, data=b""):
+        digest.update(tag.encode("ascii") + str(len(data)).encode("ascii") + b":" + data)
+
+    if value is None or isinstance(value, _scalar_types):
+        write(type(value).__name__, repr(value).encode("ascii"))
+        return
+    if isinstance(value, toyplot.compatibility.unicode_type):
+        write("u", value.encode("utf-8"))
+        return
+    if isinstance(value, toyplot.compatibility.bytes_type):
+        write("b", value)
+        return
+
+    # Shared and circular references are written as the order in which the
+    # referenced object was first seen.  Objects are kept alive until the
+    # digest is complete, so their ids can't be reused.
+    if id(value) in seen:
+        write("ref", str(seen[id(value)][0]).encode("ascii"))
+        return
+    seen[id(value)] = (len(seen), value)
+
+    if isinstance(value, numpy.ndarray):
+        write("ndarray", ("%s%s" % (value.dtype.str, value.shape)).encode("ascii"))
+        if isinstance(value, numpy.ma.MaskedArray):
+            # Masked values may be uninitialized, so they're replaced first.
+            _update(digest, value.filled(), seen)
+            _update(digest, numpy.ma.getmaskarray(value), seen)
+        elif value.dtype.hasobject:
+            _update_items(digest, value.ravel().tolist(), seen)
+        else:
+            write("data", numpy.ascontiguousarray(value).tobytes())
+    elif isinstance(value, array.array):
+        write("array", value.typecode.encode("ascii"))
+        write("data", value.tobytes() if hasattr(value, "tobytes") else value.tostring())
+    elif isinstance(value, collections.OrderedDict):
+        write("OrderedDict")
+        for key, item in value.items():
+            _update(digest, key, seen)
+            _update(digest, item, seen)
+    elif isinstance(value, dict):
+        write("dict")
+        items = list(value.items())
+        if isinstance(value, collections.defaultdict) and value.default_factory is not None:
+            # Reading a missing key adds a default entry, which doesn't change the meaning.
+            default = value.default_factory()
+            items = [(key, item) for key, item in items if not (type(item) is type(default) and item == default)]
+        for key, item in sorted(items, key=lambda item: _order(item[0], seen)):
+            _update(digest, key, seen)
+            _update(digest, item, seen)
+    elif isinstance(value, (set, frozenset)):
+        write("set")
+        for item in sorted(value, key=lambda item: _order(item, seen)):
+            _update(digest, item, seen)
+    elif isinstance(value, _Set):
+        # Other sets, like toyplot.axes._ordered_set, have a meaningful order.
+        write("Set")
+        for item in value:
+            _update(digest, item, seen)
+    elif isinstance(value, (list, tuple)):
+        write(type(value).__name__)
+        _update_items(digest, value, seen)
+    elif isinstance(value, (type, types.ModuleType)):
+        write("type", ("%s.%s" % (getattr(value, "__module__", ""), value.__name__)).encode("utf-8"))
+    elif isinstance(value, types.FunctionType):
+        write("function", ("%s.%s" % (value.__module__, value.__name__)).encode("utf-8"))
+        _update(digest, value.__code__, seen)
+        _update(digest, value.__defaults__, seen)
+        _update(digest, [cell.cell_contents for cell in value.__closure__ or ()], seen)
+    elif isinstance(value, types.CodeType):
+        write("code", value.co_code)
+        _update(digest, value.co_consts, seen)
+        _update(digest, value.co_names, seen)
+    elif isinstance(value, types.MethodType):
+        write("method")
+        _update(digest, value.__func__, seen)
+        _update(digest, value.__self__, seen)
+    elif isinstance(value, (types.BuiltinFunctionType, numpy.ufunc)):
+        write("builtin", ("%s.%s" % (getattr(value, "__module__", None) or "", value.__name__)).encode("utf-8"))
+        if getattr(value, "__self__", None) is not None and not isinstance(value.__self__, types.ModuleType):
+            _update(digest, value.__self__, seen)
+    elif isinstance(value, functools.partial):
+        write("partial")
+        _update(digest, (value.func, value.args, value.keywords), seen)
+    elif isinstance(value, itertools.cycle):
+        # Only affects marks that haven't been created yet.
+        write("cycle")
+    elif hasattr(value, "__dict__"):
+        write("object", ("%s.%s" % (type(value).__module__, type(value).__name__)).encode("utf-8"))
+        # Prefer the state that would be pickled, which omits derived data.
+        if getattr(type(value), "__getstate__", None) not in (None, getattr(object, "__getstate__", None)):
+            _update(digest, value.__getstate__(), seen)
+        else:
+            # Objects can also name the state they compute while rendering,
+            # so a canvas has the same fingerprint before and after.
+            state = value.__dict__
+            derived = getattr(type(value), "_derived_state", None)
+            if derived:
+                state = dict([(key, item) for key, item in state.items() if key not in derived])
+            _update(digest, state, seen)
+    elif isinstance(value, _repr_types):
+        write("repr", ("%s.%s:%r" % (type(value).__module__, type(value).__name__, value)).encode("utf-8"))
+    else:
+        # Other reprs may include memory addresses, so they can't be trusted.
+        raise TypeError("Can't fingerprint %s.%s objects." % (type(value).__module__, type(value).__name__))
+
+
+def _update_items(digest, items, seen):
+    """Add a sequence of values to a digest."""
+    # Long sequences of strings and numbers, e.g. object arrays, are
+    # written all at once.
+    kinds = set(map(type, items))
+    if all(issubclass(kind, _simple_types) for kind in kinds):
+        data = repr((sorted(kind.__name__ for kind in kinds), items)).encode("utf-8")
+        digest.update(b"items" + str(len(data)).encode("ascii") + b":" + data)
+        return
+    for item in items:
+        _update(digest, item, seen)
+
+
+def _order(key, seen):
+    """Sort key that orders the keys of a dict or set independently of their ids."""
+    if isinstance(key, _simple_types):
+        return (0, 0, repr(key))
+    if isinstance(key, tuple) and all(_order(item, seen)[0] == 0 for item in key):
+        return (0, 0, repr(key))
+    if id(key) in seen:
+        return (1, seen[id(key)][0], "")
+    return (2, 0, repr(key))
+
+
+# Configuration that changes the rendered output.
+_config = [
+    "data_table_encoding",
+    "decimation",
+    "embed_data_tables",
+    "marker_symbols",
+    "png_rasterizer",
+    "precision",
+    "relative_paths",
+    "style_classes",
+    ]
+
+
+def _key(format, canvas, parameters):
+    """Return the cache key for a canvas rendered in a format with the given parameters."""
+    import toyplot
+    digest = hashlib.sha1()
+    _update(digest, (
+        toyplot.__version__,
+        format,
+        fingerprint(canvas),
+        parameters,
+        [getattr(toyplot.config, name) for name in _config],
+        ), {})
+    return digest.hexdigest()
+
+
+_state = threading.local()
+
+
+def _enabled():
+    """Return True if output should be looked up in :data:`toyplot.config.cache`."""
+    return toyplot.config.cache is not None and not getattr(_state, "rendering", False)
+
+
+def _lookup(format, canvas, parameters):
+    """Return the cache key for a canvas and its cached output, or `None` for either.
+
+    The key is `None` if the canvas can't be fingerprinted.
+    """
+    # Rendering normally disables autorendering, so a cache hit must too.
+    canvas.autorender(False)
+    try:
+        key = _key(format, canvas, parameters)
+    except TypeError:
+        return None, None
+    return key, toyplot.config.cache.get(key)
+
+
+def _render(format, canvas, fobj, parameters, render, id_prefix=None):
+    """Return cached output, or call render(stream) to write it to a stream, then cache it.
+
+    If `id_prefix` is specified, render(stream, id_prefix) is called with a
+    placeholder prefix instead, which is replaced by `id_prefix` in the
+    output, so the cached output can be shared by every prefix.
+
+    Canvases that can't be fingerprinted are rendered without the cache.
+    The output is written to `fobj` in the same way as the backend render()
+    functions, or returned if `fobj` is `None`.
+    """
+    key, data = _lookup(format, canvas, parameters)
+    placeholder = None if key is None or id_prefix is None else "t" + key
+    if data is None:
+        stream = io.BytesIO()
+        _state.rendering = True
+        try:
+            if id_prefix is None:
+                render(stream)
+            else:
+                render(stream, placeholder or id_prefix)
+        finally:
+            _state.rendering = False
+        data = stream.getvalue()
+        if key is not None:
+            toyplot.config.cache.put(key, data)
+
+    if placeholder is not None:
+        data = data.replace(placeholder.encode("ascii"), toyplot.compatibility.unicode_type(id_prefix).encode("utf-8"))
+
+    if fobj is None:
+        return data
+    elif isinstance(fobj, toyplot.compatibility.string_type):
+        with open(fobj, "wb") as stream:
+            stream.write(data)
+    else:
+        fobj.write(data)
@@ -4,7 +4,8 @@
 
 from __future__ import division
 
-import collections
+import array
+import io
 import numbers
 import numpy
 import toyplot.axes
@@ -33,8 +34,8 @@ class AnimationFrame(object):
         self._changes = changes
 
         # Pre-initialize storage for this frame
-        self._changes[self._begin]
-        self._changes[self._end]
+        self._changes.add_time(self._begin)
+        self._changes.add_time(self._end)
 
     def __repr__(self):
         return "<toyplot.canvas.AnimationFrame %s %.2f %.2f>" % (
@@ -66,7 +67,7 @@ class AnimationFrame(object):
         if not isinstance(mark, toyplot.mark.Mark):
             raise ValueError(
                 "Mark style can only be set on toyplot.mark.Mark instances.")
-        self._changes[self._begin]["set-mark-style"].append((mark, style))
+        self._changes.set_style("set-mark-style", self._begin, mark, -1, -1, style)
 
     def set_datum_style(self, mark, series, datum, style):
         """Change the style of one datum in a :class:`toyplot.mark.Mark` at the current frame.
@@ -85,8 +86,9 @@ class AnimationFrame(object):
                 toyplot.mark.Text,
             )):
             raise ValueError("Cannot set datum style for %s." % type(mark))
-        self._changes[self._begin][
-            "set-datum-style"].append((mark, series, datum, style))
+        if isinstance(mark, toyplot.mark.Scatterplot) and mark._raster is not False and mark._raster is not None:
+            raise ValueError("Cannot set datum style for a rasterized scatterplot.")
+        self._changes.set_style("set-datum-style", self._begin, mark, series, datum, style)
 
     def set_datum_text(self, mark, series, datum, text):
         """Change the text in a :class:`toyplot.mark.Text` at the current frame.
@@ -99,8 +101,146 @@ class AnimationFrame(object):
         if not isinstance(mark, toyplot.mark.Text):
             raise ValueError(
                 "Mark text can only be set for toyplot.mark.Text instances.")
-        self._changes[self._begin][
-            "set-datum-text"].append((mark, series, datum, text))
+        self._changes.set_text(self._begin, mark, series, datum, text)
+
+
+class _AnimationChanges(object):
+    """Columnar storage for the changes made to a canvas during animation.
+
+    Every change to one style property (or the text) of a mark or datum is
+    stored as a row of integers in a set of compact arrays, with the times,
+    marks, property names, and values they refer to stored once apiece.
+    """
+    types = ["set-mark-style", "set-datum-style", "set-datum-text"]
+
+    def __init__(self):
+        self._times = []
+        self._marks = []
+        self._properties = []
+        self._values = []
+        self._create_indices()
+
+        self._time = array.array("i")
+        self._type = array.array("b")
+        self._mark = array.array("i")
+        self._series = array.array("i")
+        self._datum = array.array("i")
+        self._property = array.array("i")
+        self._value = array.array("i")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ["_time_index", "_mark_index", "_property_index", "_value_index"]:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._create_indices()
+
+    def _create_indices(self):
+        # Marks are indexed by identity, and values by type, so that e.g. 1 and "1" remain distinct.
+        self._time_index = dict([(time, index) for index, time in enumerate(self._times)])
+        self._mark_index = dict([(id(mark), index) for index, mark in enumerate(self._marks)])
+        self._property_index = dict([(property, index) for index, property in enumerate(self._properties)])
+        self._value_index = {}
+        for index, value in enumerate(self._values):
+            key = self._value_key(value)
+            if key is not None:
+                self._value_index.setdefault(key, index)
+
+    @staticmethod
+    def _value_key(value):
+        """Return the key used to share a value between changes, or `None` if it's unhashable."""
+        try:
+            hash(value)
+        except TypeError:
+            return None
+        return (type(value), value)
+
+    @staticmethod
+    def _intern(items, index, item, key):
+        if key not in index:
+            index[key] = len(items)
+            items.append(item)
+        return index[key]
+
+    def _add_value(self, value):
+        key = self._value_key(value)
+        if key is None:
+            # Unhashable values, such as lists, are stored once per change.
+            self._values.append(value)
+            return len(self._values) - 1
+        return self._intern(self._values, self._value_index, value, key)
+
+    def _append(self, change_type, time, mark, series, datum, items):
+        change_type = self.types.index(change_type)
+        time = self.add_time(time)
+        mark = self._intern(self._marks, self._mark_index, mark, id(mark))
+        series = int(series)
+        datum = int(datum)
+        for property, value in items:
+            self._time.append(time)
+            self._type.append(change_type)
+            self._mark.append(mark)
+            self._series.append(series)
+            self._datum.append(datum)
+            self._property.append(self._intern(self._properties, self._property_index, property, property))
+            self._value.append(self._add_value(value))
+
+    def add_time(self, time):
+        return self._intern(self._times, self._time_index, time, time)
+
+    def set_style(self, change_type, time, mark, series, datum, style):
+        self._append(change_type, time, mark, series, datum, style.items())
+
+    def set_text(self, time, mark, series, datum, text):
+        self._append("set-datum-text", time, mark, series, datum, [(None, text)])
+
+    def times(self):
+        """Return the sorted times of every frame boundary."""
+        return sorted(self._times)
+
+    def columns(self):
+        """Return the changes as a dict of numpy arrays, sorted by frame.
+
+        Changes that set a property to the value it already has from an
+        earlier change are omitted, so frames only contain what differs from
+        the state established by their predecessors.
+        """
+        times = numpy.array(self._times, dtype="float64")
+        rank = numpy.empty(len(times), dtype="int32")
+        rank[numpy.argsort(times, kind="mergesort")] = numpy.arange(len(times))
+
+        columns = {}
+        for name in ["time", "type", "mark", "series", "datum", "property", "value"]:
+            column = getattr(self, "_" + name)
+            columns[name] = numpy.frombuffer(column, dtype=column.typecode) if len(column) else numpy.zeros(0, dtype=column.typecode)
+        columns["frame"] = rank[columns.pop("time")]
+
+        # Sorting copies the columns, so the arrays can continue to grow.
+        order = numpy.argsort(columns["frame"], kind="mergesort")
+        columns = dict([(name, column[order]) for name, column in columns.items()])
+
+        # Drop changes whose value matches the previous change to the same property.
+        keys = [columns[name] for name in ["type", "mark", "series", "datum", "property"]]
+        order = numpy.lexsort([numpy.arange(len(order))] + keys[::-1])
+        redundant = numpy.zeros(len(order), dtype="bool")
+        if len(order):
+            same = columns["value"][order][1:] == columns["value"][order][:-1]
+            for key in keys:
+                same &= key[order][1:] == key[order][:-1]
+            redundant[order[1:]] = same
+        return dict([(name, column[~redundant]) for name, column in columns.items()])
+
+    def marks(self):
+        return self._marks
+
+    def properties(self):
+        return self._properties
+
+    def values(self):
+        return self._values
 
 ##########################################################################
 # Canvas
@@ -153,20 +293,31 @@ class Canvas(object):
             },
             toyplot.require.style(style, allowed=set(["background-color", "border"])),
             )
-        self._animation = collections.defaultdict(
-            lambda: collections.defaultdict(list))
+        self._animation = _AnimationChanges()
         self._children = []
         self.autorender(autorender, autoformat)
 
     def _repr_html_(self):
+        import toyplot.cache
         import toyplot.html
+        import toyplot.profile
         import xml.etree.ElementTree as xml
-        return toyplot.compatibility.unicode_type(
-            xml.tostring(
-                toyplot.html.render(self),
-                encoding="utf-8",
-                method="html"),
-            encoding="utf-8")
+
+        def render(stream, id_prefix=None):
+            html = toyplot.html.render(self, id_prefix=id_prefix)
+            with toyplot.profile._phase("serialize") as phase:
+                markup = xml.tostring(html, encoding="utf-8", method="html")
+                phase.count(bytes=len(markup))
+            stream.write(markup)
+
+        stream = io.BytesIO()
+        # Markup with random ids isn't cached, since the ids have to be unique.
+        id_prefix = toyplot.html._element_ids(self, None)._prefix if toyplot.cache._enabled() else None
+        if id_prefix is not None:
+            toyplot.cache._render("html-repr", self, stream, (), render, id_prefix=id_prefix)
+        else:
+            render(stream)
+        return toyplot.compatibility.unicode_type(stream.getvalue(), encoding="utf-8")
 
     def _repr_png_(self):
         import toyplot.png
@@ -217,7 +368,7 @@ class Canvas(object):
 
         # Record the end-time of the last frame, so backends can calculate
         # frame durations.
-        self._animation[frames[-1]]
+        self._animation.add_time(frames[-1])
 
     def autorender(self, enable=None, autoformat=None):
         """Enable / disable canvas autorendering.
@@ -9,4 +9,17 @@ import os
 
 autorender = True
 autoformat = os.environ.get("TOYPLOT_AUTOFORMAT", "html")
-
+marker_symbols = False
+style_classes = False
+decimation = None
+precision = None
+relative_paths = False
+embed_data_tables = True
+data_table_encoding = "binary"
+png_rasterizer = "ghostscript"
+ghostscript_processes = 0
+ghostscript_timeout = 60
+frame_batch_size = 64
+cache = None
+deterministic_ids = False
+incremental_render = False
@@ -49,6 +49,9 @@ class Table(object):
     def __init__(self, data=None):
         self._columns = collections.OrderedDict()
         self._metadata = collections.defaultdict(dict)
+        # Incremented whenever a column is added, replaced, or removed, so
+        # renderers can tell when markup generated from the table is stale.
+        self._revision = 0
 
         if data is not None:
             # Input data for which an explicit column ordering is known.
@@ -164,8 +167,10 @@ class Table(object):
                     "Expected %s values, received %s." %
                     (column.shape[0], value.shape[0]))
         self._columns[key] = value
+        self._revision += 1
 
     def __delitem__(self, key):
+        self._revision += 1
         return self._columns.__delitem__(key)
 
     def __len__(self):
@@ -0,0 +1,107 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Algorithms for reducing the number of vertices in a line without changing its appearance.
+"""
+
+from __future__ import division
+
+import numpy
+
+
+def minmax(x, y, resolution=1.0):
+    """Return the indices of the vertices that preserve a line's appearance at a given resolution.
+
+    The vertices are partitioned into columns `resolution` units wide, and the
+    first, last, minimum, and maximum vertex in each column are kept.  When
+    `resolution` matches the size of a pixel, the rasterized line is
+    indistinguishable from the original.
+
+    Parameters
+    ----------
+    x: array-like of numbers
+      Monotonic (increasing or decreasing) vertex coordinates, along which the
+      line will be partitioned.
+    y: array-like of numbers
+      Vertex coordinates perpendicular to `x`.
+    resolution: number, optional
+      The width of each column.
+
+    Returns
+    -------
+    indices: :class:`numpy.ndarray` of integers
+      Sorted indices of the vertices to keep.
+    """
+    x = numpy.asarray(x, dtype="float64")
+    y = numpy.asarray(y, dtype="float64")
+    if len(x) < 5:
+        return numpy.arange(len(x))
+
+    columns = numpy.floor(x / resolution)
+    starts = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(columns)) + 1))
+    stops = numpy.concatenate((starts[1:], [len(x)]))
+    counts = stops - starts
+
+    index = numpy.arange(len(x))
+    lows = numpy.repeat(numpy.minimum.reduceat(y, starts), counts)
+    highs = numpy.repeat(numpy.maximum.reduceat(y, starts), counts)
+    argmin = numpy.minimum.reduceat(numpy.where(y == lows, index, len(x)), starts)
+    argmax = numpy.minimum.reduceat(numpy.where(y == highs, index, len(x)), starts)
+
+    return numpy.unique(numpy.concatenate((
+        starts,
+        stops - 1,
+        numpy.minimum(argmin, stops - 1),
+        numpy.minimum(argmax, stops - 1),
+        )))
+
+
+def lttb(x, y, count):
+    """Return the indices of `count` vertices chosen with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last vertices are always kept.  The remaining vertices are
+    split into `count` - 2 buckets of equal size, and the vertex from each
+    bucket that forms the largest triangle with the previously selected vertex
+    and the average of the next bucket is kept.
+
+    Parameters
+    ----------
+    x: array-like of numbers
+      Monotonic (increasing or decreasing) vertex coordinates.
+    y: array-like of numbers
+      Vertex coordinates perpendicular to `x`.
+    count: integer
+      The number of vertices to keep.
+
+    Returns
+    -------
+    indices: :class:`numpy.ndarray` of integers
+      Sorted indices of the vertices to keep.
+    """
+    x = numpy.asarray(x, dtype="float64")
+    y = numpy.asarray(y, dtype="float64")
+    if count >= len(x) or count < 3:
+        return numpy.arange(len(x))
+
+    edges = numpy.floor(numpy.linspace(1, len(x) - 1, count - 1)).astype("int64")
+    edges[-1] = len(x) - 1
+
+    result = numpy.empty(count, dtype="int64")
+    result[0] = 0
+    result[-1] = len(x) - 1
+    selected = 0
+    for bucket in range(count - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = x[stop:edges[bucket + 2]].mean()
+            next_y = y[stop:edges[bucket + 2]].mean()
+        else:
+            next_x = x[-1]
+            next_y = y[-1]
+        areas = numpy.abs(
+            (x[selected] - next_x) * (y[start:stop] - y[selected]) -
+            (x[selected] - x[start:stop]) * (next_y - y[selected]))
+        selected = start + numpy.argmax(areas)
+        result[bucket + 1] = selected
+    return result
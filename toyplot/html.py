@@ -5,20 +5,30 @@
 from __future__ import division
 
 from multipledispatch import dispatch
+import base64
 import collections
+import contextlib
 import copy
 import itertools
 import json
 import numbers
 import numpy
+import re
 import string
+import threading
 import toyplot.axes
+import toyplot.bitmap
+import toyplot.cache
 import toyplot.canvas
 import toyplot.color
 import toyplot.compatibility
+import toyplot.config
+import toyplot.decimate
 import toyplot.mark
+import toyplot.profile
 import uuid
 import xml.etree.ElementTree as xml
+import zlib
 
 try:
     import HTMLParser
@@ -38,17 +48,97 @@ _export_data_tables = string.Template("""
 {
   var data_tables = $data_tables;
 
+  function decode_bytes(data, compressed, callback)
+  {
+    var binary = atob(data);
+    var bytes = new Uint8Array(binary.length);
+    for(var i = 0; i != binary.length; ++i)
+      bytes[i] = binary.charCodeAt(i);
+    if(!compressed)
+      callback(bytes.buffer);
+    else
+      new Response(new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"))).arrayBuffer().then(callback);
+  }
+
+  function float32_value(value)
+  {
+    // Return the shortest decimal that rounds to value in single precision, so CSV output doesn't contain double-precision noise.
+    for(var digits = 1; digits < 9; ++digits)
+    {
+      var result = Number(value.toPrecision(digits));
+      if(Math.fround(result) === value)
+        return result;
+    }
+    return value;
+  }
+
+  function decode_column(column, callback)
+  {
+    if(Array.isArray(column))
+    {
+      callback(column);
+      return;
+    }
+
+    decode_bytes(column.data, column.compressed, function(buffer)
+    {
+      var values = Array.prototype.slice.call(new window[column.type](buffer));
+      if(column.type == "Float32Array")
+        values = values.map(float32_value);
+      if(column.boolean)
+        values = values.map(function(value) { return value != 0; });
+      if(!column.mask)
+      {
+        callback(values);
+        return;
+      }
+      decode_bytes(column.mask, column.compressed, function(buffer)
+      {
+        var mask = new Uint8Array(buffer);
+        for(var i = 0; i != mask.length; ++i)
+        {
+          if(mask[i])
+            values[i] = null;
+        }
+        callback(values);
+      });
+    });
+  }
+
+  function decode_columns(columns, callback)
+  {
+    var result = [];
+    var remaining = columns.length;
+    columns.forEach(function(column, index)
+    {
+      decode_column(column, function(values)
+      {
+        result[index] = values;
+        if(--remaining == 0)
+          callback(result);
+      });
+    });
+  }
+
   function save_csv(data_table)
+  {
+    decode_columns(data_table.data, function(data)
+    {
+      write_csv(data_table, data);
+    });
+  }
+
+  function write_csv(data_table, data)
   {
     var uri = "data:text/csv;charset=utf-8,";
     uri += data_table.names.join(",") + "\\n";
-    for(var i = 0; i != data_table.data[0].length; ++i)
+    for(var i = 0; i != data[0].length; ++i)
     {
-      for(var j = 0; j != data_table.data.length; ++j)
+      for(var j = 0; j != data.length; ++j)
       {
         if(j)
           uri += ",";
-        uri += data_table.data[j][i];
+        uri += data[j][i];
       }
       uri += "\\n";
     }
@@ -201,6 +291,14 @@ _animation_controls = string.Template("""
   var frame_durations = $frame_durations;
   var state_changes = $state_changes;
 
+  // Integer columns are delta-encoded, so accumulate them.
+  ["offsets", "type", "mark", "series", "datum", "property", "value"].forEach(function(name)
+  {
+    var column = state_changes[name];
+    for(var i = 1; i < column.length; ++i)
+      column[i] += column[i - 1];
+  });
+
   var current_frame = null;
   var timeout = null;
 
@@ -294,41 +392,33 @@ _animation_controls = string.Template("""
     return item_cache[id];
   }
 
+  var datum_cache = {};
+  function get_datum(id, series, datum)
+  {
+    if(!(id in datum_cache))
+    {
+      var mark_series = get_item(id).querySelectorAll(".toyplot-Series");
+      datum_cache[id] = [];
+      for(var i = 0; i != mark_series.length; ++i)
+        datum_cache[id].push(mark_series[i].querySelectorAll(".toyplot-Datum"));
+    }
+    return datum_cache[id][series][datum];
+  }
+
   function render_changes(frame)
   {
-    var changes = state_changes[frame];
-    for(var type in changes)
+    for(var i = state_changes.offsets[frame]; i != state_changes.offsets[frame + 1]; ++i)
     {
-      var type_changes = changes[type]
+      var type = state_changes.types[state_changes.type[i]];
+      var id = state_changes.marks[state_changes.mark[i]];
+      var property = state_changes.properties[state_changes.property[i]];
+      var value = state_changes.values[state_changes.value[i]];
       if(type == "set-mark-style")
-      {
-        for(var i = 0; i != type_changes.length; ++i)
-        {
-          var mark_style = type_changes[i];
-          var mark = get_item(mark_style[0]);
-          for(var key in mark_style[1])
-            mark.style.setProperty(key, mark_style[1][key]);
-        }
-      }
+        get_item(id).style.setProperty(property, value);
       else if(type == "set-datum-style")
-      {
-        for(var i = 0; i != type_changes.length; ++i)
-        {
-          var datum_style = type_changes[i];
-          var datum = get_item(datum_style[0]).querySelectorAll(".toyplot-Series")[datum_style[1]].querySelectorAll(".toyplot-Datum")[datum_style[2]];
-          for(var key in datum_style[3])
-            datum.style.setProperty(key, datum_style[3][key]);
-        }
-      }
+        get_datum(id, state_changes.series[i], state_changes.datum[i]).style.setProperty(property, value);
       else if(type == "set-datum-text")
-      {
-        for(var i = 0; i != type_changes.length; ++i)
-        {
-          var datum_text = type_changes[i];
-          var datum = get_item(datum_text[0]).querySelectorAll(".toyplot-Series")[datum_text[1]].querySelectorAll(".toyplot-Datum")[datum_text[2]];
-          datum.textContent = datum_text[3];
-        }
-      }
+        get_datum(id, state_changes.series[i], state_changes.datum[i]).textContent = value;
     }
   }
 
@@ -348,12 +438,41 @@ _animation_controls = string.Template("""
 """)
 
 
+class _ElementIds(object):
+    """Generates unique ids for the elements in a document.
+
+    By default, ids are random.  If a prefix is specified, ids are generated
+    sequentially instead, so rendering the same canvas always produces the
+    same ids.
+    """
+    def __init__(self, prefix=None):
+        self._prefix = prefix
+        self._count = 0
+
+    def __call__(self):
+        if self._prefix is None:
+            return "t" + uuid.uuid4().hex
+        self._count += 1
+        return "%s-%s" % (self._prefix, self._count)
+
+
+def _element_ids(canvas, id_prefix):
+    """Return the :class:`_ElementIds` for a render, based on `id_prefix` and :data:`toyplot.config.deterministic_ids`."""
+    if id_prefix is None and toyplot.config.deterministic_ids:
+        id_prefix = "t" + toyplot.cache.fingerprint(canvas)[:16]
+    return _ElementIds(id_prefix)
+
+
 class _RenderContext(object):
     def __init__(self, **kwargs):
         self.root = None
+        self.serializer = None
+        self.style_classes = _StyleClasses() if toyplot.config.style_classes else None
+        self.ids = _ElementIds()
         self._id_cache = dict()
         self._data_tables = list()
         self._cartesian_axes = dict()
+        self._features = collections.OrderedDict()
         self.rendered = set()
 
         for name in kwargs:
@@ -383,7 +502,7 @@ class _RenderContext(object):
     def get_id(self, obj):
         python_id = id(obj)
         if python_id not in self._id_cache:
-            self._id_cache[python_id] = "t" + uuid.uuid4().hex
+            self._id_cache[python_id] = self.ids()
         return self._id_cache[python_id]
 
     def copy(self, **kwargs):
@@ -392,36 +511,182 @@ class _RenderContext(object):
             setattr(result, name, kwargs[name])
         return result
 
+    def flush(self, element):
+        """Write the completed children of `element` if we're streaming output."""
+        if self.serializer is not None:
+            self.serializer.flush(element)
+
+
+class _StreamingSerializer(object):
+    """Incrementally serializes a DOM tree to a stream as it's rendered.
+
+    Completed subtrees are written to the stream and detached from the tree, so
+    peak memory use is proportional to the largest subtree that is flushed,
+    rather than the entire document.  The output is byte-for-byte identical to
+    calling :func:`xml.etree.ElementTree.tostring` on the finished tree.
+
+    Callers must only modify the tree in document order: once an element has
+    been flushed, neither it nor any content preceding it may change.
+    """
+    _sentinel = "toyplot-" + uuid.uuid4().hex
+
+    def __init__(self, root, stream, method):
+        self._root = root
+        self._stream = stream
+        self._method = method
+        self._open = []
+        self._end_tags = []
+
+    def _write(self, element):
+        with toyplot.profile._phase("serialize") as phase:
+            markup = xml.tostring(element, method=self._method)
+            phase.count(bytes=len(markup))
+        self._stream.write(markup)
+
+    def _write_children(self, element, stop=None):
+        for child in list(element):
+            if child is stop:
+                break
+            self._write(child)
+            element.remove(child)
+
+    def _start(self, element):
+        # Let ElementTree generate the start and end tags, so that quoting,
+        # attribute order, etc. exactly match its output.
+        with toyplot.profile._phase("serialize") as phase:
+            shallow = xml.Element(element.tag, element.attrib)
+            shallow.text = (element.text or "") + self._sentinel
+            shallow.tail = element.tail
+            start, end = xml.tostring(shallow, method=self._method).split(
+                self._sentinel.encode("ascii"))
+            phase.count(bytes=len(start) + len(end))
+        self._stream.write(start)
+        self._open.append(element)
+        self._end_tags.append(end)
+
+    def _end(self):
+        element = self._open.pop()
+        self._write_children(element)
+        self._stream.write(self._end_tags.pop())
+        if self._open:
+            self._open[-1].remove(element)
+
+    def _path(self, element):
+        stack = [(self._root, [self._root])]
+        while stack:
+            node, path = stack.pop()
+            if node is element:
+                return path
+            for child in node:
+                stack.append((child, path + [child]))
+        raise ValueError("Element isn't part of the document.") # pragma: no cover
+
+    def flush(self, element):
+        """Write the children of `element`, plus any content that precedes them."""
+        if not len(element):
+            return
+
+        path = self._path(element)
+        depth = 0
+        while depth < min(len(self._open), len(path)) and self._open[depth] is path[depth]:
+            depth += 1
+        while len(self._open) > depth:
+            self._end()
+        for index in range(depth, len(path)):
+            if index:
+                self._write_children(path[index - 1], stop=path[index])
+            self._start(path[index])
+        self._write_children(element)
+
+    def close(self):
+        """Write any remaining content."""
+        if not self._open:
+            self._write(self._root)
+        while self._open:
+            self._end()
+
+
+def apply_changes(html, changes, index=None):
+    """Modify the HTML DOM representation of a canvas with the given changes.
+
+    Parameters
+    ----------
+    html: :class:`xml.etree.ElementTree.Element`
+      HTML (or SVG) tree returned by :func:`toyplot.html.render`.
+    changes: dict
+      Changes for one animation frame, as returned by :func:`toyplot.html.render`.
+    index: optional
+      Cache of the elements targeted by changes, for use when applying many
+      frames to the same tree.  Create it once with :func:`toyplot.html.index`.
+    """
+    if index is None:
+        index = toyplot.html.index(html)
 
-def apply_changes(html, changes):
     for change_type, instructions in changes.items():
         if change_type == "set-mark-style":
             for mark_id, style in instructions:
-                mark = html.find(".//*[@id='%s']" % mark_id)
+                mark = index.mark(mark_id)
                 style = toyplot.style.combine(dict([declaration.split(
                     ":") for declaration in mark.get("style").split(";") if declaration != ""]), style)
                 mark.set("style", _css_style(style))
         elif change_type == "set-datum-style":
             for mark_id, series, datum, style in instructions:
-                mark_xml = html.find(".//*[@id='%s']" % mark_id)
-                series_xml = mark_xml.findall(
-                    "*[@class='toyplot-Series']")[series]
-                datum_xml = series_xml.findall(
-                    "*[@class='toyplot-Datum']")[datum]
+                datum_xml = index.datum(mark_id, series, datum)
                 style = toyplot.style.combine(dict([declaration.split(
-                    ":") for declaration in datum_xml.get("style").split(";") if declaration != ""]), style)
+                    ":") for declaration in datum_xml.get("style", "").split(";") if declaration != ""]), style)
                 datum_xml.set("style", _css_style(style))
         elif change_type == "set-datum-text":
             for mark_id, series, datum, text in instructions:
-                mark_xml = html.find(".//*[@id='%s']" % mark_id)
-                series_xml = mark_xml.findall(
-                    "*[@class='toyplot-Series']")[series]
-                datum_xml = series_xml.findall(
-                    "*[@class='toyplot-Datum']")[datum]
-                datum_xml.text = text
+                index.datum(mark_id, series, datum).text = text
+
+
+def index(html):
+    """Index the elements that animation changes can modify.
+
+    Looking up elements with the returned index takes constant time, so
+    passing it to :func:`toyplot.html.apply_changes` avoids searching the
+    tree once for every change, in every frame.  The index remains valid as
+    long as the structure of the tree isn't modified.
+
+    Parameters
+    ----------
+    html: :class:`xml.etree.ElementTree.Element`
+      HTML (or SVG) tree returned by :func:`toyplot.html.render`.
+
+    Returns
+    -------
+    index: object suitable for use with :func:`toyplot.html.apply_changes`.
+    """
+    return _ChangeIndex(html)
+
+
+class _ChangeIndex(object):
+    """Lazily-built map from mark ids and (mark, series, datum) to elements."""
+    def __init__(self, root):
+        self._root = root
+        self._marks = None
+        self._datums = {}
+
+    def mark(self, mark_id):
+        if self._marks is None:
+            self._marks = {}
+            for element in self._root.iter():
+                if element.get("id") is not None:
+                    self._marks.setdefault(element.get("id"), element)
+        return self._marks[mark_id]
+
+    def datum(self, mark_id, series, datum):
+        if mark_id not in self._datums:
+            self._datums[mark_id] = [_find_class(series_xml, "toyplot-Datum") for series_xml in _find_class(self.mark(mark_id), "toyplot-Series")]
+        return self._datums[mark_id][series][datum]
+
+
+def _find_class(element, name):
+    """Return the children of `element` that have the given CSS class."""
+    return [child for child in element if name in child.get("class", "").split()]
 
 
-def render(canvas, fobj=None, animation=False):
+def render(canvas, fobj=None, animation=False, precision=None, relative_paths=None, id_prefix=None):
     """Render the HTML representation of a canvas.
 
     Generates HTML markup with an embedded SVG representation of the canvas, plus
@@ -442,6 +707,25 @@ def render(canvas, fobj=None, animation=False):
       If `True`, return a representation of the changes to be made to the HTML
       tree for animation.
 
+    precision: integer, optional
+      Maximum number of digits to write after the decimal point for
+      coordinates, sizes, transforms, and path data.  If `None` (the default),
+      :data:`toyplot.config.precision` is used, and if that is also `None`,
+      numbers are written with full precision.
+
+    relative_paths: boolean, optional
+      If `True`, write path data using relative commands, which are typically
+      shorter.  If `None` (the default), :data:`toyplot.config.relative_paths`
+      is used.
+
+    id_prefix: string, optional
+      If specified, element ids are generated sequentially using this prefix,
+      so that repeated renders of the canvas are byte-identical.  Otherwise,
+      if :data:`toyplot.config.deterministic_ids` is `True`, the prefix is
+      derived from the content of the canvas, so identical canvases produce
+      identical markup; or, by default, ids are random.  Identical canvases
+      that are shown on the same page need distinct prefixes.
+
     Returns
     -------
     html: xml.etree.ElementTree.Element or `None`
@@ -461,45 +745,58 @@ def render(canvas, fobj=None, animation=False):
     embedding in a larger document.  It is the caller's responsibility to
     supply the <html>, <body> etc. if the result is intended as a standalone
     HTML document.
+
+    If :data:`toyplot.config.incremental_render` is `True`, the markup for each
+    mark in Cartesian axes is kept between renders, and reused until the
+    mark's table or the axes domain changes, which speeds up canvases that are
+    rendered repeatedly while a few marks are updated.  Replace table columns
+    (`table["y"] = values`) rather than modifying them in-place, since
+    in-place modifications can't be detected.  Markup is only reused when ids
+    are deterministic, i.e. when `id_prefix` is specified or
+    :data:`toyplot.config.deterministic_ids` is `True`.
     """
+    if isinstance(fobj, toyplot.compatibility.string_type):
+        with open(fobj, "wb") as stream:
+            render(canvas, stream, precision=precision, relative_paths=relative_paths, id_prefix=id_prefix)
+        return
+
     canvas.autorender(False)
+    ids = _element_ids(canvas, id_prefix)
+    # Cached markup is reused verbatim, so it's only cached when its ids are
+    # deterministic; random ids have to be unique on every render.
+    if fobj is not None and not animation and ids._prefix is not None and toyplot.cache._enabled():
+        return toyplot.cache._render("html", canvas, fobj, (precision, relative_paths), lambda stream, id_prefix: render(
+            canvas, stream, precision=precision, relative_paths=relative_paths, id_prefix=id_prefix), id_prefix=ids._prefix)
 
-    # Create the SVG representation.
-    context = _RenderContext()
-    svg = xml.Element(
-        "svg",
-        xmlns="http://www.w3.org/2000/svg",
-        attrib={"xmlns:toyplot": "http://www.sandia.gov/toyplot"},
-        width="%rpx" % canvas.width,
-        height="%rpx" % canvas.height,
-        viewBox="0 0 %r %r" % (canvas.width, canvas.height),
-        preserveAspectRatio="xMidYMid meet",
-        style=_css_style(canvas._style),
-        id=context.get_id(canvas))
-    for child in canvas._children:
-        _render(canvas, child, context.copy(root=svg))
+    context = _RenderContext(ids=ids)
+    with _formatting_numbers(precision, relative_paths):
+        return _render_html(canvas, fobj, animation, context)
 
-    # Collect animation data.
-    svg_animation = collections.defaultdict(
-        lambda: collections.defaultdict(list))
-    for time, time_changes in list(canvas._animation.items())[:-1]:
-        # Ensure we have an entry for every time, even if there aren't any
-        # changes.
-        svg_animation[time]
-        for type, type_changes in time_changes.items():
-            for change in type_changes:
-                svg_animation[time][type].append(
-                    [context.get_id(change[0])] + list(change[1:]))
 
+def _render_html(canvas, fobj, animation, context):
+    """Implements :func:`render`, recording the ids assigned to each object in `context`."""
     # Create the top-level HTML element.
     root = xml.Element(
         "div",
         align="center",
         attrib={
             "class": "toyplot"},
-        id="t" +
-        uuid.uuid4().hex)
+        id=context.ids())
+
+    # Create the SVG representation.  If the caller supplied a file, markup is
+    # written as it's rendered instead of building the entire tree.
+    svg = _create_svg(canvas, context)
     root.append(svg)
+    if fobj is not None:
+        context.serializer = _StreamingSerializer(root, fobj, method="html")
+    _render_svg(canvas, svg, context)
+
+    # Collect animation data.
+    times = canvas._animation.times()
+    frame_count = max(len(times) - 1, 0)
+    changes = canvas._animation.columns()
+    changes = dict([(name, column[changes["frame"] < frame_count]) for name, column in changes.items()])
+    mark_ids = [context.get_id(mark) for mark in canvas._animation.marks()]
 
     # Add HTML controls.
     controls = xml.SubElement(
@@ -538,9 +835,10 @@ def render(canvas, fobj=None, animation=False):
         style="border-radius:3px;padding:5px;list-style:none;margin:0;",
         onmouseover="this.style.color='steelblue';this.style.background='white'",
         onmouseout="this.style.color='white';this.style.background='steelblue'").text = "Save as .csv"
+    context._features["controls"] = [mark_popup]
 
     # Allow users to export embedded table data.
-    if context._data_tables:
+    if context._data_tables and toyplot.config.embed_data_tables:
         data_tables = list()
         for data_table in context._data_tables:
             mark = data_table["mark"]
@@ -561,12 +859,14 @@ def render(canvas, fobj=None, animation=False):
 #                            data.append(column[channel].tolist())
                     else:
                         names.append(name)
-                        data.append(column.tolist())
+                        data.append(_encode_data_table_column(column, toyplot.config.data_table_encoding))
             if names:
                 data_tables.append(
                     {"id": context.get_id(mark), "filename": filename, "title": title, "names": names, "data": data})
 
-        xml.SubElement(controls, "script").text = _export_data_tables.substitute(root_id=root.get("id"), data_tables=json.dumps(data_tables))
+        script = xml.SubElement(controls, "script")
+        script.text = _export_data_tables.substitute(root_id=root.get("id"), data_tables=json.dumps(data_tables))
+        context._features["data tables"] = [script]
 
     # Provide interactive mouse coordinates.
     def _flip_infinities(value):
@@ -613,15 +913,15 @@ def render(canvas, fobj=None, animation=False):
                                 "min": _flip_infinities(segment.range.bounds.min),
                                 "max": _flip_infinities(segment.range.bounds.max)}}})
 
-        xml.SubElement(controls, "script").text = _show_mouse_coordinates.substitute(
+        script = xml.SubElement(controls, "script")
+        script.text = _show_mouse_coordinates.substitute(
             root_id=root.get("id"),
             cartesian_axes=json.dumps(cartesian_axes, cls=_NumpyJSONEncoder, sort_keys=True))
+        context._features["mouse coordinates"] = [script]
 
     # Provide VCR controls.
-    if len(svg_animation) > 1:
-        times = numpy.array(sorted(svg_animation.keys()))
-        durations = times[1:] - times[:-1]
-        changes = [change for time, change in sorted(svg_animation.items())]
+    if frame_count > 1:
+        durations = numpy.diff(times[:-1])
 
         vcr_controls = xml.SubElement(
             controls, "div", attrib={"class": "toyplot-vcr-controls"})
@@ -702,41 +1002,328 @@ def render(canvas, fobj=None, animation=False):
                     """<svg width="20" height="20"><polygon points="0,5 10,10 0,15" stroke="none" fill="{near_black}"/><polygon points="10,5 20,10 10,15" stroke="none" fill="{near_black}"/></svg>""".format(
                         near_black=toyplot.color.near_black)))
 
-        xml.SubElement(controls, "script").text = _animation_controls.substitute(
+        script = xml.SubElement(controls, "script")
+        context._features["animation"] = [vcr_controls, script]
+        script.text = _animation_controls.substitute(
             root_id=root.get("id"),
             frame_durations=json.dumps(durations.tolist()),
-            state_changes=json.dumps(changes, cls=_NumpyJSONEncoder))
-
-    if isinstance(fobj, toyplot.compatibility.string_type):
-        with open(fobj, "wb") as file:
-            file.write(xml.tostring(root, method="html"))
-    elif fobj is not None:
-        fobj.write(xml.tostring(root, method="html"))
+            state_changes=json.dumps({
+                "types": toyplot.canvas._AnimationChanges.types,
+                "marks": mark_ids,
+                "properties": canvas._animation.properties(),
+                "values": canvas._animation.values(),
+                "offsets": _delta_encode(numpy.searchsorted(changes["frame"], numpy.arange(frame_count + 1))),
+                "type": _delta_encode(changes["type"]),
+                "mark": _delta_encode(changes["mark"]),
+                "series": _delta_encode(changes["series"]),
+                "datum": _delta_encode(changes["datum"]),
+                "property": _delta_encode(changes["property"]),
+                "value": _delta_encode(changes["value"]),
+                }, cls=_NumpyJSONEncoder, sort_keys=True))
+
+    if fobj is not None:
+        context.serializer.close()
     else:
         if animation:
-            return root, svg_animation
+            return root, _animation_changes(times[:-1], changes, mark_ids, canvas._animation.properties(), canvas._animation.values())
         return root
 
 
+def size_report(canvas, precision=None, relative_paths=None):
+    """Report how much of the HTML representation of a canvas is produced by each of its parts.
+
+    The canvas is rendered as if by :func:`render`, and every byte of the
+    output is attributed to exactly one axes, mark, or document feature, so
+    the sizes always add up to the total.  Use the report to find out why a
+    figure is large, or to enforce size budgets in automated tests.
+
+    Parameters
+    ----------
+    canvas: :class:`toyplot.canvas.Canvas`
+      The canvas to be rendered.
+
+    precision: integer, optional
+      See :func:`render`.
+
+    relative_paths: boolean, optional
+      See :func:`render`.
+
+    Returns
+    -------
+    report: dict
+      The "total" size of the HTML markup in bytes; "objects", a list of
+      dicts containing the "type", "id", "parent" id (or `None` for the
+      canvas), and "bytes" of each axes and mark, excluding any axes or marks
+      that they contain; "features", a dict containing the bytes used by the
+      "data tables", "mouse coordinates", "animation", "controls", and "style
+      classes" features, plus the rest of the "document"; and "styles", the
+      bytes used by inline style attributes, which are already included in
+      the other sizes.
+
+    Examples
+    --------
+    >>> report = toyplot.html.size_report(canvas)
+    >>> assert report["total"] < 1000000
+    >>> for item in sorted(report["objects"], key=lambda item: -item["bytes"]):
+    ...   print(item["type"], item["bytes"])
+    """
+    canvas.autorender(False)
+    context = _RenderContext()
+    with _formatting_numbers(precision, relative_paths):
+        root = _render_html(canvas, None, False, context)
+
+    elements = dict([(element.get("id"), element) for element in root.iter() if element.get("id") is not None])
+    blocks = collections.OrderedDict()
+
+    def add_objects(parent, parent_id):
+        for child in getattr(parent, "_children", []):
+            element = elements.get(context._id_cache.get(id(child)))
+            if element is None:
+                add_objects(child, parent_id)
+                continue
+            blocks[element] = {
+                "type": "%s.%s" % (type(child).__module__, type(child).__name__),
+                "id": element.get("id"),
+                "parent": parent_id,
+                "bytes": 0,
+                }
+            add_objects(child, element.get("id"))
+    add_objects(canvas, None)
+
+    features = collections.OrderedDict([(name, {"bytes": 0}) for name in ["data tables", "mouse coordinates", "animation", "controls", "style classes"]])
+    for name, feature_elements in context._features.items():
+        for element in feature_elements:
+            blocks[element] = features[name]
+
+    document = {"bytes": len(xml.tostring(root, method="html"))}
+    total = document["bytes"]
+
+    # Attribute the markup for each block to it, and remove it from the block that contains it.
+    def attribute(element, owner):
+        for child in element:
+            block = blocks.get(child)
+            if block is None:
+                attribute(child, owner)
+                continue
+            size = len(xml.tostring(child, method="html"))
+            block["bytes"] += size
+            owner["bytes"] -= size
+            attribute(child, block)
+    attribute(root, document)
+
+    styles = 0
+    for element in root.iter():
+        style = element.get("style")
+        if style is not None:
+            styles += len(' style=""') + len(style.replace("&", "&amp;").replace(">", "&gt;").replace("\"", "&quot;"))
+
+    report_features = dict([(name, feature["bytes"]) for name, feature in features.items()])
+    report_features["document"] = document["bytes"]
+    return {
+        "total": total,
+        "objects": [block for block in blocks.values() if "type" in block],
+        "features": report_features,
+        "styles": styles,
+        }
+
+
+def _delta_encode(column):
+    """Return the differences between consecutive integers, for compact JSON."""
+    return numpy.diff(numpy.concatenate(([0], column)).astype("int64")).tolist()
+
+
+def _animation_changes(times, changes, mark_ids, properties, values):
+    """Convert columnar animation changes into lists of changes for each frame.
+
+    Consecutive changes to the style of the same mark or datum are merged.
+    """
+    result = dict([(time, {}) for time in times])
+    previous = None
+    for frame, change_type, mark, series, datum, property, value in zip(*[
+            changes[name].tolist() for name in ["frame", "type", "mark", "series", "datum", "property", "value"]]):
+        change_type = toyplot.canvas._AnimationChanges.types[change_type]
+        frame_changes = result[times[frame]].setdefault(change_type, [])
+        key = (frame, change_type, mark, series, datum)
+        if change_type == "set-datum-text":
+            frame_changes.append([mark_ids[mark], series, datum, values[value]])
+            key = None
+        elif key != previous:
+            if change_type == "set-mark-style":
+                frame_changes.append([mark_ids[mark], {}])
+            else:
+                frame_changes.append([mark_ids[mark], series, datum, {}])
+        if key is not None:
+            frame_changes[-1][-1][properties[property]] = values[value]
+        previous = key
+    return result
+
+
+def _create_svg(canvas, context):
+    """Create the top-level SVG element for a canvas."""
+    svg = xml.Element(
+        "svg",
+        xmlns="http://www.w3.org/2000/svg",
+        attrib={"xmlns:toyplot": "http://www.sandia.gov/toyplot"},
+        width=_format_number(canvas.width) + "px",
+        height=_format_number(canvas.height) + "px",
+        viewBox="0 0 %s %s" % (_format_number(canvas.width), _format_number(canvas.height)),
+        preserveAspectRatio="xMidYMid meet",
+        style=_css_style(canvas._style),
+        id=context.get_id(canvas))
+    if toyplot.config.marker_symbols:
+        svg.set("xmlns:xlink", "http://www.w3.org/1999/xlink")
+    return svg
+
+
+def _encode_data_table_column(column, encoding):
+    """Encode a data table column for embedding in HTML markup.
+
+    Parameters
+    ----------
+    column: :class:`numpy.ndarray` or :class:`numpy.ma.MaskedArray`
+      The column to be encoded.
+    encoding: "json", "binary", or "deflate"
+      If "json", the column is encoded as a JSON list.  Otherwise, numeric
+      columns are encoded as base64 typed arrays (with a separate mask array
+      for missing values), compressed if "deflate".  Columns that can't be
+      represented by a JavaScript typed array always use JSON.
+
+    Returns
+    -------
+    column: JSON-compatible data structure
+    """
+    if encoding not in ["json", "binary", "deflate"]:
+        raise ValueError("Unknown data table encoding: %s" % encoding)
+
+    data = numpy.ma.getdata(column)
+    if encoding == "json" or data.dtype.kind not in "biuf":
+        if data.dtype.kind == "f" and data.dtype.itemsize < 8:
+            # Use the shortest decimal that identifies each value at the column's precision.
+            return [None if masked else float(str(value)) for value, masked in zip(data, numpy.ma.getmaskarray(column))]
+        return column.tolist()
+
+    if data.dtype.itemsize == 8 and data.dtype.kind in "iu":
+        if not len(data) or (data.min() >= -2**31 and data.max() < 2**31):
+            data = data.astype("int32")
+        elif data.min() >= -2**53 and data.max() <= 2**53:
+            data = data.astype("float64")
+        else:
+            return column.tolist()
+
+    # JavaScript has no typed array for these, so use the nearest one that can represent every value.
+    data = data.astype(_encode_data_table_column.upcasts.get(data.dtype.str[1:], data.dtype))
+    if data.dtype.str[1:] not in _encode_data_table_column.types:
+        return column.tolist()
+
+    def encode(array):
+        array = array.tobytes()
+        if encoding == "deflate":
+            array = zlib.compress(array)
+        return base64.b64encode(array).decode("ascii")
+
+    data = data.astype(data.dtype.newbyteorder("<"))
+    result = {
+        "type": _encode_data_table_column.types[data.dtype.str[1:]],
+        "compressed": encoding == "deflate",
+        "data": encode(data),
+        }
+    if column.dtype.kind == "b":
+        result["boolean"] = True
+    mask = numpy.ma.getmaskarray(column)
+    if mask.any():
+        result["mask"] = encode(mask.astype("uint8"))
+    return result
+
+_encode_data_table_column.upcasts = {
+    "b1": "u1",
+    "f2": "f4",
+    "f12": "f8",
+    "f16": "f8",
+    }
+
+_encode_data_table_column.types = {
+    "f4": "Float32Array",
+    "f8": "Float64Array",
+    "i1": "Int8Array",
+    "i2": "Int16Array",
+    "i4": "Int32Array",
+    "u1": "Uint8Array",
+    "u2": "Uint16Array",
+    "u4": "Uint32Array",
+    }
+
+
+def _render_svg(canvas, svg, context):
+    """Render the contents of a canvas into its top-level SVG element."""
+    for child in canvas._children:
+        with toyplot.profile._phase("render", child, svg if isinstance(child, toyplot.mark.Mark) else None):
+            _render(canvas, child, context.copy(root=svg))
+        context.flush(svg)
+
+    if context.style_classes is not None and len(context.style_classes):
+        style = xml.SubElement(svg, "style", type="text/css")
+        style.text = context.style_classes.css("#" + svg.get("id"))
+        context._features["style classes"] = [style]
+        context.flush(svg)
+
+
+def _stream_svg(canvas, stream, precision=None, relative_paths=None, id_prefix=None):
+    """Write the SVG representation of a canvas to a stream as it's rendered."""
+    canvas.autorender(False)
+
+    context = _RenderContext(ids=_element_ids(canvas, id_prefix))
+    with _formatting_numbers(precision, relative_paths):
+        svg = _create_svg(canvas, context)
+        context.serializer = _StreamingSerializer(svg, stream, method="xml")
+        _render_svg(canvas, svg, context)
+    context.serializer.close()
+
+
+class _CSSColor(str):
+    """The CSS rgba() string for a Toyplot color, already split into rgb() and alpha.
+
+    Compares equal to the string returned by :func:`toyplot.color.to_css`,
+    but :func:`_color_fixup` uses its `rgb` and `alpha` attributes instead of
+    parsing it.  Use :func:`_css_colors` to convert arrays of colors.
+    """
+    def __new__(cls, color):
+        rgb = "%.3g%%,%.3g%%,%.3g%%" % (color["r"] * 100, color["g"] * 100, color["b"] * 100)
+        alpha = "%.3g" % color["a"]
+        self = str.__new__(cls, "rgba(%s,%s)" % (rgb, alpha))
+        self.rgb = "rgb(%s)" % rgb
+        self.alpha = numpy.float64(alpha)
+        return self
+
+
+def _css_colors(colors):
+    """Convert an array of Toyplot colors to a list of :class:`_CSSColor`.
+
+    Each distinct color is only converted once.
+    """
+    unique, inverse = numpy.unique(numpy.ma.getdata(colors), return_inverse=True)
+    css = [_CSSColor(color) for color in unique]
+    return [css[index] for index in inverse.tolist()]
+
+
 def _color_fixup(styles):
     """It turns-out that many applications and libraries (Inkscape, Adobe Illustrator, Qt)
     don't handle CSS rgba() colors correctly.  So convert them to CSS rgb colors and use
     fill-opacity / stroke-opacity instead."""
 
-    if "fill" in styles:
-        color = toyplot.color.css(styles["fill"])
-        if color is not None:
-            opacity = float(styles.get("fill-opacity", 1.0))
-            styles["fill"] = "rgb(%.3g%%,%.3g%%,%.3g%%)" % (
-                color["r"] * 100, color["g"] * 100, color["b"] * 100)
-            styles["fill-opacity"] = str(color["a"] * opacity)
-    if "stroke" in styles:
-        color = toyplot.color.css(styles["stroke"])
-        if color is not None:
-            opacity = float(styles.get("stroke-opacity", 1.0))
-            styles["stroke"] = "rgb(%.3g%%,%.3g%%,%.3g%%)" % (
-                color["r"] * 100, color["g"] * 100, color["b"] * 100)
-            styles["stroke-opacity"] = str(color["a"] * opacity)
+    for key in ["fill", "stroke"]:
+        if key not in styles:
+            continue
+        if isinstance(styles[key], _CSSColor):
+            rgb, alpha = styles[key].rgb, styles[key].alpha
+        else:
+            color = toyplot.color.css(styles[key])
+            if color is None:
+                continue
+            rgb = "rgb(%.3g%%,%.3g%%,%.3g%%)" % (color["r"] * 100, color["g"] * 100, color["b"] * 100)
+            alpha = color["a"]
+        opacity = float(styles.get(key + "-opacity", 1.0))
+        styles[key] = rgb
+        styles[key + "-opacity"] = str(alpha * opacity)
 
     return styles
 
@@ -755,15 +1342,300 @@ def _css_attrib(*styles):
     return attrib
 
 
+def _datum_attribs(key, colors, opacities, style, style_classes):
+    """Compute the "class" and "style" attributes of every datum in a mark, up front.
+
+    Datums with the same color and opacity share attributes, which are only
+    computed once.
+
+    Parameters
+    ----------
+    key: string
+      Style property that receives each datum color, "fill" or "stroke".
+    colors: array of :data:`toyplot.color.dtype`
+    opacities: array of numbers
+    style: dict
+      Mark style, combined with the style of every datum.
+    style_classes: :class:`_StyleClasses` or `None`
+
+    Returns
+    -------
+    attribs: list of (class, style) tuples, where style is `None` when it is
+      represented by a shared CSS class.
+    """
+    css = _css_colors(colors)
+    shared = {}
+    attribs = []
+    for index, value in enumerate(zip(css, numpy.ma.getdata(opacities).tolist())):
+        if value not in shared:
+            dstyle = toyplot.style.combine({key: css[index], "opacity": opacities[index]}, style)
+            if style_classes is None:
+                shared[value] = ("toyplot-Datum", _css_style(dstyle))
+            else:
+                shared[value] = (style_classes.add({"class": "toyplot-Datum"}, dstyle)["class"], None)
+        attribs.append(shared[value])
+    return attribs
+
+
+def _datum_xml(parent, tag, attrib, title):
+    """Add one datum element to `parent`, with an optional title."""
+    datum_xml = xml.SubElement(parent, tag, attrib=attrib)
+    if title is not None:
+        xml.SubElement(datum_xml, "title").text = str(title)
+    return datum_xml
+
+
+def _render_rects(parent, axis1, axis2, distance1, distance2, p1, p2, b1, b2, fill, opacity, title, style, style_classes):
+    """Render one rect per datum, computing all coordinates and styles up front."""
+    for (dclass, dstyle), dposition1, dposition2, ddistance1, ddistance2, dtitle in zip(
+            _datum_attribs("fill", fill, opacity, style, style_classes),
+            _format_numbers(numpy.minimum(p1, p2)),
+            _format_numbers(numpy.minimum(b1, b2)),
+            _format_numbers(numpy.abs(p1 - p2)),
+            _format_numbers(numpy.abs(b1 - b2)),
+            title,
+        ):
+        attrib = {
+            "class": dclass,
+            axis1: dposition1,
+            axis2: dposition2,
+            distance1: ddistance1,
+            distance2: ddistance2,
+            }
+        if dstyle is not None:
+            attrib["style"] = dstyle
+        _datum_xml(parent, "rect", attrib, dtitle)
+
+
+class _StyleClasses(object):
+    """Replaces identical inline styles with shared, generated CSS classes."""
+    def __init__(self):
+        self._names = {}
+        self._css_names = {}
+        self._rules = []
+
+    def __len__(self):
+        return len(self._rules)
+
+    def add(self, attrib, *styles):
+        """Add the class for the combination of `styles` to `attrib`."""
+        key = tuple([tuple(sorted(style.items())) if style else None for style in styles])
+        if key not in self._names:
+            css = _css_style(*styles)
+            if css and css not in self._css_names:
+                self._css_names[css] = "toyplot-s%s" % len(self._rules)
+                self._rules.append((self._css_names[css], css))
+            self._names[key] = self._css_names.get(css)
+
+        name = self._names[key]
+        if name is not None:
+            attrib["class"] = attrib["class"] + " " + name if "class" in attrib else name
+        return attrib
+
+    def css(self, scope):
+        """Return a stylesheet that defines every class within `scope`."""
+        return "".join(["%s .%s{%s}" % (scope, name, css) for name, css in self._rules])
+
+
+class _NumberFormat(threading.local):
+    """How numbers are written by the render in progress on the current thread."""
+    precision = None
+    relative_paths = False
+
+_number_format = _NumberFormat()
+
+
+@contextlib.contextmanager
+def _formatting_numbers(precision, relative_paths):
+    """Write numbers with the given precision and path style while rendering.
+
+    Parameters
+    ----------
+    precision: integer or `None`
+      Maximum number of digits after the decimal point.  Defaults to
+      :data:`toyplot.config.precision`.
+    relative_paths: boolean or `None`
+      If `True`, write path data using relative commands.  Defaults to
+      :data:`toyplot.config.relative_paths`.
+    """
+    if precision is None:
+        precision = toyplot.config.precision
+    if relative_paths is None:
+        relative_paths = toyplot.config.relative_paths
+    previous = (_number_format.precision, _number_format.relative_paths)
+    _number_format.precision, _number_format.relative_paths = precision, bool(relative_paths)
+    try:
+        yield
+    finally:
+        _number_format.precision, _number_format.relative_paths = previous
+
+
+def _format_decimal(value, precision):
+    """Format a number with at most `precision` digits after the decimal point."""
+    result = ("%.*f" % (precision, value)).rstrip("0").rstrip(".") if precision else "%.0f" % value
+    return "0" if result == "-0" else result
+
+
+def _format_number(value, default=repr):
+    """Format one coordinate, size, or transform parameter.
+
+    Uses the precision of the render in progress, or `default` if the
+    precision isn't limited.
+    """
+    if _number_format.precision is None:
+        return default(value)
+    return _format_decimal(value, _number_format.precision)
+
+
+def _relative_path(commands, x, y):
+    """Convert absolute path commands to relative commands, returning formatted coordinates."""
+    x = numpy.ma.getdata(x).ravel().astype("float64")
+    y = numpy.ma.getdata(y).ravel().astype("float64")
+    precision = _number_format.precision
+    if precision is not None:
+        # Work in integer multiples of the precision, so relative offsets don't accumulate rounding errors.
+        scale = 10 ** precision
+        x = numpy.round(x * scale)
+        y = numpy.round(y * scale)
+
+    # Each command is relative to the last point of the previous command.
+    starts = numpy.array([command is not None for command in commands])
+    segments = numpy.cumsum(starts) - 1
+    previous = numpy.flatnonzero(starts)[segments] - 1
+    first = segments == 0
+    x = numpy.where(first, x, x - x[previous])
+    y = numpy.where(first, y, y - y[previous])
+
+    relative = []
+    written = None
+    for command in commands:
+        if command is None:
+            relative.append(None)
+        elif written is None:
+            relative.append("M")
+            written = "M"
+        else:
+            command = command.lower()
+            relative.append(command if command != written or command == "m" else None)
+            written = command
+
+    if precision is None:
+        return relative, _format_numbers(x), _format_numbers(y)
+    return relative, _format_numbers(x / scale), _format_numbers(y / scale)
+
+
 def _flat_contiguous(a):
-    i = 0
-    result = []
-    for (k, g) in itertools.groupby(a.ravel()):
-        n = len(list(g))
-        if k:
-            result.append(slice(i, i + n))
-        i += n
-    return result
+    edges = numpy.flatnonzero(numpy.diff(numpy.concatenate(
+        ([False], numpy.asarray(a, dtype="bool").ravel(), [False])).astype("int8")))
+    return [slice(start, stop) for start, stop in zip(edges[0::2].tolist(), edges[1::2].tolist())]
+
+
+_trailing_zeros = re.compile(r"\.?0+(?= |$)")
+_negative_zero = re.compile(r"(?<![^ ])-0(?= |$)")
+
+
+def _format_numbers(a):
+    """Return the string representations of an array of numbers as a list.
+
+    Uses the precision of the render in progress, like :func:`_format_number`,
+    but formats every number with a single string operation.
+    """
+    values = numpy.ma.getdata(a).ravel().tolist()
+    if not values:
+        return []
+    precision = _number_format.precision
+    if precision is None:
+        # A list's repr contains the repr of each value.
+        return repr(values)[1:-1].split(", ")
+    text = " ".join(["%%.%sf" % precision] * len(values)) % tuple(values)
+    if precision:
+        text = _trailing_zeros.sub("", text)
+    return _negative_zero.sub("0", text).split(" ")
+
+
+def _segment_commands(mask):
+    """Return "M" and "L" path commands for the unmasked points in `mask`.
+
+    Each contiguous run of `True` values in `mask` becomes a separate subpath.
+    """
+    mask = numpy.asarray(mask, dtype="bool").ravel()
+    starts = numpy.logical_and(mask, numpy.invert(numpy.concatenate(([False], mask[:-1]))))
+    return numpy.where(starts[mask], "M", "L").tolist()
+
+
+def _decimate(position, values, mask, method):
+    """Choose the vertices of a line to render.
+
+    Returns the indices of the unmasked vertices to keep, and the matching "M"
+    and "L" path commands.  Contiguous runs of unmasked vertices are decimated
+    independently, so gaps in the data are preserved.  Runs that aren't
+    monotonic along `position`, or don't have more vertices than pixels to
+    draw them in, are left unchanged.
+
+    Parameters
+    ----------
+    position: array of numbers
+      Projected vertex coordinates along the independent axis.
+    values: array of numbers
+      Projected vertex coordinates along the dependent axis.
+    mask: array of booleans
+      `True` for vertices that should be rendered.
+    method: None, "minmax", or "lttb"
+      The decimation algorithm.  If `None`, every unmasked vertex is kept.
+    """
+    if method is None:
+        return numpy.flatnonzero(mask), _segment_commands(mask)
+    if method not in ["minmax", "lttb"]:
+        raise ValueError("Unknown decimation method: %s" % method)
+
+    position = numpy.ma.getdata(position).astype("float64")
+    values = numpy.ma.getdata(values).astype("float64")
+
+    indices = []
+    commands = []
+    for segment in _flat_contiguous(mask):
+        index = numpy.arange(segment.start, segment.stop)
+        steps = numpy.diff(position[segment])
+        if numpy.all(steps >= 0) or numpy.all(steps <= 0):
+            pixels = int(numpy.abs(position[segment.stop - 1] - position[segment.start])) + 1
+            if method == "minmax" and len(index) > 4 * pixels:
+                index = segment.start + toyplot.decimate.minmax(position[segment], values[segment])
+            elif method == "lttb" and len(index) > 2 * pixels:
+                index = segment.start + toyplot.decimate.lttb(position[segment], values[segment], 2 * pixels)
+        indices.append(index)
+        commands += ["M"] + ["L"] * (len(index) - 1)
+
+    if not indices:
+        return numpy.array([], dtype="int64"), []
+    return numpy.concatenate(indices), commands
+
+
+def _path_data(commands, x, y):
+    """Encode SVG path data from sequences of commands and point coordinates.
+
+    Parameters
+    ----------
+    commands: sequence of strings
+      One path command per point.  Use `None` for points that continue the
+      previous command, such as the control points of "Q" and "C" segments.
+    x, y: arrays of numbers
+      Point coordinates.
+    """
+    if _number_format.relative_paths and len(commands):
+        commands, x, y = _relative_path(commands, x, y)
+    else:
+        x = _format_numbers(x)
+        y = _format_numbers(y)
+    tokens = [None] * (3 * len(commands))
+    tokens[0::3] = commands
+    tokens[1::3] = x
+    tokens[2::3] = y
+    return " ".join([token for token in tokens if token is not None])
+
+
+def _polygon_points(x, y):
+    """Encode SVG polygon points from arrays of coordinates."""
+    return " ".join([xi + "," + yi for xi, yi in zip(_format_numbers(x), _format_numbers(y))])
 
 
 #def indent(elem, level=0):
@@ -817,7 +1689,7 @@ class _HTMLParser(HTMLParser.HTMLParser):
                 global_state["current-y"] = new_y
             tspan = xml.SubElement(self._element, "tspan")
             for key, value in attributes.items():
-                tspan.set(key, str(value))
+                tspan.set(key, _format_number(value, str))
             tspan.set("style", _css_style(style))
             tspan.text = node.text
         else:
@@ -901,11 +1773,11 @@ def _draw_text(
 
     x += toyplot.units.convert(style.pop("-toyplot-anchor-shift", 0), target="px", default="px")
 
-    transform = "translate(%r,%r)" % (x, y)
+    transform = "translate(%s,%s)" % (_format_number(x), _format_number(y))
     if angle:
-        transform += "rotate(%r)" % angle
+        transform += "rotate(%s)" % _format_number(angle)
     if baseline_shift:
-        transform += "translate(0,%r)" % baseline_shift
+        transform += "translate(0,%s)" % _format_number(baseline_shift)
 
     text_xml = xml.SubElement(
         root,
@@ -917,9 +1789,10 @@ def _draw_text(
     if title is not None:
         xml.SubElement(text_xml, "title").text = str(title)
 
-    parser = _HTMLParser(text_xml, font_size)
-    parser.feed(text)
-    parser.close()
+    with toyplot.profile._phase("text"):
+        parser = _HTMLParser(text_xml, font_size)
+        parser.feed(text)
+        parser.close()
 
 
 def _draw_marker(
@@ -931,7 +1804,9 @@ def _draw_marker(
         marker_style=None,
         label_style=None,
         extra_class=None,
-        title=None):
+        title=None,
+        symbols=None,
+        style_classes=None):
     if marker is None:
         return
     if isinstance(marker, toyplot.compatibility.string_type):
@@ -947,77 +1822,96 @@ def _draw_marker(
         shape = variation[0]
         shape_angle += variation[1]
 
-    attrib = _css_attrib(marker_style, shape_style)
-    if extra_class is not None:
-        attrib["class"] = extra_class
+    if style_classes is None:
+        attrib = _css_attrib(marker_style, shape_style)
+        if extra_class is not None:
+            attrib["class"] = extra_class
+    else:
+        attrib = {"class": extra_class} if extra_class is not None else {}
+        style_classes.add(attrib, marker_style, shape_style)
+
+    if symbols is not None:
+        attrib["xlink:href"] = "#" + symbols.get_id(
+            size,
+            shape,
+            shape_angle,
+            shape_label,
+            label_style,
+            shape_label_style)
+        attrib["x"] = _format_number(cx)
+        attrib["y"] = _format_number(cy)
+        marker_xml = xml.SubElement(root, "use", attrib=attrib)
+        if title is not None:
+            xml.SubElement(marker_xml, "title").text = str(title)
+        return marker_xml
+
     marker_xml = xml.SubElement(root, "g", attrib=attrib)
     if title is not None:
         xml.SubElement(marker_xml, "title").text = str(title)
+    _draw_marker_shape(marker_xml, cx, cy, size, shape, shape_angle)
+    _draw_marker_label(marker_xml, cx, cy, size, shape_label, label_style, shape_label_style)
+    return marker_xml
+
+_draw_marker.variations = {"-": ("|", 90), "x": ("+", 45), "v": ("^", 180), "<": (
+    "^", -90), ">": ("^", 90), "d": ("s", 45), "o-": ("o|", 90), "ox": ("o+", 45)}
+
+
+def _rotation(angle, cx, cy):
+    """Format an SVG rotate() transform."""
+    return "rotate(%s, %s, %s)" % (_format_number(angle), _format_number(cx), _format_number(cy))
+
+
+def _draw_marker_shape(marker_xml, cx, cy, size, shape, shape_angle):
     if shape == "|":
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
     elif shape == "+":
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx - (size / 2)),
-                       x2=repr(cx + (size / 2)),
-                       y1=repr(cy),
-                       y2=repr(cy))
+                       transform=_rotation(-shape_angle, cx, cy),
+                       x1=_format_number(cx - (size / 2)),
+                       x2=_format_number(cx + (size / 2)),
+                       y1=_format_number(cy),
+                       y2=_format_number(cy))
     elif shape == "*":
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle + 60,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle + 60, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle - 60,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle - 60, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
     elif shape == "^":
         xml.SubElement(marker_xml,
                        "polygon",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       points=" ".join(["%r,%r" % (xp,
-                                                   yp) for xp,
+                       transform=_rotation(-shape_angle, cx, cy),
+                       points=" ".join([_format_number(xp) + "," + _format_number(yp) for xp,
                                         yp in [(cx - (size / 2),
                                                 cy + (size / 2)),
                                                (cx,
@@ -1027,84 +1921,70 @@ def _draw_marker(
     elif shape == "s":
         xml.SubElement(marker_xml,
                        "rect",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       x=repr(cx - (size / 2)),
-                       y=repr(cy - (size / 2)),
-                       width=repr(size),
-                       height=repr(size))
+                       transform=_rotation(-shape_angle, cx, cy),
+                       x=_format_number(cx - (size / 2)),
+                       y=_format_number(cy - (size / 2)),
+                       width=_format_number(size),
+                       height=_format_number(size))
     elif shape == "o":
         xml.SubElement(
-            marker_xml, "circle", cx=repr(cx), cy=repr(cy), r=repr(size / 2))
+            marker_xml, "circle", cx=_format_number(cx), cy=_format_number(cy), r=_format_number(size / 2))
     elif shape == "oo":
         xml.SubElement(
-            marker_xml, "circle", cx=repr(cx), cy=repr(cy), r=repr(size / 2))
+            marker_xml, "circle", cx=_format_number(cx), cy=_format_number(cy), r=_format_number(size / 2))
         xml.SubElement(
-            marker_xml, "circle", cx=repr(cx), cy=repr(cy), r=repr(size / 4))
+            marker_xml, "circle", cx=_format_number(cx), cy=_format_number(cy), r=_format_number(size / 4))
     elif shape == "o|":
         xml.SubElement(
-            marker_xml, "circle", cx=repr(cx), cy=repr(cy), r=repr(size / 2))
+            marker_xml, "circle", cx=_format_number(cx), cy=_format_number(cy), r=_format_number(size / 2))
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
     elif shape == "o+":
         xml.SubElement(
-            marker_xml, "circle", cx=repr(cx), cy=repr(cy), r=repr(size / 2))
+            marker_xml, "circle", cx=_format_number(cx), cy=_format_number(cy), r=_format_number(size / 2))
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx - (size / 2)),
-                       x2=repr(cx + (size / 2)),
-                       y1=repr(cy),
-                       y2=repr(cy))
+                       transform=_rotation(-shape_angle, cx, cy),
+                       x1=_format_number(cx - (size / 2)),
+                       x2=_format_number(cx + (size / 2)),
+                       y1=_format_number(cy),
+                       y2=_format_number(cy))
     elif shape == "o*":
         xml.SubElement(
-            marker_xml, "circle", cx=repr(cx), cy=repr(cy), r=repr(size / 2))
+            marker_xml, "circle", cx=_format_number(cx), cy=_format_number(cy), r=_format_number(size / 2))
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle + 60,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle + 60, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
         xml.SubElement(marker_xml,
                        "line",
-                       transform="rotate(%r, %r, %r)" % (-shape_angle - 60,
-                                                         cx,
-                                                         cy),
-                       x1=repr(cx),
-                       x2=repr(cx),
-                       y1=repr(cy - (size / 2)),
-                       y2=repr(cy + (size / 2)))
+                       transform=_rotation(-shape_angle - 60, cx, cy),
+                       x1=_format_number(cx),
+                       x2=_format_number(cx),
+                       y1=_format_number(cy - (size / 2)),
+                       y2=_format_number(cy + (size / 2)))
 # Removing support for custom shapes
 #    elif shape == "path":
 #        shape_path = marker.get("path")
@@ -1112,6 +1992,8 @@ def _draw_marker(
 #            marker_xml, "path", transform="translate(%r, %r) scale(%r) translate(%r, %r)" %
 #            (cx, cy, size, -cx, -cy), d="M " + repr(cx) + " " + repr(cy) + shape_path)
 
+
+def _draw_marker_label(marker_xml, cx, cy, size, shape_label, label_style, shape_label_style):
     if shape_label: # Not technically necessary, but we should avoid computing the style for every marker if we don't have to.
         _draw_text(
             root=marker_xml,
@@ -1129,10 +2011,43 @@ def _draw_marker(
                 label_style,
                 shape_label_style),
             )
-    return marker_xml
 
-_draw_marker.variations = {"-": ("|", 90), "x": ("+", 45), "v": ("^", 180), "<": (
-    "^", -90), ">": ("^", 90), "d": ("s", 45), "o-": ("o|", 90), "ox": ("o+", 45)}
+
+class _MarkerSymbols(object):
+    """Shares marker geometry between the datums of a mark.
+
+    Each distinct combination of marker shape, angle, size, and label is drawn
+    once into a <defs> element, centered on the origin, so that individual
+    datums can be rendered as <use> elements that reference it.
+    """
+    def __init__(self, root, ids):
+        self._root = root
+        self._element_ids = ids
+        self._defs = None
+        self._ids = {}
+
+    def get_id(self, size, shape, shape_angle, shape_label, label_style, shape_label_style):
+        """Return the id of the symbol for the given marker, creating it if necessary."""
+        key = (size, shape, shape_angle, shape_label)
+        if shape_label:
+            key += (_css_style(label_style, shape_label_style),)
+        if key not in self._ids:
+            if self._defs is None:
+                self._defs = xml.Element("defs")
+                self._root.insert(0, self._defs)
+            symbol_id = self._element_ids()
+            symbol_xml = xml.SubElement(self._defs, "g", id=symbol_id)
+            _draw_marker_shape(symbol_xml, 0, 0, size, shape, shape_angle)
+            _draw_marker_label(symbol_xml, 0, 0, size, shape_label, label_style, shape_label_style)
+            self._ids[key] = symbol_id
+        return self._ids[key]
+
+
+def _marker_symbols(root, context):
+    """Return a symbol table for the markers in `root`, if enabled."""
+    if toyplot.config.marker_symbols:
+        return _MarkerSymbols(root, context.ids)
+    return None
 
 
 def _rotated_frame(x1, y1, x2, y2, offset):
@@ -1140,7 +2055,8 @@ def _rotated_frame(x1, y1, x2, y2, offset):
     basis = p[1] - p[0]
     length = numpy.linalg.norm(basis)
     theta = numpy.rad2deg(numpy.arctan2(basis[1], basis[0]))
-    transform="translate(%s,%s) rotate(%s) translate(0,%s)" % (p[0][0], p[0][1], theta, offset)
+    transform="translate(%s,%s) rotate(%s) translate(0,%s)" % tuple(
+        [_format_number(value, str) for value in (p[0][0], p[0][1], theta, offset)])
     return transform, length
 
 
@@ -1162,7 +2078,8 @@ def _render(canvas, axis, context):
             context.root,
             "g",
             id=context.get_id(axis),
-            transform="translate(%s,%s) rotate(%s) translate(%s,%s)" % (p[0][0], p[0][1], theta, 0, context.offset),
+            transform="translate(%s,%s) rotate(%s) translate(%s,%s)" % tuple(
+                [_format_number(value, str) for value in (p[0][0], p[0][1], theta, 0, context.offset)]),
             attrib={"class": "toyplot-axes-Axis"},
             )
 
@@ -1177,10 +2094,10 @@ def _render(canvas, axis, context):
             xml.SubElement(
                 axis_xml,
                 "line",
-                x1=repr(x1),
-                y1=repr(0),
-                x2=repr(x2),
-                y2=repr(0),
+                x1=_format_number(x1),
+                y1=_format_number(0),
+                x2=_format_number(x2),
+                y2=_format_number(0),
                 style=_css_style(
                     axis.spine._style))
 
@@ -1197,10 +2114,10 @@ def _render(canvas, axis, context):
                     xml.SubElement(
                         ticks_group,
                         "line",
-                        x1=repr(x),
-                        y1=repr(y1),
-                        x2=repr(x),
-                        y2=repr(y2),
+                        x1=_format_number(x),
+                        y1=_format_number(y1),
+                        x2=_format_number(x),
+                        y2=_format_number(y2),
                         style=_css_style(
                             axis.ticks._style,
                             tick_style))
@@ -1246,7 +2163,8 @@ def _render(canvas, axis, context):
 
 @dispatch(toyplot.canvas.Canvas, toyplot.axes.NumberLine, _RenderContext)
 def _render(canvas, axes, context):
-    axes._finalize()
+    with toyplot.profile._phase("finalize"):
+        axes._finalize()
 
     axes_xml = xml.SubElement(context.root, "g", id=context.get_id(
         axes), attrib={"class": "toyplot-axes-NumberLine"})
@@ -1258,7 +2176,9 @@ def _render(canvas, axes, context):
         )
 
     for child in axes._children:
-        _render(axes, child, context.copy(root=children_xml))
+        with toyplot.profile._phase("render", child, children_xml if isinstance(child, toyplot.mark.Mark) else None):
+            _render(axes, child, context.copy(root=children_xml))
+        context.flush(children_xml)
 
     _render(canvas, axes.axis, context.copy(
         root=axes_xml,
@@ -1299,11 +2219,11 @@ def _render(numberline, colormap, context):
         xml.SubElement(
             mark_xml,
             "rect",
-            x=repr(x1),
-            y=repr(-width * 0.5),
-            width=repr(x2 - x1),
-            height=repr(width),
-            style=_css_style({"stroke": "none", "fill": toyplot.color.to_css(color)}),
+            x=_format_number(x1),
+            y=_format_number(-width * 0.5),
+            width=_format_number(x2 - x1),
+            height=_format_number(width),
+            style=_css_style({"stroke": "none", "fill": _CSSColor(color)}),
             )
 
     style = toyplot.style.combine(
@@ -1314,10 +2234,10 @@ def _render(numberline, colormap, context):
     xml.SubElement(
         mark_xml,
         "rect",
-        x=repr(colormap_range_min),
-        y=repr(-width * 0.5),
-        width=repr(colormap_range_max - colormap_range_min),
-        height=repr(width),
+        x=_format_number(colormap_range_min),
+        y=_format_number(-width * 0.5),
+        width=_format_number(colormap_range_max - colormap_range_min),
+        height=_format_number(width),
         style=_css_style(style),
         )
 
@@ -1346,11 +2266,11 @@ def _render(numberline, colormap, context):
     gradient_xml = xml.SubElement(
         defs_xml,
         "linearGradient",
-        id="t" + uuid.uuid4().hex,
-        x1=repr(colormap_range_min),
-        x2=repr(colormap_range_max),
-        y1=repr(0),
-        y2=repr(0),
+        id=context.ids(),
+        x1=_format_number(colormap_range_min),
+        x2=_format_number(colormap_range_max),
+        y1=_format_number(0),
+        y2=_format_number(0),
         gradientUnits="userSpaceOnUse",
         )
 
@@ -1377,10 +2297,10 @@ def _render(numberline, colormap, context):
     xml.SubElement(
         mark_xml,
         "rect",
-        x=repr(colormap_range_min),
-        y=repr(-width * 0.5),
-        width=repr(colormap_range_max - colormap_range_min),
-        height=repr(width),
+        x=_format_number(colormap_range_min),
+        y=_format_number(-width * 0.5),
+        width=_format_number(colormap_range_max - colormap_range_min),
+        height=_format_number(width),
         style=_css_style(style),
         )
 
@@ -1401,6 +2321,17 @@ def _render(numberline, mark, context):
     dimension1 = numpy.ma.column_stack([mark._table[key] for key in mark._coordinates])
     projection = numberline.axis.projection(range_min=0, range_max=length)
     X = projection(dimension1)
+
+    if _rasterize(mark, X.count()):
+        # The bitmap covers the number line, and the largest markers.
+        extent = max([numpy.max(mark._table[key]) for key in mark._msize if len(mark._table[key])] + [0]) / 2 + 1
+        left = int(numpy.floor(-extent))
+        top = int(numpy.floor(-extent))
+        bounds = (left, top, int(numpy.ceil(length + extent)) - left, int(numpy.ceil(extent)) - top)
+        _draw_raster_scatterplot(mark, X, numpy.ma.zeros(X.shape), bounds, mark_xml)
+        return
+
+    symbols = _marker_symbols(mark_xml, context)
     for x, marker, msize, mfill, mstroke, mopacity, mtitle in zip(
             X.T,
             [mark._table[key] for key in mark._marker],
@@ -1418,15 +2349,15 @@ def _render(numberline, mark, context):
                 x[not_null],
                 marker[not_null],
                 msize[not_null],
-                mfill[not_null],
-                mstroke[not_null],
+                _css_colors(mfill[not_null]),
+                _css_colors(mstroke[not_null]),
                 mopacity[not_null],
                 mtitle[not_null],
             ):
             dstyle = toyplot.style.combine(
                 {
-                    "fill": toyplot.color.to_css(dfill),
-                    "stroke": toyplot.color.to_css(dstroke),
+                    "fill": dfill,
+                    "stroke": dstroke,
                     "opacity": dopacity,
                 },
                 mark._mstyle)
@@ -1440,24 +2371,100 @@ def _render(numberline, mark, context):
                 mark._mlstyle,
                 extra_class="toyplot-Datum",
                 title=dtitle,
+                symbols=symbols,
+                style_classes=context.style_classes,
                 )
 
 
+def _fragment_key(axes, mark, context):
+    """Return the state that determines the markup for a mark, or `None` if its markup can't be reused."""
+    table = getattr(mark, "_table", None)
+    if not toyplot.config.incremental_render or table is None or isinstance(mark, toyplot.mark.Legend):
+        return None
+    # Marks register their styles with the document when style classes are enabled.
+    if context.style_classes is not None:
+        return None
+    # Random ids have to be unique every time a canvas is rendered.
+    if context.ids._prefix is None:
+        return None
+    return (
+        table,
+        table._revision,
+        axes._xmin_range,
+        axes._xmax_range,
+        axes._ymin_range,
+        axes._ymax_range,
+        axes.padding,
+        [(axis.scale, axis._domain_min, axis._domain_max) for axis in (axes.x, axes.y)],
+        toyplot.config.decimation,
+        toyplot.config.marker_symbols,
+        _number_format.precision,
+        _number_format.relative_paths,
+        # Sequential ids must continue from the same point to be reused.
+        context.ids._prefix,
+        context.ids._count,
+        )
+
+
+def _copy_element(element):
+    """Return a deep copy of a DOM tree, faster than :func:`copy.deepcopy`."""
+    result = xml.Element(element.tag, element.attrib)
+    result.text = element.text
+    result.tail = element.tail
+    result.extend([_copy_element(child) for child in element])
+    return result
+
+
+def _render_mark(axes, mark, context):
+    """Render a mark, reusing the markup from its previous render if nothing it depends on has changed.
+
+    See :data:`toyplot.config.incremental_render`.
+    """
+    key = _fragment_key(axes, mark, context)
+    if key is None:
+        _render(axes, mark, context)
+        return
+
+    # The markup is stored on the mark, so it's discarded along with the mark.
+    fragment = getattr(mark, "_fragment", None)
+    if fragment is not None and fragment[0] == key:
+        key, elements, mark_id, data_tables, count = fragment
+        for element in elements:
+            context.root.append(_copy_element(element))
+        context._id_cache[id(mark)] = mark_id
+        for title, filename in data_tables:
+            context.add_data_table(mark, mark._table, title=title, filename=filename)
+        context.ids._count = count
+        return
+
+    start = len(context.root)
+    tables = len(context._data_tables)
+    _render(axes, mark, context)
+    mark._fragment = (
+        key,
+        [_copy_element(element) for element in context.root[start:]],
+        context._id_cache.get(id(mark)),
+        [(data_table["title"], data_table["filename"]) for data_table in context._data_tables[tables:]],
+        context.ids._count,
+        )
+
+
 @dispatch(toyplot.canvas.Canvas, toyplot.axes.Cartesian, _RenderContext)
 def _render(canvas, axes, context):
-    axes._finalize()
+    with toyplot.profile._phase("finalize"):
+        axes._finalize()
 
     axes_xml = xml.SubElement(context.root, "g", id=context.get_id(
         axes), attrib={"class": "toyplot-axes-Cartesian"})
 
-    clip_xml = xml.SubElement(axes_xml, "clipPath", id="t" + uuid.uuid4().hex)
+    clip_xml = xml.SubElement(axes_xml, "clipPath", id=context.ids())
     xml.SubElement(
         clip_xml,
         "rect",
-        x=repr(axes._xmin_range - axes.padding),
-        y=repr(axes._ymin_range - axes.padding),
-        width=repr(axes._xmax_range - axes._xmin_range + axes.padding * 2),
-        height=repr(axes._ymax_range - axes._ymin_range + axes.padding * 2),
+        x=_format_number(axes._xmin_range - axes.padding),
+        y=_format_number(axes._ymin_range - axes.padding),
+        width=_format_number(axes._xmax_range - axes._xmin_range + axes.padding * 2),
+        height=_format_number(axes._ymax_range - axes._ymin_range + axes.padding * 2),
         )
 
     children_xml = xml.SubElement(
@@ -1473,15 +2480,17 @@ def _render(canvas, axes, context):
     xml.SubElement(
         children_xml,
         "rect",
-        x=repr(axes._xmin_range - axes.padding),
-        y=repr(axes._ymin_range - axes.padding),
-        width=repr(axes._xmax_range - axes._xmin_range + axes.padding * 2),
-        height=repr(axes._ymax_range - axes._ymin_range + axes.padding * 2),
+        x=_format_number(axes._xmin_range - axes.padding),
+        y=_format_number(axes._ymin_range - axes.padding),
+        width=_format_number(axes._xmax_range - axes._xmin_range + axes.padding * 2),
+        height=_format_number(axes._ymax_range - axes._ymin_range + axes.padding * 2),
         style=_css_style({"visibility": "hidden", "pointer-events": "all"}),
         )
 
     for child in axes._children:
-        _render(axes, child, context.copy(root=children_xml))
+        with toyplot.profile._phase("render", child, children_xml):
+            _render_mark(axes, child, context.copy(root=children_xml))
+        context.flush(children_xml)
 
     if axes.coordinates._show:
         context.add_cartesian_axes(axes)
@@ -1490,14 +2499,14 @@ def _render(canvas, axes, context):
         xml.SubElement(
             coordinates_xml,
             "rect",
-            x=repr(
+            x=_format_number(
                 axes.coordinates._xmin_range),
-            y=repr(
+            y=_format_number(
                 axes.coordinates._ymin_range),
-            width=repr(
+            width=_format_number(
                 axes.coordinates._xmax_range -
                 axes.coordinates._xmin_range),
-            height=repr(
+            height=_format_number(
                 axes.coordinates._ymax_range -
                 axes.coordinates._ymin_range),
             style=_css_style(
@@ -1505,9 +2514,9 @@ def _render(canvas, axes, context):
         xml.SubElement(
             coordinates_xml,
             "text",
-            x=repr(
+            x=_format_number(
                 (axes.coordinates._xmin_range + axes.coordinates._xmax_range) * 0.5),
-            y=repr(
+            y=_format_number(
                 (axes.coordinates._ymin_range + axes.coordinates._ymax_range) * 0.5),
             style=_css_style(
                 axes.coordinates.label._style))
@@ -1594,7 +2603,8 @@ def _render(canvas, axes, context):
 
 @dispatch(toyplot.canvas.Canvas, toyplot.axes.Table, _RenderContext)
 def _render(canvas, axes, context):
-    axes._finalize()
+    with toyplot.profile._phase("finalize"):
+        axes._finalize()
 
     axes_xml = xml.SubElement(context.root, "g", id=context.get_id(
         axes), attrib={"class": "toyplot-axes-Table"})
@@ -1610,7 +2620,9 @@ def _render(canvas, axes, context):
 
     # Render children.
     for child in axes._children:
-        _render(axes._parent, child, context.copy(root=axes_xml))
+        with toyplot.profile._phase("render", child, axes_xml if isinstance(child, toyplot.mark.Mark) else None):
+            _render(axes._parent, child, context.copy(root=axes_xml))
+        context.flush(axes_xml)
 
     # Render visible cells.
     for cell in axes._visible_cells:
@@ -1618,14 +2630,14 @@ def _render(canvas, axes, context):
             cell_xml = xml.SubElement(
                 axes_xml,
                 "rect",
-                x=repr(
+                x=_format_number(
                     cell.left),
-                y=repr(
+                y=_format_number(
                     cell.top),
-                width=repr(
+                width=_format_number(
                     cell.right -
                     cell.left),
-                height=repr(
+                height=_format_number(
                     cell.bottom -
                     cell.top),
                 style=_css_style(
@@ -1726,36 +2738,36 @@ def _render(canvas, axes, context):
                 xml.SubElement(
                     axes_xml,
                     "line",
-                    x1=repr(column_boundaries[start]),
-                    y1=repr(y),
-                    x2=repr(column_boundaries[end]),
-                    y2=repr(y),
+                    x1=_format_number(column_boundaries[start]),
+                    y1=_format_number(y),
+                    x2=_format_number(column_boundaries[end]),
+                    y2=_format_number(y),
                     style=_css_style(axes._gstyle),
                     )
             elif line_type == "double":
                 xml.SubElement(
                     axes_xml,
                     "line",
-                    x1=repr(
+                    x1=_format_number(
                         column_boundaries[start]),
-                    y1=repr(
+                    y1=_format_number(
                         y - separation),
-                    x2=repr(
+                    x2=_format_number(
                         column_boundaries[end]),
-                    y2=repr(
+                    y2=_format_number(
                         y - separation),
                     style=_css_style(
                         axes._gstyle))
                 xml.SubElement(
                     axes_xml,
                     "line",
-                    x1=repr(
+                    x1=_format_number(
                         column_boundaries[start]),
-                    y1=repr(
+                    y1=_format_number(
                         y + separation),
-                    x2=repr(
+                    x2=_format_number(
                         column_boundaries[end]),
-                    y2=repr(
+                    y2=_format_number(
                         y + separation),
                     style=_css_style(
                         axes._gstyle))
@@ -1769,29 +2781,29 @@ def _render(canvas, axes, context):
                 xml.SubElement(
                     axes_xml,
                     "line",
-                    x1=repr(x),
-                    y1=repr(row_boundaries[start]),
-                    x2=repr(x),
-                    y2=repr(row_boundaries[end]),
+                    x1=_format_number(x),
+                    y1=_format_number(row_boundaries[start]),
+                    x2=_format_number(x),
+                    y2=_format_number(row_boundaries[end]),
                     style=_css_style(axes._gstyle),
                     )
             elif line_type == "double":
                 xml.SubElement(
                     axes_xml,
                     "line",
-                    x1=repr(x - separation),
-                    y1=repr(row_boundaries[start]),
-                    x2=repr(x - separation),
-                    y2=repr(row_boundaries[end]),
+                    x1=_format_number(x - separation),
+                    y1=_format_number(row_boundaries[start]),
+                    x2=_format_number(x - separation),
+                    y2=_format_number(row_boundaries[end]),
                     style=_css_style(axes._gstyle),
                     )
                 xml.SubElement(
                     axes_xml,
                     "line",
-                    x1=repr(x + separation),
-                    y1=repr(row_boundaries[start]),
-                    x2=repr(x + separation),
-                    y2=repr(row_boundaries[end]),
+                    x1=_format_number(x + separation),
+                    y1=_format_number(row_boundaries[start]),
+                    x2=_format_number(x + separation),
+                    y2=_format_number(row_boundaries[end]),
                     style=_css_style(axes._gstyle),
                     )
 
@@ -1844,33 +2856,22 @@ def _render(axes, mark, context):
 
         series_xml = xml.SubElement(
             mark_xml, "g", attrib={"class": "toyplot-Series"})
-        for dleft, dright, dboundary1, dboundary2, dfill, dopacity, dtitle in zip(
-                left[not_null],
-                right[not_null],
-                boundary1[not_null],
-                boundary2[not_null],
-                fill[not_null],
-                opacity[not_null],
-                title[not_null],
-            ):
-            dstyle = toyplot.style.combine({
-                "fill": toyplot.color.to_css(dfill),
-                "opacity": dopacity,
-                }, mark._style)
-            datum_xml = xml.SubElement(
-                series_xml,
-                "rect",
-                attrib={
-                    "class": "toyplot-Datum",
-                    axis1: repr(min(dleft, dright)),
-                    axis2: repr(min(dboundary1, dboundary2)),
-                    distance1: repr(numpy.abs(dleft - dright)),
-                    distance2: repr(numpy.abs(dboundary1 - dboundary2)),
-                    },
-                style=_css_style(dstyle),
-                )
-            if dtitle is not None:
-                xml.SubElement(datum_xml, "title").text = str(dtitle)
+        _render_rects(
+            series_xml,
+            axis1,
+            axis2,
+            distance1,
+            distance2,
+            left[not_null],
+            right[not_null],
+            boundary1[not_null],
+            boundary2[not_null],
+            fill[not_null],
+            opacity[not_null],
+            title[not_null],
+            mark._style,
+            context.style_classes,
+            )
 
 
 @dispatch(toyplot.axes.Cartesian, toyplot.mark.BarMagnitudes, _RenderContext)
@@ -1918,31 +2919,22 @@ def _render(axes, mark, context):
         ):
         series_xml = xml.SubElement(
             mark_xml, "g", attrib={"class": "toyplot-Series"})
-        for dleft, dright, dboundary1, dboundary2, dfill, dopacity, dtitle in zip(
-                left[not_null],
-                right[not_null],
-                boundary1[not_null],
-                boundary2[not_null],
-                fill[not_null],
-                opacity[not_null],
-                title[not_null],
-            ):
-            dstyle = toyplot.style.combine(
-                {"fill": toyplot.color.to_css(dfill), "opacity": dopacity}, mark._style)
-            datum_xml = xml.SubElement(
-                series_xml,
-                "rect",
-                attrib={
-                    "class": "toyplot-Datum",
-                    axis1: repr(min(dleft, dright)),
-                    axis2: repr(min(dboundary1, dboundary2)),
-                    distance1: repr(numpy.abs(dleft - dright)),
-                    distance2: repr(numpy.abs(dboundary1 - dboundary2)),
-                    },
-                style=_css_style(dstyle),
-                )
-            if dtitle is not None:
-                xml.SubElement(datum_xml, "title").text = str(dtitle)
+        _render_rects(
+            series_xml,
+            axis1,
+            axis2,
+            distance1,
+            distance2,
+            left[not_null],
+            right[not_null],
+            boundary1[not_null],
+            boundary2[not_null],
+            fill[not_null],
+            opacity[not_null],
+            title[not_null],
+            mark._style,
+            context.style_classes,
+            )
 
 
 @dispatch(toyplot.axes.Cartesian, toyplot.mark.FillBoundaries, _RenderContext)
@@ -1976,19 +2968,18 @@ def _render(axes, mark, context):
         segments = _flat_contiguous(not_null)
 
         series_style = toyplot.style.combine(
-            {"fill": toyplot.color.to_css(fill), "opacity": opacity}, mark._style)
+            {"fill": _CSSColor(fill), "opacity": opacity}, mark._style)
 
         for segment in segments:
             if mark._coordinate_axes[0] == "x":
-                coordinates = zip(
+                points = _polygon_points(
                     numpy.concatenate((position[segment], position[segment][::-1])),
                     numpy.concatenate((boundary1[segment], boundary2[segment][::-1])))
             elif mark._coordinate_axes[0] == "y":
-                coordinates = zip(
+                points = _polygon_points(
                     numpy.concatenate((boundary1[segment], boundary2[segment][::-1])),
                     numpy.concatenate((position[segment], position[segment][::-1])))
-            series_xml = xml.SubElement(mark_xml, "polygon", points=" ".join(
-                ["%r,%r" % (xi, yi) for xi, yi in coordinates]), style=_css_style(series_style))
+            series_xml = xml.SubElement(mark_xml, "polygon", points=points, style=_css_style(series_style))
             if title is not None:
                 xml.SubElement(series_xml, "title").text = str(title)
 
@@ -2022,18 +3013,17 @@ def _render(axes, mark, context):
     for boundary1, boundary2, fill, opacity, title in zip(
             boundaries.T[:-1], boundaries.T[1:], mark._fill, mark._opacity, mark._title):
         series_style = toyplot.style.combine(
-            {"fill": toyplot.color.to_css(fill), "opacity": opacity}, mark._style)
+            {"fill": _CSSColor(fill), "opacity": opacity}, mark._style)
         for segment in segments:
             if mark._coordinate_axes[0] == "x":
-                coordinates = zip(
+                points = _polygon_points(
                     numpy.concatenate((position[segment], position[segment][::-1])),
                     numpy.concatenate((boundary1[segment], boundary2[segment][::-1])))
             elif mark._coordinate_axes[0] == "y":
-                coordinates = zip(
+                points = _polygon_points(
                     numpy.concatenate((boundary1[segment], boundary2[segment][::-1])),
                     numpy.concatenate((position[segment], position[segment][::-1])))
-            series_xml = xml.SubElement(mark_xml, "polygon", points=" ".join(
-                ["%r,%r" % (xi, yi) for xi, yi in coordinates]), style=_css_style(series_style))
+            series_xml = xml.SubElement(mark_xml, "polygon", points=points, style=_css_style(series_style))
             if title is not None:
                 xml.SubElement(series_xml, "title").text = str(title)
 
@@ -2066,28 +3056,21 @@ def _render(axes, mark, context):
             "class": "toyplot-mark-AxisLines"})
     series_xml = xml.SubElement(
         mark_xml, "g", attrib={"class": "toyplot-Series"})
-    for dposition, dstroke, dopacity, dtitle in zip(
-            position,
-            mark._table[mark._stroke[0]],
-            mark._table[mark._opacity[0]],
+    boundary1 = _format_number(boundary1)
+    boundary2 = _format_number(boundary2)
+    for (dclass, dstyle), dposition, dtitle in zip(
+            _datum_attribs("stroke", mark._table[mark._stroke[0]], mark._table[mark._opacity[0]], mark._style, None),
+            _format_numbers(position),
             mark._table[mark._title[0]],
         ):
-        dstyle = toyplot.style.combine(
-            {"stroke": toyplot.color.to_css(dstroke), "opacity": dopacity}, mark._style)
-        datum_xml = xml.SubElement(
-            series_xml,
-            "line",
-            attrib={
-                "class": "toyplot-Datum",
-                p1: repr(dposition),
-                p2: repr(dposition),
-                b1: repr(boundary1),
-                b2: repr(boundary2),
-            },
-            style=_css_style(dstyle),
-        )
-        if dtitle is not None:
-            xml.SubElement(datum_xml, "title").text = str(dtitle)
+        _datum_xml(series_xml, "line", {
+            "class": dclass,
+            p1: dposition,
+            p2: dposition,
+            b1: boundary1,
+            b2: boundary2,
+            "style": dstyle,
+            }, dtitle)
 
 
 @dispatch((toyplot.canvas.Canvas, toyplot.axes.Cartesian), toyplot.mark.Legend, _RenderContext)
@@ -2099,10 +3082,10 @@ def _render(canvas, legend, context):
     xml.SubElement(
         context.root,
         "rect",
-        x=repr(x),
-        y=repr(y),
-        width=repr(width),
-        height=repr(height),
+        x=_format_number(x),
+        y=_format_number(y),
+        width=_format_number(width),
+        height=_format_number(height),
         style=_css_style(legend._style),
         id=context.get_id(legend),
         attrib={"class": "toyplot-mark-Legend"},
@@ -2129,38 +3112,38 @@ def _render(canvas, legend, context):
                 xml.SubElement(
                     context.root,
                     "line",
-                    x1=repr(mark_x),
-                    y1=repr(mark_y + mark_height),
-                    x2=repr(mark_x + mark_width),
-                    y2=repr(mark_y),
+                    x1=_format_number(mark_x),
+                    y1=_format_number(mark_y + mark_height),
+                    x2=_format_number(mark_x + mark_width),
+                    y2=_format_number(mark_y),
                     style=_css_style(mark_style),
                     )
             elif mark == "rect":
                 xml.SubElement(
                     context.root,
                     "rect",
-                    x=repr(mark_x),
-                    y=repr(mark_y),
-                    width=repr(mark_width),
-                    height=repr(mark_height),
+                    x=_format_number(mark_x),
+                    y=_format_number(mark_y),
+                    width=_format_number(mark_width),
+                    height=_format_number(mark_height),
                     style=_css_style({"stroke": "none"}, mark_style),
                     )
             elif isinstance(mark, toyplot.mark.Plot):
                 dstyle = toyplot.style.combine(
-                    {"stroke": toyplot.color.to_css(mark._stroke[0])}, mark._style)
+                    {"stroke": _CSSColor(mark._stroke[0])}, mark._style)
                 xml.SubElement(
                     context.root,
                     "line",
-                    x1=repr(mark_x),
-                    y1=repr(mark_y + mark_height),
-                    x2=repr(mark_x + mark_width),
-                    y2=repr(mark_y),
+                    x1=_format_number(mark_x),
+                    y1=_format_number(mark_y + mark_height),
+                    x2=_format_number(mark_x + mark_width),
+                    y2=_format_number(mark_y),
                     style=_css_style(dstyle, mark_style))
             elif isinstance(mark, toyplot.mark.Scatterplot):
                 dstyle = toyplot.style.combine(
                     {
-                        "fill": toyplot.color.to_css(mark._table[mark._mfill[0]][0]),
-                        "stroke": toyplot.color.to_css(mark._table[mark._mstroke[0]][0]),
+                        "fill": _CSSColor(mark._table[mark._mfill[0]][0]),
+                        "stroke": _CSSColor(mark._table[mark._mstroke[0]][0]),
                         "opacity": mark._table[mark._mopacity[0]][0],
                     },
                     mark_style)
@@ -2175,15 +3158,15 @@ def _render(canvas, legend, context):
                     )
                 pass
             elif isinstance(mark, (toyplot.mark.BarBoundaries, toyplot.mark.BarMagnitudes, toyplot.mark.FillBoundaries, toyplot.mark.FillMagnitudes)):
-                dstyle = toyplot.style.combine({"fill": toyplot.color.to_css(
+                dstyle = toyplot.style.combine({"fill": _CSSColor(
                     mark._fill[0]), "opacity": mark._opacity[0]}, mark._style)
                 xml.SubElement(
                     context.root,
                     "rect",
-                    x=repr(mark_x),
-                    y=repr(mark_y),
-                    width=repr(mark_width),
-                    height=repr(mark_height),
+                    x=_format_number(mark_x),
+                    y=_format_number(mark_y),
+                    width=_format_number(mark_width),
+                    height=_format_number(mark_height),
                     style=_css_style(dstyle, mark_style),
                     )
             else:
@@ -2227,20 +3210,20 @@ def _render(axes, mark, context): # pragma: no cover
             mark._etable[mark._esource[0]],
             mark._etable[mark._etarget[0]],
             mark._etable[mark._eshape[0]],
-            mark._etable[mark._ecolor[0]],
+            _css_colors(mark._etable[mark._ecolor[0]]),
             mark._etable[mark._ewidth[0]],
             mark._etable[mark._eopacity[0]],
         ):
         estyle = toyplot.style.combine(
             {
                 "fill": "none",
-                "stroke": toyplot.color.to_css(ecolor),
+                "stroke": ecolor,
                 "stroke-width": ewidth,
                 "stroke-opacity": eopacity,
             },
             mark._estyle)
 
-        path = []
+        commands = []
         for segment in eshape:
             if segment == "M":
                 count = 1
@@ -2250,16 +3233,15 @@ def _render(axes, mark, context): # pragma: no cover
                 count = 2
             elif segment == "C":
                 count = 3
-            path.append(segment)
-            for i in range(count):
-                path.append(str(x[coordinate_index]))
-                path.append(str(y[coordinate_index]))
-                coordinate_index += 1
+            commands.append(segment)
+            commands.extend([None] * (count - 1))
+        begin = coordinate_index
+        coordinate_index += len(commands)
 
         xml.SubElement(
             edge_xml,
             "path",
-            d=" ".join(path),
+            d=_path_data(commands, x[begin:coordinate_index], y[begin:coordinate_index]),
             style=_css_style(estyle),
             )
 
@@ -2276,14 +3258,14 @@ def _render(axes, mark, context): # pragma: no cover
             y,
             mark._vtable[mark._vmarker[0]],
             mark._vtable[mark._vsize[0]],
-            mark._vtable[mark._vcolor[0]],
+            _css_colors(mark._vtable[mark._vcolor[0]]),
             mark._vtable[mark._vopacity[0]],
             mark._vtable[mark._vtitle[0]],
         ):
         vstyle = toyplot.style.combine(
             {
-                "fill": toyplot.color.to_css(vcolor),
-                "stroke": toyplot.color.to_css(vcolor),
+                "fill": vcolor,
+                "stroke": vcolor,
                 "opacity": vopacity,
             },
             mark._vstyle)
@@ -2297,6 +3279,7 @@ def _render(axes, mark, context): # pragma: no cover
             mark._vlstyle,
             extra_class="toyplot-Datum",
             title=vtitle,
+            style_classes=context.style_classes,
             )
 
     # Render vertex labels
@@ -2333,6 +3316,7 @@ def _render(axes, mark, context):
         attrib={
             "class": "toyplot-mark-Plot"})
     context.add_data_table(mark, mark._table, title="Plot Data", filename=mark._filename)
+    symbols = _marker_symbols(mark_xml, context)
 
     for series, stroke, stroke_width, stroke_opacity, stroke_title, marker, msize, mfill, mstroke, mopacity, mtitle in zip(
             series.T,
@@ -2349,11 +3333,10 @@ def _render(axes, mark, context):
         ):
         not_null = numpy.invert(numpy.logical_or(
             numpy.ma.getmaskarray(position), numpy.ma.getmaskarray(series)))
-        segments = _flat_contiguous(not_null)
 
         stroke_style = toyplot.style.combine(
             {
-                "stroke": toyplot.color.to_css(stroke),
+                "stroke": _CSSColor(stroke),
                 "stroke-width": stroke_width,
                 "stroke-opacity": stroke_opacity},
             mark._style)
@@ -2368,32 +3351,31 @@ def _render(axes, mark, context):
         if stroke_title is not None:
             xml.SubElement(series_xml, "title").text = str(stroke_title)
 
-        d = []
-        for segment in segments:
-            start, stop, step = segment.indices(len(not_null))
-            for i in range(start, start + 1):
-                d.append("M %r %r" % (x[i], y[i]))
-            for i in range(start + 1, stop):
-                d.append("L %r %r" % (x[i], y[i]))
+        index, commands = _decimate(position, series, not_null, toyplot.config.decimation)
         xml.SubElement(
             series_xml,
             "path",
-            d=" ".join(d),
+            d=_path_data(
+                commands,
+                numpy.ma.getdata(x)[index],
+                numpy.ma.getdata(y)[index]),
             style=_css_style(stroke_style))
+        if marker.tolist().count(None) == len(marker):
+            continue
         for dx, dy, dmarker, dsize, dfill, dstroke, dopacity, dtitle in zip(
                 x[not_null],
                 y[not_null],
                 marker[not_null],
                 msize[not_null],
-                mfill[not_null],
-                mstroke[not_null],
+                _css_colors(mfill[not_null]),
+                _css_colors(mstroke[not_null]),
                 mopacity[not_null],
                 mtitle[not_null],
             ):
             dstyle = toyplot.style.combine(
                 {
-                    "fill": toyplot.color.to_css(dfill),
-                    "stroke": toyplot.color.to_css(dstroke),
+                    "fill": dfill,
+                    "stroke": dstroke,
                     "opacity": dopacity},
                 mark._mstyle)
             datum_xml = _draw_marker(
@@ -2406,6 +3388,8 @@ def _render(axes, mark, context):
                 mark._mlstyle,
                 extra_class="toyplot-Datum",
                 title=dtitle,
+                symbols=symbols,
+                style_classes=context.style_classes,
                 )
 
 
@@ -2433,29 +3417,108 @@ def _render(axes, mark, context):
 
     series_xml = xml.SubElement(
         mark_xml, "g", attrib={"class": "toyplot-Series"})
-    for dx1, dx2, dy1, dy2, dfill, dopacity, dtitle in zip(
-            x1,
-            x2,
-            y1,
-            y2,
-            mark._table[mark._fill[0]],
-            mark._table[mark._opacity[0]],
-            mark._table[mark._title[0]],
+    _render_rects(
+        series_xml,
+        "x",
+        "y",
+        "width",
+        "height",
+        x1,
+        x2,
+        y1,
+        y2,
+        mark._table[mark._fill[0]],
+        mark._table[mark._opacity[0]],
+        mark._table[mark._title[0]],
+        mark._style,
+        context.style_classes,
+        )
+
+
+def _rasterize(mark, count):
+    """Decide whether to render a mark containing `count` points as a bitmap."""
+    if mark._raster is True or mark._raster is False or mark._raster is None:
+        rasterize = bool(mark._raster)
+    else:
+        rasterize = count > mark._raster
+    return rasterize and _raster_markers(mark)
+
+
+def _raster_markers(mark):
+    """Return `True` if every marker in a scatterplot can be drawn as a filled circle."""
+    mstyle = mark._mstyle if mark._mstyle is not None else {}
+    stroke = mstyle.get("stroke", None)
+    if stroke != "none":
+        # Markers are stroked with their fill color by default, which only
+        # matters if the stroke is styled or differs from the fill.
+        if stroke is not None or "stroke-width" in mstyle:
+            return False
+        for fill, stroke in zip(mark._mfill, mark._mstroke):
+            if not numpy.all(mark._table[stroke] == mark._table[fill]):
+                return False
+    for marker in mark._marker:
+        for dmarker in mark._table[marker].tolist():
+            if isinstance(dmarker, dict):
+                if dmarker.get("shape", None) != "o" or set(dmarker) - set(["shape", "angle"]):
+                    return False
+            elif dmarker is not None and dmarker != "o":
+                return False
+    return True
+
+
+def _draw_raster_scatterplot(mark, X, Y, bounds, mark_xml):
+    """Render scatterplot markers into a bitmap covering (left, top, width, height)."""
+    left, top, width, height = bounds
+
+    mstyle = mark._mstyle if mark._mstyle is not None else {}
+    fill = toyplot.color.css(mstyle["fill"]) if "fill" in mstyle else None
+    opacity = float(mstyle.get("opacity", 1.0)) * float(mstyle.get("fill-opacity", 1.0))
+
+    x = []
+    y = []
+    size = []
+    colors = []
+    for dx, dy, marker, msize, mfill, mopacity in zip(
+            X.T,
+            Y.T,
+            [mark._table[key] for key in mark._marker],
+            [mark._table[key] for key in mark._msize],
+            [mark._table[key] for key in mark._mfill],
+            [mark._table[key] for key in mark._mopacity],
         ):
-        dstyle = toyplot.style.combine(
-            {"fill": toyplot.color.to_css(dfill), "opacity": dopacity}, mark._style)
-        datum_xml = xml.SubElement(
-            series_xml,
-            "rect",
-            attrib={"class": "toyplot-Datum"},
-            x=repr(min(dx1, dx2)),
-            y=repr(min(dy1, dy2)),
-            width=repr(numpy.abs(dx1 - dx2)),
-            height=repr(numpy.abs(dy1 - dy2)),
-            style=_css_style(dstyle),
-            )
-        if dtitle is not None:
-            xml.SubElement(datum_xml, "title").text = str(dtitle)
+        not_null = numpy.invert(numpy.logical_or(
+            numpy.ma.getmaskarray(dx), numpy.ma.getmaskarray(dy)))
+        not_null &= numpy.array([dmarker is not None for dmarker in marker.tolist()], dtype="bool")
+
+        dcolors = numpy.array(mfill[not_null], dtype=toyplot.color.dtype)
+        if fill is not None:
+            dcolors[...] = fill
+        dcolors["a"] *= numpy.ma.getdata(mopacity)[not_null] * opacity
+
+        x.append(numpy.ma.getdata(dx)[not_null] - left)
+        y.append(numpy.ma.getdata(dy)[not_null] - top)
+        size.append(numpy.ma.getdata(msize)[not_null])
+        colors.append(dcolors)
+
+    image = toyplot.bitmap.discs(
+        width,
+        height,
+        numpy.concatenate(x),
+        numpy.concatenate(y),
+        numpy.concatenate(size),
+        numpy.concatenate(colors))
+
+    xml.SubElement(
+        mark_xml,
+        "image",
+        attrib={
+            "xmlns:xlink": "http://www.w3.org/1999/xlink",
+            "xlink:href": "data:image/png;base64," + base64.b64encode(toyplot.bitmap.to_png(image)).decode("ascii"),
+            "x": _format_number(left),
+            "y": _format_number(top),
+            "width": _format_number(width),
+            "height": _format_number(height),
+            })
 
 
 @dispatch(toyplot.axes.Cartesian, toyplot.mark.Scatterplot, _RenderContext)
@@ -2479,6 +3542,20 @@ def _render(axes, mark, context):
         )
     context.add_data_table(mark, mark._table, title="Scatterplot Data", filename=mark._filename)
 
+    if _rasterize(mark, X.count()):
+        left = int(numpy.floor(axes._xmin_range - axes.padding))
+        top = int(numpy.floor(axes._ymin_range - axes.padding))
+        bounds = (
+            left,
+            top,
+            int(numpy.ceil(axes._xmax_range + axes.padding)) - left,
+            int(numpy.ceil(axes._ymax_range + axes.padding)) - top,
+            )
+        _draw_raster_scatterplot(mark, X, Y, bounds, mark_xml)
+        return
+
+    symbols = _marker_symbols(mark_xml, context)
+
     for x, y, marker, msize, mfill, mstroke, mopacity, mtitle in zip(
             X.T,
             Y.T,
@@ -2499,15 +3576,15 @@ def _render(axes, mark, context):
                 y[not_null],
                 marker[not_null],
                 msize[not_null],
-                mfill[not_null],
-                mstroke[not_null],
+                _css_colors(mfill[not_null]),
+                _css_colors(mstroke[not_null]),
                 mopacity[not_null],
                 mtitle[not_null],
             ):
             dstyle = toyplot.style.combine(
                 {
-                    "fill": toyplot.color.to_css(dfill),
-                    "stroke": toyplot.color.to_css(dstroke),
+                    "fill": dfill,
+                    "stroke": dstroke,
                     "opacity": dopacity,
                 },
                 mark._mstyle)
@@ -2521,6 +3598,8 @@ def _render(axes, mark, context):
                 mark._mlstyle,
                 extra_class="toyplot-Datum",
                 title=dtitle,
+                symbols=symbols,
+                style_classes=context.style_classes,
                 )
 
 
@@ -2549,7 +3628,7 @@ def _render(parent, mark, context):
             y,
             mark._table[mark._text[0]],
             mark._table[mark._angle[0]],
-            mark._table[mark._fill[0]],
+            _css_colors(mark._table[mark._fill[0]]),
             mark._table[mark._opacity[0]],
             mark._table[mark._title[0]],
         ):
@@ -2561,7 +3640,7 @@ def _render(parent, mark, context):
             y=dy,
             angle=-dangle,
             attributes={"class": "toyplot-Datum"},
-            style=toyplot.style.combine({"fill": toyplot.color.to_css(dfill), "opacity": dopacity}, mark._style),
+            style=toyplot.style.combine({"fill": dfill, "opacity": dopacity}, mark._style),
             title=dtitle,
             )
 
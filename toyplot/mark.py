@@ -16,6 +16,8 @@ class Mark(object):
 
     """Base class for all Toyplot marks.
     """
+    # Markup reused by toyplot.html, so ignored by toyplot.cache.fingerprint().
+    _derived_state = ["_fragment"]
 
     def __init__(self):
         pass
@@ -524,6 +526,7 @@ class Scatterplot(Mark):
             mstyle,
             mlstyle,
             filename,
+            raster=False,
         ):
         Mark.__init__(self)
 
@@ -557,6 +560,8 @@ class Scatterplot(Mark):
         self._mlstyle = toyplot.require.style(mlstyle, allowed=toyplot.require.style.text)
         # Export filename
         self._filename = toyplot.require.filename(filename)
+        # Render as a bitmap (boolean, or a threshold number of points)
+        self._raster = raster
 
 class Text(Mark):
 
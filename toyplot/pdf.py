@@ -9,6 +9,7 @@ from __future__ import division
 
 
 import toyplot
+import toyplot.cache
 import toyplot.reportlab.pdf as implementation
 
 
@@ -54,4 +55,48 @@ def render(canvas, fobj=None, width=None, height=None, scale=None):
     The output PDF is currently rendered using
     :func:`toyplot.reportlab.pdf.render()`.
     """
+    if toyplot.cache._enabled():
+        return toyplot.cache._render("pdf", canvas, fobj, (width, height, scale), lambda stream: implementation.render(
+            canvas, stream, width, height, scale))
     return implementation.render(canvas, fobj, width, height, scale)
+
+
+def render_async(canvas, fobj=None, width=None, height=None, scale=None, executor=None):
+    """Render the PDF representation of a canvas without blocking an :mod:`asyncio` event loop.
+
+    Parameters
+    ----------
+    canvas: :class:`toyplot.canvas.Canvas`
+      Canvas to be rendered.
+    fobj: file-like object, string, or None
+      The file to write.  Use a string filepath to write data directly to disk.
+      If `None` (the default), the PDF data will be returned to the caller
+      instead.
+    width: number, string, or (number, string) tuple, optional
+      Specify the width of the output image with optional units.
+    height: number or (number, string) tuple, optional
+      Specify the height of the output image with optional units.
+    scale: number, optional
+      Scales the output `canvas` by the given ratio.
+    executor: :class:`concurrent.futures.Executor`, optional
+      Executor used to run the CPU-bound rendering stages.  Defaults to the
+      event loop's default executor.
+
+    Returns
+    -------
+    pdf: coroutine
+      Coroutine that returns the PDF representation of `canvas`, or `None` if
+      the caller specifies the `fobj` parameter.
+
+    Examples
+    --------
+
+    >>> pdf = await toyplot.pdf.render_async(canvas)
+
+    Notes
+    -----
+    Requires Python 3.7 or later.  The PDF is rendered by :func:`render` in
+    `executor`.
+    """
+    import toyplot._coroutines
+    return toyplot._coroutines.pdf(canvas, fobj, width, height, scale, executor)
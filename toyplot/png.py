@@ -9,7 +9,22 @@ from __future__ import division
 
 
 import toyplot
-import toyplot.reportlab.png as implementation
+import toyplot.cache
+import toyplot.config
+
+
+def _implementation():
+    """Return the module that implements PNG rendering, based on :data:`toyplot.config.png_rasterizer`."""
+    if toyplot.config.png_rasterizer == "ghostscript":
+        import toyplot.reportlab.png as implementation
+        return implementation
+    elif toyplot.config.png_rasterizer == "renderpm":
+        import toyplot.reportlab.renderpm as implementation
+        return implementation
+    raise ValueError("Unknown PNG rasterizer: %s" % toyplot.config.png_rasterizer)
+
+# Fail early if the configured rasterizer isn't available.
+_implementation()
 
 
 def render(canvas, fobj=None, width=None, height=None, scale=None):
@@ -42,13 +57,59 @@ def render(canvas, fobj=None, width=None, height=None, scale=None):
 
     Notes
     -----
-    The output PNG is rendered using :func:`toyplot.reportlab.png.render()`.
-    This is subject to change.
+    The output PNG is rendered using :func:`toyplot.reportlab.png.render()`,
+    or :func:`toyplot.reportlab.renderpm.render()` if
+    `toyplot.config.png_rasterizer` is "renderpm".  This is subject to change.
+    """
+    if toyplot.cache._enabled():
+        return toyplot.cache._render("png", canvas, fobj, (width, height, scale), lambda stream: _implementation().render(
+            canvas, stream, width, height, scale))
+    return _implementation().render(canvas, fobj, width, height, scale)
+
+
+def render_async(canvas, fobj=None, width=None, height=None, scale=None, executor=None):
+    """Render the PNG bitmap representation of a canvas without blocking an :mod:`asyncio` event loop.
+
+    Parameters
+    ----------
+    canvas: :class:`toyplot.canvas.Canvas`
+      Canvas to be rendered.
+    fobj: file-like object or string, optional
+      The file to write.  Use a string filepath to write data directly to disk.
+      If `None` (the default), the PNG data will be returned to the caller
+      instead.
+    width: number, optional
+      Specify the width of the output image in pixels.
+    height: number, optional
+      Specify the height of the output image in pixels.
+    scale: number, optional
+      Ratio of output image pixels to `canvas` pixels.
+    executor: :class:`concurrent.futures.Executor`, optional
+      Executor used to run the CPU-bound rendering stages.  Defaults to the
+      event loop's default executor.
+
+    Returns
+    -------
+    png: coroutine
+      Coroutine that returns the PNG representation of `canvas`, or `None`
+      if the caller specifies the `fobj` parameter.
+
+    Notes
+    -----
+    Requires Python 3.7 or later.  SVG and PDF generation run in `executor`,
+    while Ghostscript runs as an :mod:`asyncio` subprocess.  Other
+    rasterizers, including the Ghostscript process pool, run entirely in
+    `executor`.
+
+    Examples
+    --------
+    >>> png = await toyplot.png.render_async(canvas)
     """
-    return implementation.render(canvas, fobj, width, height, scale)
+    import toyplot._coroutines
+    return toyplot._coroutines.png(canvas, fobj, width, height, scale, executor)
 
 
-def render_frames(canvas, width=None, height=None, scale=None):
+def render_frames(canvas, width=None, height=None, scale=None, workers=None, format="png"):
     """Render a canvas as a sequence of PNG images.
 
     By default, canvas dimensions in CSS pixels are mapped directly to pixels in
@@ -65,6 +126,12 @@ def render_frames(canvas, width=None, height=None, scale=None):
       Specify the height of the output image in pixels.
     scale: number, optional
       Ratio of output image pixels to `canvas` pixels.
+    workers: integer, optional
+      Number of worker processes used to render frames in parallel.  By
+      default, frames are rendered in the calling process.
+    format: "png" or "rgba", optional
+      Return each frame as PNG image data, or as a :class:`numpy.ndarray` of
+      uint8 with shape (height, width, 4).
 
     Returns
     -------
@@ -75,12 +142,14 @@ def render_frames(canvas, width=None, height=None, scale=None):
     Notes
     -----
     The output PNG images are rendered using
-    :func:`toyplot.reportlab.png.render_frames()`.  This is subject to change.
+    :func:`toyplot.reportlab.png.render_frames()`, or
+    :func:`toyplot.reportlab.renderpm.render_frames()` if
+    `toyplot.config.png_rasterizer` is "renderpm".  This is subject to change.
 
     Examples
     --------
     >>> for frame, png in enumerate(toyplot.png.render_frames(canvas)):
     ...   open("frame-%s.png" % frame, "wb").write(png)
     """
-    return implementation.render_frames(canvas, width, height, scale)
+    return _implementation().render_frames(canvas, width, height, scale, workers, format)
 
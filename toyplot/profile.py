@@ -0,0 +1,204 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Measure where rendering spends its time.
+
+Rendering is divided into phases, which are only measured while a profile is
+being collected with :func:`collect`:
+
+* "finalize" - computing the domain and ticks of a set of axes.
+* "ticks" - choosing tick locations and labels.
+* "render" - generating the markup for one axes or mark.
+* "text" - parsing and laying out the HTML in a text string.
+* "serialize" - converting markup to bytes.
+* "reportlab" - converting markup to a ReportLab drawing, for PDF and PNG output.
+* "ghostscript" - rasterizing a PDF document with Ghostscript.
+* "renderpm" - rasterizing markup with ReportLab's renderPM.
+
+Phases nest: for example, marks are rendered while their axes are being
+rendered, so the time recorded for a phase includes the time spent in any
+phases it contains.
+
+>>> with toyplot.profile.collect() as profile:
+...   toyplot.png.render(canvas, "figure.png")
+>>> profile.as_dict()["phases"]["ghostscript"]
+>>> profile.write_trace("figure-trace.json")
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import collections
+import contextlib
+import json
+import os
+import threading
+import timeit
+import toyplot.compatibility
+
+
+_state = threading.local()
+
+
+class Profile(object):
+    """Time spent and output produced by each phase of rendering.
+
+    Do not create Profile instances directly.  Use :func:`collect` instead.
+    """
+    def __init__(self):
+        self._start = timeit.default_timer()
+        self._phases = collections.OrderedDict()
+        self._classes = collections.OrderedDict()
+        self._events = []
+
+    def __repr__(self):
+        return "<toyplot.profile.Profile %s phases, %s events>" % (len(self._phases), len(self._events))
+
+    def _record(self, name, label, begin, end, elements, bytes):
+        for totals, key in [(self._phases, name), (self._classes, label)]:
+            if key is None:
+                continue
+            if key not in totals:
+                totals[key] = {"time": 0.0, "calls": 0, "elements": 0, "bytes": 0}
+            totals[key]["time"] += end - begin
+            totals[key]["calls"] += 1
+            totals[key]["elements"] += elements
+            totals[key]["bytes"] += bytes
+
+        self._events.append({
+            "name": name if label is None else label,
+            "cat": name,
+            "ph": "X",
+            "ts": (begin - self._start) * 1e6,
+            "dur": (end - begin) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.current_thread().ident,
+            "args": {"elements": elements, "bytes": bytes},
+            })
+
+    def as_dict(self):
+        """Return the totals for each phase, and for each class of axes or mark.
+
+        Returns
+        -------
+        profile: dict
+          Contains "phases" and "classes" dicts, mapping phase names and
+          fully-qualified class names to dicts containing "time" (wall-clock
+          time in seconds), "calls", "elements" (markup elements emitted by
+          marks), and "bytes" (output produced).
+        """
+        return {
+            "phases": dict([(key, dict(value)) for key, value in self._phases.items()]),
+            "classes": dict([(key, dict(value)) for key, value in self._classes.items()]),
+            }
+
+    def trace(self):
+        """Return every recorded phase as Chrome trace events.
+
+        The result can be loaded into chrome://tracing or https://ui.perfetto.dev
+        to see a timeline of the render.
+
+        Returns
+        -------
+        trace: JSON-compatible dict
+        """
+        return {"traceEvents": list(self._events), "displayTimeUnit": "ms"}
+
+    def write_trace(self, fobj):
+        """Write the Chrome trace events returned by :meth:`trace` as JSON.
+
+        Parameters
+        ----------
+        fobj: file-like object or string
+          The file to write.  Use a string filepath to write data directly to
+          disk.
+        """
+        if isinstance(fobj, toyplot.compatibility.string_type):
+            with open(fobj, "w") as stream:
+                json.dump(self.trace(), stream)
+        else:
+            json.dump(self.trace(), fobj)
+
+
+@contextlib.contextmanager
+def collect():
+    """Profile everything rendered by the current thread within a with statement.
+
+    Returns
+    -------
+    profile: :class:`Profile`
+      Populated as rendering takes place.
+
+    Examples
+    --------
+    >>> with toyplot.profile.collect() as profile:
+    ...   toyplot.html.render(canvas, "figure.html")
+    >>> for name, phase in profile.as_dict()["phases"].items():
+    ...   print(name, phase["time"], phase["calls"])
+    """
+    profile = Profile()
+    previous = getattr(_state, "profile", None)
+    _state.profile = profile
+    try:
+        yield profile
+    finally:
+        _state.profile = previous
+
+
+class _Phase(object):
+    """Records one phase of rendering in a profile."""
+    def __init__(self, profile, name, obj, root):
+        self._profile = profile
+        self._name = name
+        self._label = None if obj is None else "%s.%s" % (type(obj).__module__, type(obj).__name__)
+        self._root = root
+        self._elements = 0
+        self._bytes = 0
+
+    def __enter__(self):
+        self._count = 0 if self._root is None else len(self._root)
+        self._begin = timeit.default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = timeit.default_timer()
+        if self._root is not None:
+            self._elements += sum([len(list(element.iter())) for element in self._root[self._count:]])
+        self._profile._record(self._name, self._label, self._begin, end, self._elements, self._bytes)
+
+    def count(self, elements=0, bytes=0):
+        self._elements += elements
+        self._bytes += bytes
+
+
+class _NullPhase(object):
+    """Stands in for :class:`_Phase` when no profile is being collected."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def count(self, elements=0, bytes=0):
+        pass
+
+_null_phase = _NullPhase()
+
+
+def _phase(name, obj=None, root=None):
+    """Return a context manager that records a phase of rendering, if a profile is being collected.
+
+    Parameters
+    ----------
+    name: string
+      Name of the phase.
+    obj: axes or mark, optional
+      The object being rendered, whose class is recorded.
+    root: xml.etree.ElementTree.Element, optional
+      If specified, markup elements added to `root` during the phase are counted.
+    """
+    profile = getattr(_state, "profile", None)
+    if profile is None:
+        return _null_phase
+    return _Phase(profile, name, obj, root)
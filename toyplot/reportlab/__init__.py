@@ -7,11 +7,20 @@
 from __future__ import absolute_import
 from __future__ import division
 
+import base64
+import collections
+import io
+import math
+import multiprocessing
 import numpy
 import re
+import reportlab.lib.utils
 import reportlab.pdfgen.canvas
 import reportlab.pdfbase
 import toyplot.color
+import toyplot.config
+import toyplot.html
+import toyplot.svg
 import toyplot.units
 
 
@@ -118,13 +127,24 @@ def render(svg, canvas):
         canvas.setStrokeColorRGB(color["r"], color["g"], color["b"])
         canvas.setStrokeAlpha(numpy.asscalar(color["a"]))
 
+    def get_element(element_id):
+        if get_element.ids is None:
+            get_element.ids = dict([(element.get("id"), element) for element in svg.iter() if element.get("id") is not None])
+        return get_element.ids[element_id]
+
+    get_element.ids = None
+
     def render_element(root, element, canvas, styles, text_state=None):
         canvas.saveState()
 
         current_style = {}
         if len(styles):
             current_style.update(styles[-1])
-        for declaration in element.get("style", "").split(";"):
+        declarations = []
+        for name in element.get("class", "").split():
+            declarations += class_styles.get(name, "").split(";")
+        declarations += element.get("style", "").split(";")
+        for declaration in declarations:
             if declaration == "":
                 continue
             key, value = declaration.split(":")
@@ -212,15 +232,27 @@ def render(svg, canvas):
                 if stroke is not None:
                     set_stroke_color(canvas, stroke)
                     path = canvas.beginPath()
-                    commands = element.get("d").split()
-                    while len(commands):
-                        command = commands.pop(0)
-                        if command == "L":
-                            path.lineTo(
-                                float(commands.pop(0)), float(commands.pop(0)))
-                        elif command == "M":
-                            path.moveTo(
-                                float(commands.pop(0)), float(commands.pop(0)))
+                    tokens = element.get("d").split()
+                    command = None
+                    x, y = 0.0, 0.0
+                    index = 0
+                    while index < len(tokens):
+                        if tokens[index].isalpha():
+                            command = tokens[index]
+                            index += 1
+                            continue
+                        dx, dy = float(tokens[index]), float(tokens[index + 1])
+                        index += 2
+                        if command in ["m", "l"]:
+                            x, y = x + dx, y + dy
+                        else:
+                            x, y = dx, dy
+                        if command in ["M", "m"]:
+                            path.moveTo(x, y)
+                            # Subsequent coordinate pairs are implicit line commands.
+                            command = "L" if command == "M" else "l"
+                        elif command in ["L", "l"]:
+                            path.lineTo(x, y)
                     canvas.drawPath(path)
             elif element.tag == "polygon":
                 fill, fill_gradient = get_fill(root, current_style)
@@ -365,7 +397,25 @@ def render(svg, canvas):
                 text_state["chunks"][-1].append((x, y, fill, stroke, font_family, font_size, element.text, string_width))
                 text_state["x"] += string_width
 
-            elif element.tag in ["defs", "title"]:
+            elif element.tag == "image":
+                href = element.get("xlink:href", element.get("{http://www.w3.org/1999/xlink}href"))
+                if not href.startswith("data:image/png;base64,"):
+                    raise NotImplementedError("Only embedded PNG images are implemented.") # pragma: no cover
+                image = reportlab.lib.utils.ImageReader(io.BytesIO(base64.b64decode(href.split(",", 1)[1])))
+                x = float(element.get("x"))
+                y = float(element.get("y"))
+                width = float(element.get("width"))
+                height = float(element.get("height"))
+                canvas.translate(x, y + height)
+                canvas.scale(1, -1)
+                canvas.drawImage(image, 0, 0, width, height, mask="auto")
+
+            elif element.tag == "use":
+                href = element.get("xlink:href", element.get("{http://www.w3.org/1999/xlink}href"))
+                canvas.translate(float(element.get("x", 0)), float(element.get("y", 0)))
+                render_element(root, get_element(href[1:]), canvas, styles)
+
+            elif element.tag in ["defs", "style", "title"]:
                 pass
 
             else:
@@ -374,5 +424,86 @@ def render(svg, canvas):
         styles.pop()
         canvas.restoreState()
 
+    class_styles = {}
+    for style in svg.iter("style"):
+        for name, declarations in re.findall(r"[.]([\w-]+)\s*[{]([^}]*)[}]", style.text or ""):
+            class_styles[name] = declarations
+
     render_element(svg, svg, canvas, [])
 
+
+def _render_frames(canvas, width, height, scale, workers, format, render_pages):
+    """Render the frames of an animated canvas, optionally in parallel.
+
+    Parameters
+    ----------
+    render_pages: function
+      Called as render_pages(svg, index, changes, begin, end, scale, pagesize,
+      format) to apply the changes for frames [begin, end) to an SVG DOM one
+      at a time, yielding an image of each.  Must be a module-level function,
+      so it can be passed to worker processes.
+
+    See :func:`toyplot.reportlab.png.render_frames` for the remaining
+    parameters.
+    """
+    if format not in ["png", "rgba"]:
+        raise ValueError("Unsupported frame format: %s" % format)
+
+    svg, svg_animation = toyplot.svg.render(canvas, animation=True)
+    scale = canvas._point_scale(width=width, height=height, scale=scale)
+    changes = [frame_changes for time, frame_changes in sorted(svg_animation.items())]
+    pagesize = (scale * canvas.width, scale * canvas.height)
+
+    if workers is None or workers < 2 or len(changes) < 2:
+        for image in render_pages(svg, toyplot.html.index(svg), changes, 0, len(changes), scale, pagesize, format):
+            yield image
+        return
+
+    # Split the frames into enough batches to keep every worker busy, and
+    # limit the number of batches in flight so memory use stays bounded.
+    size = int(math.ceil(len(changes) / (workers * 4)))
+    if toyplot.config.frame_batch_size:
+        size = min(size, toyplot.config.frame_batch_size)
+    batches = collections.deque((begin, min(begin + size, len(changes))) for begin in range(0, len(changes), size))
+    pending = collections.deque()
+
+    pool = multiprocessing.Pool(workers, _initialize_worker, (svg, changes, scale, pagesize, format, render_pages))
+    try:
+        while batches or pending:
+            while batches and len(pending) < workers * 2:
+                pending.append(pool.apply_async(_render_batch, batches.popleft()))
+            for image in pending.popleft().get():
+                yield image
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+_worker_state = None
+
+
+def _initialize_worker(svg, changes, scale, pagesize, format, render_pages):
+    global _worker_state
+    _worker_state = {
+        "svg": svg,
+        "index": toyplot.html.index(svg),
+        "changes": changes,
+        "scale": scale,
+        "pagesize": pagesize,
+        "format": format,
+        "render_pages": render_pages,
+        "frame": 0,
+        }
+
+
+def _render_batch(begin, end):
+    """Render a batch of frames in a worker process.
+
+    Each worker receives batches in increasing order, so it only has to
+    catch up on the changes from frames rendered by other workers.
+    """
+    state = _worker_state
+    for frame in range(state["frame"], begin):
+        toyplot.svg.apply_changes(state["svg"], state["changes"][frame], state["index"])
+    state["frame"] = end
+    return list(state["render_pages"](state["svg"], state["index"], state["changes"], begin, end, state["scale"], state["pagesize"], state["format"]))
@@ -10,6 +10,7 @@ from __future__ import division
 
 import io
 import reportlab.pdfgen.canvas
+import toyplot.profile
 import toyplot.reportlab
 import toyplot.svg
 
@@ -63,9 +64,10 @@ def render(canvas, fobj=None, width=None, height=None, scale=None):
     surface.translate(0, scale * canvas.height)
     surface.scale(1, -1)
     surface.scale(scale, scale)
-    toyplot.reportlab.render(svg, surface)
-    surface.showPage()
-    surface.save()
+    with toyplot.profile._phase("reportlab"):
+        toyplot.reportlab.render(svg, surface)
+        surface.showPage()
+        surface.save()
     if fobj is None:
         return stream.getvalue()
 
@@ -9,19 +9,35 @@ from __future__ import absolute_import
 from __future__ import division
 
 
+import atexit
 import io
+import numpy
+import os
 import os.path
 import reportlab.pdfgen.canvas
+import shutil
+import struct
 import subprocess
+import tempfile
+import threading
+import time
+import toyplot.config
+import toyplot.html
+import toyplot.profile
 import toyplot.reportlab
 import toyplot.svg
 
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue
+
 
 for path in os.environ["PATH"].split(os.pathsep):
     if os.path.exists(os.path.join(path, "gs")):
         break
 else:
-    raise Exception("The gs executable is required.")  # pragma: no cover
+    raise ImportError("The gs executable is required.")  # pragma: no cover
 
 
 def render(canvas, fobj=None, width=None, height=None, scale=None):
@@ -51,7 +67,34 @@ def render(canvas, fobj=None, width=None, height=None, scale=None):
     png: PNG image data, or `None`
       PNG representation of `canvas`, or `None` if the caller specifies the
       `fobj` parameter.
+
+    Notes
+    -----
+    When :data:`toyplot.config.ghostscript_processes` is greater than zero,
+    the image is rasterized by a pool of long-lived Ghostscript processes,
+    instead of starting a new process for every image.  A process that takes
+    longer than :data:`toyplot.config.ghostscript_timeout` seconds is killed.
     """
+    pdf = _render_pdf(canvas, width, height, scale)
+
+    with toyplot.profile._phase("ghostscript") as phase:
+        if toyplot.config.ghostscript_processes:
+            stdout = _pool("pngalpha").rasterize(pdf)[0]
+        else:
+            gs = subprocess.Popen(
+                _command("pngalpha", "-"),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE)
+            stdout, stderr = gs.communicate(pdf)
+            if gs.returncode != 0:
+                raise Exception("Ghostscript failed with exit status %s: %s" % (gs.returncode, stderr.decode("utf-8", "replace").strip()))
+        phase.count(bytes=len(stdout))
+    return _write(stdout, fobj)
+
+
+def _render_pdf(canvas, width, height, scale):
+    """Return a single-page PDF document to be rasterized by Ghostscript."""
     svg = toyplot.svg.render(canvas)
     scale = canvas._point_scale(width=width, height=height, scale=scale)
     pdf = io.BytesIO()
@@ -59,39 +102,39 @@ def render(canvas, fobj=None, width=None, height=None, scale=None):
     surface.translate(0, scale * canvas.height)
     surface.scale(1, -1)
     surface.scale(scale, scale)
-    toyplot.reportlab.render(svg, surface)
-    surface.showPage()
-    surface.save()
+    with toyplot.profile._phase("reportlab"):
+        toyplot.reportlab.render(svg, surface)
+        surface.showPage()
+        surface.save()
+    return pdf.getvalue()
 
-    command = [
+
+def _command(device, path):
+    """Return the command that rasterizes every page of a PDF file, writing the images to stdout."""
+    return [
         "gs",
         "-dNOPAUSE",
         "-dBATCH",
         "-dQUIET",
         "-dMaxBitmap=2147483647",
-        "-sDEVICE=pngalpha",
+        "-sDEVICE=%s" % device,
         "-r%s" % 96,
         "-sOutputFile=-",
-        "-",
+        path,
         ]
 
-    gs = subprocess.Popen(
-        command,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE)
-    stdout, stderr = gs.communicate(pdf.getvalue())
 
+def _write(png, fobj):
     if fobj is None:
-        return stdout
+        return png
     elif isinstance(fobj, toyplot.compatibility.string_type):
         with open(fobj, "wb") as stream:
-            stream.write(stdout)
+            stream.write(png)
     else:
-        fobj.write(stdout)
+        fobj.write(png)
 
 
-def render_frames(canvas, width=None, height=None, scale=None):
+def render_frames(canvas, width=None, height=None, scale=None, workers=None, format="png"):
     """Render a canvas as a sequence of PNG images using Cairo.
 
     By default, canvas dimensions in CSS pixels are mapped directly to pixels in
@@ -108,6 +151,13 @@ def render_frames(canvas, width=None, height=None, scale=None):
       Specify the height of the output image in pixels.
     scale: number, optional
       Ratio of output image pixels to `canvas` pixels.
+    workers: integer, optional
+      Number of worker processes used to render batches of frames in
+      parallel.  By default, frames are rendered in the calling process.
+    format: "png" or "rgba", optional
+      Return each frame as PNG image data, or as a :class:`numpy.ndarray` of
+      uint8 with shape (height, width, 4).  RGBA frames skip PNG compression
+      entirely, and are rendered over an opaque white background.
 
     Returns
     -------
@@ -115,43 +165,351 @@ def render_frames(canvas, width=None, height=None, scale=None):
       The caller must iterate over the returned frames and is responsible for all
       subsequent processing, including disk I/O, video compression, etc.
 
+    Notes
+    -----
+    When :data:`toyplot.config.ghostscript_processes` is greater than zero,
+    each batch of frames is rasterized by a pool of long-lived Ghostscript
+    processes.  A process that takes longer than
+    :data:`toyplot.config.ghostscript_timeout` seconds is killed.
+
+    Frames are rasterized in batches of at most
+    :data:`toyplot.config.frame_batch_size` (64 by default), so memory use
+    doesn't grow with the length of the animation.  Larger batches start
+    Ghostscript fewer times, at the cost of memory and of the delay before the
+    first frame is returned.
+
     Examples
     --------
     >>> for frame, png in enumerate(toyplot.reportlab.png.render_frames(canvas)):
     ...   open("frame-%s.png" % frame, "wb").write(png)
     """
-    svg, svg_animation = toyplot.svg.render(canvas, animation=True)
-    scale = canvas._point_scale(width=width, height=height, scale=scale)
+    return toyplot.reportlab._render_frames(canvas, width, height, scale, workers, format, _render_pages)
 
-    for time, changes in sorted(svg_animation.items()):
-        toyplot.svg.apply_changes(svg, changes)
 
-        pdf = io.BytesIO()
-        surface = reportlab.pdfgen.canvas.Canvas(pdf, pagesize=(scale * canvas.width, scale * canvas.height))
-        surface.translate(0, scale * canvas.height)
-        surface.scale(1, -1)
-        surface.scale(scale, scale)
-        toyplot.reportlab.render(svg, surface)
-        surface.showPage()
+def _render_pages(svg, index, changes, begin, end, scale, pagesize, format):
+    """Apply changes to an SVG DOM one frame at a time, yielding an image of each frame."""
+    # Ghostscript can't rasterize a PDF until it has been written completely,
+    # so limit the number of frames held in memory at once.
+    size = max(1, toyplot.config.frame_batch_size or (end - begin))
+    for batch in range(begin, end, size):
+        for image in _rasterize_pages(svg, index, changes, batch, min(batch + size, end), scale, pagesize, format):
+            yield image
+
+
+def _rasterize_pages(svg, index, changes, begin, end, scale, pagesize, format):
+    """Rasterize frames [begin, end) as the pages of a single PDF."""
+    # Render each frame as one page of a PDF, so Ghostscript only has to be
+    # started once per batch.
+    descriptor, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(descriptor)
+    try:
+        surface = reportlab.pdfgen.canvas.Canvas(path, pagesize=pagesize)
+        for frame in range(begin, end):
+            toyplot.svg.apply_changes(svg, changes[frame], index)
+            surface.translate(0, pagesize[1])
+            surface.scale(1, -1)
+            surface.scale(scale, scale)
+            toyplot.reportlab.render(svg, surface)
+            surface.showPage()
         surface.save()
 
-        command = [
-            "gs",
-            "-dNOPAUSE",
-            "-dBATCH",
-            "-dQUIET",
-            "-dMaxBitmap=2147483647",
-            "-sDEVICE=pngalpha",
-            "-r%s" % 96,
-            "-sOutputFile=-",
-            "-",
-            ]
-
-        gs = subprocess.Popen(
-            command,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE)
-        stdout, stderr = gs.communicate(pdf.getvalue())
-        yield stdout
+        device = "pngalpha" if format == "png" else "ppmraw"
+        if toyplot.config.ghostscript_processes:
+            with open(path, "rb") as stream:
+                images = _pool(device).rasterize(stream.read())
+            if len(images) != end - begin:
+                raise Exception("Ghostscript produced %s images from %s frames." % (len(images), end - begin))
+            for image in images:
+                yield image if format == "png" else next(_read_ppms(io.BytesIO(image)))
+            return
+
+        # Collect stderr in a file, since a full pipe would block Ghostscript while we read stdout.
+        with tempfile.TemporaryFile() as stderr:
+            gs = subprocess.Popen(
+                _command(device, path),
+                stdout=subprocess.PIPE,
+                stderr=stderr)
+            count = 0
+            try:
+                for image in (_read_pngs if format == "png" else _read_ppms)(gs.stdout):
+                    count += 1
+                    yield image
+                gs.wait()
+            finally:
+                if gs.poll() is None:
+                    gs.kill()
+                    gs.wait()
+                gs.stdout.close()
+            if gs.returncode != 0 or count != end - begin:
+                stderr.seek(0)
+                raise Exception("Ghostscript produced %s images from %s frames (exit status %s): %s" % (
+                    count, end - begin, gs.returncode, stderr.read().decode("utf-8", "replace").strip()))
+    finally:
+        os.remove(path)
+
+
+def _read_pngs(stream):
+    """Yield each of a sequence of concatenated PNG images read from a stream."""
+    while True:
+        signature = stream.read(8)
+        if not signature:
+            return
+        png = [signature]
+        while True:
+            header = stream.read(8)
+            if len(header) != 8:
+                raise Exception("Incomplete PNG image.")
+            length, tag = struct.unpack(">I4s", header)
+            png.append(header)
+            png.append(stream.read(length + 4))
+            if tag == b"IEND":
+                break
+        yield b"".join(png)
+
+
+def _read_ppms(stream):
+    """Yield each of a sequence of concatenated binary PPM images read from a stream, as RGBA arrays."""
+    while True:
+        header = []
+        token = b""
+        while len(header) < 4:
+            character = stream.read(1)
+            if not character:
+                if header or token:
+                    raise Exception("Incomplete PPM image.")
+                return
+            if character == b"#":
+                stream.readline()
+                character = b"\n"
+            if character.isspace():
+                if token:
+                    header.append(token)
+                token = b""
+            else:
+                token += character
+        if header[0] != b"P6" or header[3] != b"255":
+            raise Exception("Unsupported PPM image.")
+
+        width, height = int(header[1]), int(header[2])
+        pixels = stream.read(width * height * 3)
+        if len(pixels) != width * height * 3:
+            raise Exception("Incomplete PPM image.")
+        image = numpy.empty((height, width, 4), dtype="uint8")
+        image[:, :, :3] = numpy.frombuffer(pixels, dtype="uint8").reshape((height, width, 3))
+        image[:, :, 3] = 255
+        yield image
+
+
+def _postscript_string(text):
+    """Quote text as a PostScript string literal."""
+    return "(%s)" % text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class _Ghostscript(object):
+    """A long-lived Ghostscript process, which rasterizes PDF files named on its standard input.
+
+    The process may only read and write files in its own temporary directory.
+    """
+    def __init__(self, device):
+        self._directory = tempfile.mkdtemp(prefix="toyplot-gs-")
+        self._jobs = 0
+        with open(os.devnull, "wb") as devnull:
+            self._process = subprocess.Popen(
+                _worker_command(device, self._directory),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=devnull)
+
+        # Read stdout on a separate thread, so waiting for a job can time out.
+        self._lines = queue.Queue()
+        self._reader = threading.Thread(target=self._read_lines)
+        self._reader.daemon = True
+        self._reader.start()
+
+    def _read_lines(self):
+        for line in iter(self._process.stdout.readline, b""):
+            self._lines.put(line)
+        self._lines.put(None)
+
+    def healthy(self):
+        return self._process.poll() is None
+
+    def rasterize(self, pdf):
+        """Return a list containing the rasterized image of each page in a PDF document."""
+        self._jobs += 1
+        prefix = "job-%s-" % self._jobs
+        path = os.path.join(self._directory, prefix + "document.pdf")
+        try:
+            with open(path, "wb") as stream:
+                stream.write(pdf)
+
+            # Each page is written to a separate, numbered file, and a token
+            # written to stdout signals that the job is complete.
+            token = "toyplot-job-%s" % self._jobs
+            self._process.stdin.write((
+                "{ << /OutputFile %s >> setpagedevice %s run } stopped { (%s failed\\n) } { (%s done\\n) } ifelse print flush clear\n" % (
+                    _postscript_string(os.path.join(self._directory, prefix + "%d")),
+                    _postscript_string(path),
+                    token,
+                    token,
+                    )).encode("utf-8"))
+            self._process.stdin.flush()
+
+            deadline = time.time() + toyplot.config.ghostscript_timeout
+            while True:
+                try:
+                    line = self._lines.get(timeout=max(0, deadline - time.time()))
+                except queue.Empty:
+                    self._process.kill()
+                    self._process.wait()
+                    raise Exception("Ghostscript timed out after %s seconds." % toyplot.config.ghostscript_timeout)
+                if line is None:
+                    raise Exception("Ghostscript exited unexpectedly.")
+                line = line.decode("utf-8", "replace").strip()
+                if line == "%s done" % token:
+                    break
+                if line == "%s failed" % token:
+                    raise Exception("Ghostscript could not rasterize the PDF document.")
+
+            pages = sorted(int(name[len(prefix):]) for name in os.listdir(self._directory) if name.startswith(prefix) and name[len(prefix):].isdigit())
+            images = []
+            for page in pages:
+                with open(os.path.join(self._directory, prefix + str(page)), "rb") as stream:
+                    images.append(stream.read())
+            return images
+        finally:
+            for name in os.listdir(self._directory):
+                if name.startswith(prefix):
+                    os.remove(os.path.join(self._directory, name))
+
+    def close(self):
+        try:
+            if self.healthy():
+                self._process.stdin.write(b"quit\n")
+                self._process.stdin.close()
+                self._process.wait()
+        except Exception:  # pragma: no cover
+            self._process.kill()
+            self._process.wait()
+        # The reader stops at end-of-file, once the process has exited.
+        self._reader.join()
+        for stream in [self._process.stdin, self._process.stdout]:
+            if not stream.closed:
+                stream.close()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+def _worker_command(device, directory):
+    """Return the command that starts a long-lived Ghostscript process, confined to a directory."""
+    directory = os.path.join(directory, "")
+    return [
+        "gs",
+        "-dNOPAUSE",
+        "-dQUIET",
+        "-dNOPROMPT",
+        "-dSAFER",
+        "--permit-file-read=%s" % directory,
+        "--permit-file-write=%s" % directory,
+        "-dMaxBitmap=2147483647",
+        "-sDEVICE=%s" % device,
+        "-r%s" % 96,
+        "-sOutputFile=%s" % os.path.join(directory, "%d"),
+        "-",
+        ]
+
+
+class _GhostscriptPool(object):
+    """A fixed-size pool of :class:`_Ghostscript` processes.
+
+    Callers block until a process is available.  Processes are started on
+    demand, and replaced if they exit or fail to rasterize a file.
+    """
+    def __init__(self, device, size):
+        self._device = device
+        self._size = size
+        self._processes = []
+        self._retired = False
+        self._lock = threading.RLock()
+        # Reuse the most recently released process, so no more processes are
+        # started than callers need concurrently.
+        self._idle = queue.LifoQueue()
+        for index in range(size):
+            self._idle.put(None)
+
+    def rasterize(self, pdf):
+        process = self._idle.get()
+        try:
+            if process is not None and not process.healthy():
+                self._discard(process)
+                process = None
+            if process is None:
+                process = _Ghostscript(self._device)
+                with self._lock:
+                    self._processes.append(process)
+            return process.rasterize(pdf)
+        except:
+            if process is not None:
+                self._discard(process)
+                process = None
+            raise
+        finally:
+            with self._lock:
+                if self._retired and process is not None:
+                    self._discard(process)
+                    process = None
+                self._idle.put(process)
+
+    def _discard(self, process):
+        with self._lock:
+            self._processes.remove(process)
+        if process.healthy():
+            process._process.kill()
+            process._process.wait()
+        process.close()
+
+    def retire(self):
+        """Close idle processes now, and busy processes when their jobs are finished."""
+        with self._lock:
+            self._retired = True
+            slots = []
+            while True:
+                try:
+                    slots.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            for process in slots:
+                if process is not None:
+                    self._discard(process)
+                self._idle.put(None)
+
+    def close(self):
+        for process in list(self._processes):
+            process.close()
+        self._processes = []
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(device):
+    """Return the Ghostscript pool for a device, sized by :data:`toyplot.config.ghostscript_processes`."""
+    # A pool can't be shared with child processes, so they create their own.
+    key = (os.getpid(), device)
+    size = toyplot.config.ghostscript_processes
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._size != size:
+            if pool is not None:
+                pool.retire()
+            pool = _pools[key] = _GhostscriptPool(device, size)
+        return pool
+
 
+@atexit.register
+def _close_pools():
+    with _pools_lock:
+        for (pid, device), pool in list(_pools.items()):
+            if pid == os.getpid():
+                pool.close()
+        _pools.clear()
@@ -0,0 +1,354 @@
+# Copyright 2014, Sandia Corporation. Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains certain
+# rights in this software.
+
+"""Generate PNG images in-process, using the ReportLab renderPM rasterizer.
+
+Unlike :mod:`toyplot.reportlab.png`, no intermediate PDF is created, and no
+Ghostscript subprocess is required.  ReportLab 4 and later rasterize with the
+separate rlPyCairo package.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+
+import math
+import numpy
+import PIL.Image
+import reportlab.graphics.renderPM
+import reportlab.graphics.shapes
+import reportlab.lib.colors
+import toyplot.bitmap
+import toyplot.color
+import toyplot.compatibility
+import toyplot.profile
+import toyplot.reportlab
+import toyplot.svg
+
+
+def render(canvas, fobj=None, width=None, height=None, scale=None):
+    """Render the PNG bitmap representation of a canvas using ReportLab's renderPM.
+
+    By default, canvas dimensions in CSS pixels are mapped directly to pixels in
+    the output PNG image.  Use one of `width`, `height`, or `scale` to override
+    this behavior.
+
+    Parameters
+    ----------
+    canvas: :class:`toyplot.canvas.Canvas`
+      Canvas to be rendered.
+    fobj: file-like object or string, optional
+      The file to write.  Use a string filepath to write data directly to disk.
+      If `None` (the default), the PNG data will be returned to the caller
+      instead.
+    width: number, optional
+      Specify the width of the output image in pixels.
+    height: number, optional
+      Specify the height of the output image in pixels.
+    scale: number, optional
+      Ratio of output image pixels to `canvas` pixels.
+
+    Returns
+    -------
+    png: PNG image data, or `None`
+      PNG representation of `canvas`, or `None` if the caller specifies the
+      `fobj` parameter.
+    """
+    svg = toyplot.svg.render(canvas)
+    scale = canvas._point_scale(width=width, height=height, scale=scale)
+    with toyplot.profile._phase("renderpm") as phase:
+        png = toyplot.bitmap.to_png(_rasterize(svg, scale, (scale * canvas.width, scale * canvas.height), alpha=True))
+        phase.count(bytes=len(png))
+
+    if fobj is None:
+        return png
+    elif isinstance(fobj, toyplot.compatibility.string_type):
+        with open(fobj, "wb") as stream:
+            stream.write(png)
+    else:
+        fobj.write(png)
+
+
+def render_frames(canvas, width=None, height=None, scale=None, workers=None, format="png"):
+    """Render a canvas as a sequence of PNG images using ReportLab's renderPM.
+
+    By default, canvas dimensions in CSS pixels are mapped directly to pixels in
+    the output PNG images.  Use one of `width`, `height`, or `scale` to override
+    this behavior.
+
+    Parameters
+    ----------
+    canvas: :class:`toyplot.canvas.Canvas`
+      Canvas to be rendered.
+    width: number, optional
+      Specify the width of the output image in pixels.
+    height: number, optional
+      Specify the height of the output image in pixels.
+    scale: number, optional
+      Ratio of output image pixels to `canvas` pixels.
+    workers: integer, optional
+      Number of worker processes used to render batches of frames in
+      parallel.  By default, frames are rendered in the calling process.
+    format: "png" or "rgba", optional
+      Return each frame as PNG image data, or as a :class:`numpy.ndarray` of
+      uint8 with shape (height, width, 4).  RGBA frames are rendered over an
+      opaque white background.
+
+    Returns
+    -------
+    frames: Python generator expression that returns each PNG image in the sequence.
+      The caller must iterate over the returned frames and is responsible for all
+      subsequent processing, including disk I/O, video compression, etc.
+    """
+    return toyplot.reportlab._render_frames(canvas, width, height, scale, workers, format, _render_pages)
+
+
+def _render_pages(svg, index, changes, begin, end, scale, pagesize, format):
+    """Apply changes to an SVG DOM one frame at a time, yielding an image of each frame."""
+    for frame in range(begin, end):
+        toyplot.svg.apply_changes(svg, changes[frame], index)
+        if format == "png":
+            yield toyplot.bitmap.to_png(_rasterize(svg, scale, pagesize, alpha=True))
+        else:
+            yield _rasterize(svg, scale, pagesize, alpha=False)
+
+
+def _rasterize(svg, scale, pagesize, alpha):
+    """Return an RGBA bitmap of an SVG DOM.
+
+    renderPM only produces opaque RGB pixmaps, so canvases with a transparent
+    background are drawn twice, over black and white, and the coverage of
+    each pixel is recovered from the difference.
+    """
+    drawing = _draw(svg, scale, pagesize)
+    white = _pixels(drawing, 0xffffff)
+    image = numpy.empty(white.shape[:2] + (4,), dtype="uint8")
+    image[:, :, 3] = 255
+
+    if not alpha or _opaque(svg):
+        image[:, :, :3] = white
+        return image
+
+    black = _pixels(drawing, 0x000000).astype("float64")
+    coverage = numpy.clip(255 - (white.astype("float64") - black).mean(axis=2), 0, 255)
+    covered = coverage > 0
+    image[:, :, :3] = 0
+    image[covered, :3] = numpy.clip(numpy.round(black[covered] * 255 / coverage[covered][:, numpy.newaxis]), 0, 255)
+    image[:, :, 3] = numpy.round(coverage)
+    return image
+
+
+def _opaque(svg):
+    """Return True if an SVG DOM has an opaque background color."""
+    style = dict([declaration.split(":") for declaration in svg.get("style", "").split(";") if declaration != ""])
+    color = toyplot.color.css(style.get("background-color", "transparent"))
+    return color is not None and color["a"] >= 1
+
+
+def _draw(svg, scale, pagesize):
+    """Return a ReportLab drawing of an SVG DOM, in pixel coordinates."""
+    # Map points to pixels at 96 DPI, matching Ghostscript.
+    surface = _Surface((pagesize[0] * (96 / 72), pagesize[1] * (96 / 72)))
+    surface.scale(96 / 72, 96 / 72)
+    surface.translate(0, pagesize[1])
+    surface.scale(1, -1)
+    surface.scale(scale, scale)
+    with toyplot.profile._phase("reportlab"):
+        toyplot.reportlab.render(svg, surface)
+    return surface.drawing
+
+
+def _pixels(drawing, background):
+    """Return an RGB bitmap of a ReportLab drawing, rasterized over the given background color."""
+    return numpy.asarray(reportlab.graphics.renderPM.drawToPIL(drawing, dpi=72, bg=background))
+
+
+class _Path(reportlab.graphics.shapes.Path):
+    """Adds the PDF canvas spelling of closePath() to a ReportLab path shape."""
+    def close(self):
+        self.closePath()
+
+
+class _Surface(object):
+    """Provides the subset of the ReportLab PDF canvas API used by :func:`toyplot.reportlab.render`, building a ReportLab drawing that renderPM can rasterize."""
+    def __init__(self, pagesize):
+        self.drawing = reportlab.graphics.shapes.Drawing(pagesize[0], pagesize[1])
+        self._ctm = (1, 0, 0, 1, 0, 0)
+        self._fill = (0, 0, 0, 1)
+        self._stroke = (0, 0, 0, 1)
+        self._stroke_width = 1
+        self._dash = None
+        self._font = ("Helvetica", 12)
+        self._clips = 0
+        self._group = None
+        self._states = []
+
+    def _add(self, shape):
+        # Consecutive shapes drawn with the same transformation share a group.
+        if self._group is None or self._group.transform != self._ctm:
+            self._group = reportlab.graphics.shapes.Group(transform=self._ctm)
+            self.drawing.add(self._group)
+        self._group.add(shape)
+
+    def _style(self, stroke, fill):
+        return dict(
+            fillColor=reportlab.lib.colors.Color(*self._fill) if fill else None,
+            strokeColor=reportlab.lib.colors.Color(*self._stroke) if stroke else None,
+            strokeWidth=self._stroke_width,
+            strokeDashArray=self._dash,
+            )
+
+    def saveState(self):
+        self._states.append((self._ctm, self._fill, self._stroke, self._stroke_width, self._dash, self._font, self._clips))
+
+    def restoreState(self):
+        self._ctm, self._fill, self._stroke, self._stroke_width, self._dash, self._font, clips = self._states.pop()
+        # renderPM reinstates the previous clipping path each time one is removed.
+        for index in range(clips, self._clips):
+            self.drawing.add(reportlab.graphics.shapes.EmptyClipPath)
+            self._group = None
+        self._clips = clips
+
+    def _transform(self, a, b, c, d, e, f):
+        A, B, C, D, E, F = self._ctm
+        self._ctm = (A * a + C * b, B * a + D * b, A * c + C * d, B * c + D * d, A * e + C * f + E, B * e + D * f + F)
+
+    def translate(self, dx, dy):
+        self._transform(1, 0, 0, 1, dx, dy)
+
+    def scale(self, x, y):
+        self._transform(x, 0, 0, y, 0, 0)
+
+    def rotate(self, theta):
+        c = math.cos(math.radians(theta))
+        s = math.sin(math.radians(theta))
+        self._transform(c, s, -s, c, 0, 0)
+
+    def setFillColorRGB(self, r, g, b):
+        self._fill = (r, g, b, self._fill[3])
+
+    def setStrokeColorRGB(self, r, g, b):
+        self._stroke = (r, g, b, self._stroke[3])
+
+    def setFillAlpha(self, alpha):
+        self._fill = self._fill[:3] + (float(alpha),)
+
+    def setStrokeAlpha(self, alpha):
+        self._stroke = self._stroke[:3] + (float(alpha),)
+
+    def setLineWidth(self, width):
+        self._stroke_width = float(width)
+
+    def setDash(self, array=None, phase=0):
+        self._dash = (phase, list(array)) if array else None
+
+    def setFont(self, name, size):
+        self._font = (name, size)
+
+    def beginPath(self):
+        return _Path()
+
+    def drawPath(self, path, stroke=1, fill=0):
+        # Like PDF, fill paths as if they were closed, but stroke them as drawn.
+        self._add(reportlab.graphics.shapes.Path(path.points, path.operators, autoclose="svg", **self._style(stroke, fill)))
+
+    def clipPath(self, path, stroke=0, fill=1):
+        # renderPM draws clipping paths outside of any group, so they're
+        # transformed here instead.
+        a, b, c, d, e, f = self._ctm
+        x, y = path.points[0::2], path.points[1::2]
+        points = [coordinate for point in zip(x, y) for coordinate in (a * point[0] + c * point[1] + e, b * point[0] + d * point[1] + f)]
+        self.drawing.add(reportlab.graphics.shapes.Path(points, path.operators, isClipPath=1, fillColor=None, strokeColor=None))
+        self._clips += 1
+        self._group = None
+
+    def line(self, x1, y1, x2, y2):
+        path = _Path()
+        path.moveTo(x1, y1)
+        path.lineTo(x2, y2)
+        self.drawPath(path)
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        self._add(reportlab.graphics.shapes.Rect(x, y, width, height, **self._style(stroke, fill)))
+
+    def circle(self, cx, cy, r, stroke=1, fill=0):
+        self._add(reportlab.graphics.shapes.Circle(cx, cy, r, **self._style(stroke, fill)))
+
+    def drawString(self, x, y, text):
+        self._add(reportlab.graphics.shapes.String(
+            x, y, text, fontName=self._font[0], fontSize=self._font[1], fillColor=reportlab.lib.colors.Color(*self._fill)))
+
+    def drawImage(self, image, x, y, width, height, mask=None):
+        # toyplot.reportlab.render() creates each reader from an in-memory PNG
+        # file, which is decoded again here to get the alpha channel.
+        image.fileName.seek(0)
+        pixels = PIL.Image.open(image.fileName).convert("RGBA")
+        rgba = numpy.ascontiguousarray(numpy.asarray(pixels))
+        if (rgba[:, :, 3] == 255).all():
+            self._add(reportlab.graphics.shapes.Image(x, y, width, height, pixels.convert("RGB")))
+            return
+
+        # renderPM ignores alpha and clipping when it draws images, so
+        # transparent images are drawn as runs of same-colored pixels instead,
+        # with one path per color.
+        rows, columns = rgba.shape[:2]
+        codes = rgba.view("uint32")[:, :, 0]
+        changes = numpy.ones((rows, columns + 1), dtype="bool")
+        changes[:, 1:-1] = codes[:, 1:] != codes[:, :-1]
+        run_rows, run_columns = numpy.nonzero(changes)
+        starts = numpy.nonzero(run_columns != columns)[0]
+        run_rows, begins, ends = run_rows[starts], run_columns[starts], run_columns[starts + 1]
+        visible = rgba[run_rows, begins, 3] > 0
+        run_rows, begins, ends = run_rows[visible], begins[visible], ends[visible]
+
+        self.saveState()
+        run_codes = codes[run_rows, begins]
+        for code in numpy.unique(run_codes):
+            selected = run_codes == code
+            path = _Path()
+            for row, begin, end in zip(run_rows[selected], begins[selected], ends[selected]):
+                top = y + height * (1 - row / rows)
+                bottom = y + height * (1 - (row + 1) / rows)
+                path.moveTo(x + width * begin / columns, bottom)
+                path.lineTo(x + width * end / columns, bottom)
+                path.lineTo(x + width * end / columns, top)
+                path.lineTo(x + width * begin / columns, top)
+                path.close()
+            r, g, b, a = rgba[run_rows[selected][0], begins[selected][0]] / 255
+            self.setFillColorRGB(r, g, b)
+            self.setFillAlpha(a)
+            self.drawPath(path, stroke=0, fill=1)
+        self.restoreState()
+
+    def linearGradient(self, x0, y0, x1, y1, colors, positions=None, extend=True):
+        # renderPM doesn't support shading, so the gradient is approximated
+        # with bands of solid color, which are clipped by the caller.
+        if positions is None:
+            positions = numpy.linspace(0, 1, len(colors))
+        rgba = numpy.array([(color.red, color.green, color.blue, color.alpha) for color in colors], dtype="float64")
+
+        dx, dy = x1 - x0, y1 - y0
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return
+        # A perpendicular vector long enough to span any clipping region.
+        px, py = -dy / length * 1e5, dx / length * 1e5
+
+        samples = 256
+        edges = numpy.linspace(0, 1, samples + 1)
+        if extend:
+            edges[0], edges[-1] = -1e5 / length, 1 + 1e5 / length
+        centers = numpy.clip((numpy.linspace(0, 1, samples + 1)[:-1] + numpy.linspace(0, 1, samples + 1)[1:]) / 2, 0, 1)
+        for begin, end, center in zip(edges[:-1], edges[1:], centers):
+            r, g, b, a = [numpy.interp(center, positions, rgba[:, channel]) for channel in range(4)]
+            self.setFillColorRGB(r, g, b)
+            self.setFillAlpha(a)
+            path = _Path()
+            path.moveTo(x0 + dx * begin + px, y0 + dy * begin + py)
+            path.lineTo(x0 + dx * end + px, y0 + dy * end + py)
+            path.lineTo(x0 + dx * end - px, y0 + dy * end - py)
+            path.lineTo(x0 + dx * begin - px, y0 + dy * begin - py)
+            path.close()
+            self.drawPath(path, stroke=0, fill=1)
+
@@ -7,17 +7,20 @@
 
 from __future__ import division
 
+import toyplot.cache
 import toyplot.html
 import toyplot.compatibility
-import xml.etree.ElementTree as xml
 
 
-def apply_changes(svg, changes):
-    """Modify the SVG DOM representation of a canvas with the given changes."""
-    toyplot.html.apply_changes(svg, changes)
+def apply_changes(svg, changes, index=None):
+    """Modify the SVG DOM representation of a canvas with the given changes.
+
+    See :func:`toyplot.html.apply_changes` for details.
+    """
+    toyplot.html.apply_changes(svg, changes, index)
 
 
-def render(canvas, fobj=None, animation=False):
+def render(canvas, fobj=None, animation=False, precision=None, relative_paths=None, id_prefix=None):
     """Render the SVG representation of a canvas.
 
     Parameters
@@ -34,6 +37,19 @@ def render(canvas, fobj=None, animation=False):
       If `True`, return a representation of the changes to be made to the SVG
       tree for animation.
 
+    precision: integer, optional
+      Maximum number of digits to write after the decimal point for
+      coordinates, sizes, transforms, and path data.  See
+      :func:`toyplot.html.render`.
+
+    relative_paths: boolean, optional
+      If `True`, write path data using relative commands.  See
+      :func:`toyplot.html.render`.
+
+    id_prefix: string, optional
+      If specified, element ids are numbered sequentially using this prefix.
+      See :func:`toyplot.html.render`.
+
     Returns
     -------
     svg: xml.etree.ElementTree.Element or `None`
@@ -44,15 +60,23 @@ def render(canvas, fobj=None, animation=False):
       JSON-compatible representation of the animated changes to `canvas`.
     """
 
-    html, html_animation = toyplot.html.render(canvas, animation=True)
-    svg = html.find("svg")
-
     if isinstance(fobj, toyplot.compatibility.string_type):
         with open(fobj, "wb") as stream:
-            stream.write(xml.tostring(svg, method="xml"))
+            render(canvas, stream, precision=precision, relative_paths=relative_paths, id_prefix=id_prefix)
+    elif fobj is not None and toyplot.cache._enabled():
+        # Markup with random ids isn't cached, since the ids have to be unique.
+        id_prefix = toyplot.html._element_ids(canvas, id_prefix)._prefix
+        if id_prefix is None:
+            toyplot.html._stream_svg(canvas, fobj, precision, relative_paths, id_prefix)
+        else:
+            toyplot.cache._render("svg", canvas, fobj, (precision, relative_paths), lambda stream, id_prefix: toyplot.html._stream_svg(
+                canvas, stream, precision, relative_paths, id_prefix), id_prefix=id_prefix)
     elif fobj is not None:
-        fobj.write(xml.tostring(svg, method="xml"))
+        toyplot.html._stream_svg(canvas, fobj, precision, relative_paths, id_prefix)
     else:
+        html, html_animation = toyplot.html.render(
+            canvas, animation=True, precision=precision, relative_paths=relative_paths, id_prefix=id_prefix)
+        svg = html.find("svg")
         if animation:
             return svg, html_animation
         else:
@@ -9,8 +9,7 @@ from __future__ import division
 
 
 import os
-import subprocess
-import toyplot.png
+import toyplot._ffmpeg
 
 
 for path in os.environ["PATH"].split(os.pathsep):
@@ -26,7 +25,8 @@ def render(
         width=None,
         height=None,
         scale=None,
-        progress=None):
+        progress=None,
+        workers=None):
     """Render a canvas as a WebM video.
 
     By default, the canvas dimensions in CSS pixels are mapped directly to
@@ -48,11 +48,16 @@ def render(
     progress: callback function taking a single `frame` argument, optional
       Callback function that will receive the number of each frame as it's
       written; useful to provide an indication of progress to end-users.
+    workers: integer, optional
+      Number of worker processes used to render frames in parallel.  Frames
+      are still written to the video in order.
 
     Notes
     -----
-    Currently, the individual video frames are rendered using PNG representations
-    of the canvas generated with :func:`toyplot.png.render_frames()`.
+    Currently, the individual video frames are rendered as raw RGBA pixels
+    using :func:`toyplot.png.render_frames()`, and piped to ffmpeg without any
+    intermediate image compression.  If ffmpeg fails, an exception containing
+    its error output is raised.
 
     Examples
     --------
@@ -60,11 +65,66 @@ def render(
     ...   print "Writing frame %s" % frame
     ... toyplot.webm.render(canvas, "test.webm", progress=callback)
     """
+    toyplot._ffmpeg.render(canvas, filename, _command, width, height, scale, progress, workers)
 
-    command = [
+
+def render_async(
+        canvas,
+        filename,
+        width=None,
+        height=None,
+        scale=None,
+        progress=None,
+        workers=None,
+        executor=None):
+    """Render a canvas as a WebM video without blocking an :mod:`asyncio` event loop.
+
+    Parameters
+    ----------
+    canvas: :class:`toyplot.canvas.Canvas`
+      Canvas to be rendered.
+    filename: string
+      Output video filename.
+    width: number, optional
+      Specify the width of the output video in pixels.
+    height: number, optional
+      Specify the height of the output video in pixels.
+    scale: number, optional
+      Ratio of output video pixels to `canvas` drawing units.
+    progress: callback function taking a single `frame` argument, optional
+      Callback function that will receive the number of each frame as it's
+      written.
+    workers: integer, optional
+      Number of worker processes used to render frames in parallel.
+    executor: :class:`concurrent.futures.Executor`, optional
+      Executor used to run the CPU-bound rendering stages.  Defaults to the
+      event loop's default executor.
+
+    Returns
+    -------
+    video: coroutine
+      Coroutine that completes when the video has been written.
+
+    Notes
+    -----
+    Requires Python 3.7 or later.  Frames are rendered in `executor`, while
+    ffmpeg runs as an :mod:`asyncio` subprocess.
+
+    Examples
+    --------
+    >>> await toyplot.webm.render_async(canvas, "test.webm")
+    """
+    import toyplot._coroutines
+    return toyplot._coroutines.video(canvas, filename, _command, width, height, scale, progress, workers, executor)
+
+
+def _command(filename, width, height):
+    """Return the ffmpeg command that encodes raw RGBA frames read from stdin."""
+    return [
         "ffmpeg",
-        "-f", "image2pipe",
-        "-c", "png",
+        "-f", "rawvideo",
+        "-pix_fmt", "rgba",
+        "-s", "%sx%s" % (width, height),
         "-i", "-",
         #    "-pix_fmt", "yuv420p",
         "-y",
@@ -76,20 +136,3 @@ def render(
         "1M",
         filename,
     ]
-    ffmpeg = subprocess.Popen(
-        command,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE)
-    for frame, png in enumerate(
-            toyplot.png.render_frames(
-                canvas=canvas,
-                width=width,
-                height=height,
-                scale=scale,
-            )):
-        if progress is not None:
-            progress(frame)
-        ffmpeg.stdin.write(png)
-    ffmpeg.stdin.close()
-    ffmpeg.wait()